@@ -38,6 +38,12 @@ const char* password = "xxxxxxxx";
 #define RMS_BUFFER_SIZE 60
 #define SEND_INTERVAL_MS 100
 
+/* ===== UDP STREAM INPUT ===== */
+// WAVE|v|i                 one sample per datagram
+// WAVEN|k|v1|i1|...|vk|ik  k samples per datagram (k <= WAVE_BATCH_MAX)
+#define WAVE_BATCH_MAX  60
+#define WAVE_BUF_SIZE   1024
+
 /* ===== LOCAL PROTECTION ===== */
 #define OC_LIMIT   15.0f
 #define OC_CLEAR   12.0f
@@ -66,6 +72,12 @@ bool last_btn = HIGH;
 
 uint8_t oc_counter = 0;
 
+/* Samples unpacked from a WAVEN datagram, consumed one per call */
+float wave_v[WAVE_BATCH_MAX];
+float wave_i[WAVE_BATCH_MAX];
+int   wave_count = 0;
+int   wave_pos   = 0;
+
 /* ==================== PACKET ==================== */
 typedef struct {
   uint32_t node_id;
@@ -117,6 +129,27 @@ void checkFaults() {
 
 /* ==================== INPUT ==================== */
 
+int parseWaveBatch(char *buf) {
+  char *save;
+  strtok_r(buf, "|", &save);              // "WAVEN"
+  char *tok = strtok_r(NULL, "|", &save);
+  if (!tok) return 0;
+
+  int k = atoi(tok);
+  if (k <= 0 || k > WAVE_BATCH_MAX) return 0;
+
+  int n = 0;
+  while (n < k) {
+    char *v = strtok_r(NULL, "|", &save);
+    char *i = strtok_r(NULL, "|", &save);
+    if (!v || !i) break;
+    wave_v[n] = strtof(v, NULL);
+    wave_i[n] = strtof(i, NULL);
+    n++;
+  }
+  return n;
+}
+
 bool getNextSample(float *v_adc, float *i_adc) {
   if (currentMode == MODE_ADC) {
     *v_adc = analogRead(V_ADC_PIN);
@@ -125,13 +158,31 @@ bool getNextSample(float *v_adc, float *i_adc) {
   }
 
   if (currentMode == MODE_UDP) {
+    // Drain samples left over from the last batched datagram first
+    if (wave_pos < wave_count) {
+      *v_adc = wave_v[wave_pos];
+      *i_adc = wave_i[wave_pos];
+      wave_pos++;
+      return true;
+    }
+
     int sz = udp_stream.parsePacket();
     if (!sz) return false;
 
-    char buf[64];
+    static char buf[WAVE_BUF_SIZE];
     int r = udp_stream.read(buf, sizeof(buf) - 1);
     buf[r] = '\0';
 
+    if (!strncmp(buf, "WAVEN|", 6)) {
+      wave_count = parseWaveBatch(buf);
+      wave_pos = 0;
+      if (!wave_count) return false;
+      *v_adc = wave_v[0];
+      *i_adc = wave_i[0];
+      wave_pos = 1;
+      return true;
+    }
+
     return sscanf(buf, "WAVE|%f|%f", v_adc, i_adc) == 2;
   }
 
@@ -222,6 +273,7 @@ void processCommand(char *msg) {
   if (!strcmp(cmd, "RESET_CYCLE")) {
     cycle_id = 0;
     sample_idx = 0;
+    wave_count = wave_pos = 0;
     vrms = irms = 0.0f;
     for (int i = 0; i < RMS_BUFFER_SIZE; i++) {
       vbuf[i] = ibuf[i] = 0.0f;
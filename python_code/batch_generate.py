@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# ============================================================
+# BATCH SCENARIO GENERATOR
+# Rebuilds a scenario corpus in parallel across a process pool
+# Author: Noridel Herron
+# ============================================================
+#
+# Manifest format (JSON):
+#
+#   {
+#     "seed": 2025,
+#     "jobs": [
+#       {"scenario": "base.json", "nodes": 1, "out": "base.csv"},
+#       {"scenario": "t1.json",   "nodes": 3, "out": "t1.csv", "cycles": 216000}
+#     ]
+#   }
+#
+# Scenario paths are relative to the manifest. A job with nodes > 1
+# writes one file per node (t1_n1.csv, t1_n2.csv, ...). Every node of
+# every job is a separate task with its own child of the root
+# SeedSequence, so results do not depend on worker count or ordering.
+# ============================================================
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import data_generator as gen
+from fault_schedule import compile_schedule, describe, load_scenario
+
+DEFAULT_MANIFEST = "../scenarios/corpus.json"
+
+# ==================== TASKS ====================
+def build_tasks(manifest, manifest_dir, seed=None):
+    """Expand manifest jobs into one task per (job, node)"""
+    if seed is None:
+        seed = manifest.get("seed")
+
+    tasks = []
+    for job in manifest["jobs"]:
+        scenario = load_scenario(os.path.join(manifest_dir, job["scenario"]))
+        nodes = int(job.get("nodes", 1))
+        cycles = int(job.get("cycles", scenario["cycles"]))
+        out = job.get("out", f"{scenario.get('name', 'scenario')}.csv")
+        stem, ext = os.path.splitext(out)
+
+        for nid in range(1, nodes + 1):
+            name = out if nodes == 1 else f"{stem}_n{nid}{ext}"
+            tasks.append({"scenario": scenario, "node": nid,
+                          "cycles": cycles, "path": os.path.join(gen.OUT_DIR, name)})
+
+    # One independent RNG stream per task
+    for task, child in zip(tasks, np.random.SeedSequence(seed).spawn(len(tasks))):
+        task["seed"] = child
+
+    return tasks
+
+def run_task(task):
+    """Worker: compile one node's schedule and stream it to CSV"""
+    start = time.perf_counter()
+    rng = np.random.default_rng(task["seed"])
+
+    sched = compile_schedule(task["scenario"], task["node"], rng, task["cycles"])
+    blocks = gen.iter_waveform_blocks(sched.codes, rng, gen.BLOCK_CYCLES,
+                                      sched.v_mag, sched.i_mag)
+    stats = gen.write_csv_stream(task["path"], blocks,
+                                 sched.codes.size * gen.SAMPLES_PER_CYCLE)
+
+    return {
+        "path": task["path"],
+        "samples": stats.count,
+        "events": describe(sched),
+        "seconds": time.perf_counter() - start,
+    }
+
+def generate_batch(manifest_path, seed=None, workers=None):
+    """Generate every task of a manifest in a process pool"""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    tasks = build_tasks(manifest, os.path.dirname(manifest_path), seed)
+    workers = workers or os.cpu_count()
+
+    print(f"[BATCH] {len(tasks)} task(s) on {workers} worker(s)")
+    start = time.perf_counter()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_task, t) for t in tasks]
+        for fut in as_completed(futures):
+            res = fut.result()
+            results.append(res)
+            faults = ", ".join(f"{name} x{ev}" for name, (_, ev) in res["events"].items()
+                               if name != "NORMAL" and ev)
+            print(f"[OK] {res['path']}: {res['samples']} samples "
+                  f"in {res['seconds']:.2f}s ({faults or 'no faults'})")
+
+    print(f"[BATCH] Done in {time.perf_counter() - start:.2f}s")
+    return results
+
+# ==================== ENTRY POINT ====================
+# Usage: python3 batch_generate.py [manifest] [seed] [workers]
+if __name__ == "__main__":
+    manifest_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MANIFEST
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    generate_batch(manifest_path, seed, workers)
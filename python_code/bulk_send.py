@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# ============================================================
+# BULK UDP TRANSMIT
+# One syscall per tick for all nodes (sendmmsg on Linux)
+# Author: Noridel Herron
+# ============================================================
+#
+# BulkSender fans a tick's datagrams out to many destinations.
+#   "sendmmsg" -> Linux sendmmsg(2) through ctypes, one call per batch
+#   "loop"     -> socket.sendto per datagram (any platform)
+#   "auto"     -> sendmmsg when libc provides it, else loop
+# The loop backend calls `sendto` (default sock.sendto); pass an
+# asyncio DatagramTransport.sendto to send through an event loop.
+#
+# Destinations are fixed "slots" (one per node) whose sockaddr_in is
+# built once. send() takes (slot, payload) pairs where payloads are
+# bytes or writable buffers; send_cached() takes (slot, cache, k)
+# references into a wave_packets.DatagramCache and only does integer
+# math per datagram; send_addresses() takes (slot, address, length)
+# as NumPy arrays for fleets of hundreds of nodes. The iovec / msg_name
+# tables are filled through NumPy views, so the per-tick Python work
+# is a few vector stores.
+#
+# Besides the totals, every slot has packet / byte / error counters
+# (slot_packets, slot_bytes, slot_errors). They are cumulative and may
+# be caller-owned arrays (e.g. shared memory) passed as `counters`.
+#
+# Benchmark: python3 bulk_send.py [nodes ...]   (default 3 30 300)
+# ============================================================
+
+import ctypes
+import ctypes.util
+import errno
+import socket
+import sys
+import time
+
+import numpy as np
+
+from wave_packets import DatagramCache
+
+BACKENDS = ("auto", "sendmmsg", "loop")
+
+MAX_BATCH = 1024         # Linux UIO_MAXIOV
+MIN_BATCH = 8            # below this, table setup costs more than the syscalls saved
+
+# Pointer-sized words (4 bytes on 32-bit Raspberry Pi OS, 8 on 64-bit);
+# void * and size_t are both this size on Linux
+WORD = ctypes.sizeof(ctypes.c_void_p)
+
+# ==================== LINUX STRUCTS ====================
+class sockaddr_in(ctypes.Structure):
+    _fields_ = [("sin_family", ctypes.c_ushort),
+                ("sin_port",   ctypes.c_uint16),   # network byte order
+                ("sin_addr",   ctypes.c_uint8 * 4),
+                ("sin_zero",   ctypes.c_uint8 * 8)]
+
+class iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p),
+                ("iov_len",  ctypes.c_size_t)]
+
+class msghdr(ctypes.Structure):
+    _fields_ = [("msg_name",       ctypes.c_void_p),
+                ("msg_namelen",    ctypes.c_uint32),
+                ("msg_iov",        ctypes.POINTER(iovec)),
+                ("msg_iovlen",     ctypes.c_size_t),
+                ("msg_control",    ctypes.c_void_p),
+                ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags",      ctypes.c_int)]
+
+class mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", msghdr),
+                ("msg_len", ctypes.c_uint)]
+
+def _load_sendmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fn = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int]
+    fn.restype = ctypes.c_int
+    return fn
+
+_sendmmsg = _load_sendmmsg()
+
+def _address_of(payload):
+    # Pointer to a payload's bytes without copying
+    if isinstance(payload, bytes):
+        return ctypes.cast(ctypes.c_char_p(payload), ctypes.c_void_p).value
+    return ctypes.addressof(ctypes.c_char.from_buffer(payload))
+
+# ==================== SENDER ====================
+class BulkSender:
+    def __init__(self, sock, destinations, backend="auto", sendto=None, counters=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown send backend: {backend}")
+        if backend == "auto":
+            backend = "sendmmsg" if _sendmmsg else "loop"
+        if backend == "sendmmsg" and not _sendmmsg:
+            raise OSError("sendmmsg is not available on this platform")
+
+        self.sock = sock
+        self.sendto = sendto or sock.sendto
+        self.backend = backend
+        self.destinations = list(destinations)
+
+        # Counters
+        self.packets = 0
+        self.bytes = 0
+        self.calls = 0
+        self.errors = 0
+        self.t0 = time.perf_counter()
+
+        n = len(self.destinations)
+        if counters is None:
+            counters = tuple(np.zeros(n, dtype=np.int64) for _ in range(3))
+        self.slot_packets, self.slot_bytes, self.slot_errors = counters
+
+        self._all_slots = np.arange(len(self.destinations))
+        if backend == "sendmmsg":
+            self._build_tables()
+
+    def _build_tables(self):
+        n = len(self.destinations)
+        self._addrs = (sockaddr_in * n)()
+        for slot, (ip, port) in enumerate(self.destinations):
+            sa = self._addrs[slot]
+            sa.sin_family = socket.AF_INET
+            sa.sin_port = socket.htons(port)
+            sa.sin_addr[:] = list(socket.inet_aton(ip))
+
+        size = min(max(n, 1), MAX_BATCH)
+        self._iov = (iovec * size)()
+        self._msgs = (mmsghdr * size)()
+        for k in range(size):
+            hdr = self._msgs[k].msg_hdr
+            hdr.msg_namelen = ctypes.sizeof(sockaddr_in)
+            hdr.msg_iov = ctypes.pointer(self._iov[k])
+            hdr.msg_iovlen = 1
+        addr_base = ctypes.addressof(self._addrs)
+        self._slot_addr = addr_base + np.arange(n, dtype=np.uintp) * ctypes.sizeof(sockaddr_in)
+
+        # Writable word views: iov_base / iov_len and each msg_hdr.msg_name,
+        # located from the ctypes layout so 32- and 64-bit ABIs both work
+        iov_words = np.frombuffer(self._iov, dtype=np.uintp).reshape(size, ctypes.sizeof(iovec) // WORD)
+        self._iov_base_np = iov_words[:, iovec.iov_base.offset // WORD]
+        self._iov_len_np = iov_words[:, iovec.iov_len.offset // WORD]
+        msg_words = np.frombuffer(self._msgs, dtype=np.uintp).reshape(size, ctypes.sizeof(mmsghdr) // WORD)
+        self._name_np = msg_words[:, (mmsghdr.msg_hdr.offset + msghdr.msg_name.offset) // WORD]
+
+    def send(self, items):
+        """Send [(slot, payload), ...]; returns number of datagrams sent"""
+        if not items:
+            return 0
+        if self.backend == "loop" or len(items) < MIN_BATCH:
+            return self._send_loop(items)
+
+        sent = 0
+        for start in range(0, len(items), MAX_BATCH):
+            chunk = items[start:start + MAX_BATCH]
+            slots = [slot for slot, _ in chunk]
+            addrs = [_address_of(payload) for _, payload in chunk]
+            lengths = [len(payload) for _, payload in chunk]
+            sent += self._send_mmsg(slots, addrs, lengths)
+        return sent
+
+    def send_cached(self, refs):
+        """Send [(slot, cache, k), ...] where k indexes cache datagrams"""
+        if not refs:
+            return 0
+        if self.backend == "loop" or len(refs) < MIN_BATCH:
+            return self._send_loop([(slot, cache.datagram(k)) for slot, cache, k in refs])
+
+        sent = 0
+        for start in range(0, len(refs), MAX_BATCH):
+            chunk = refs[start:start + MAX_BATCH]
+            slots, addrs, lengths = [], [], []
+            for slot, cache, k in chunk:
+                off = cache.offsets
+                slots.append(slot)
+                addrs.append(cache.address + off[k])
+                lengths.append(off[k + 1] - off[k])
+            sent += self._send_mmsg(slots, addrs, lengths)
+        return sent
+
+    def send_addresses(self, slots, addrs, lengths):
+        """Send from raw (address, length) arrays; slots=None means 0..n-1"""
+        total = len(addrs)
+        if not total:
+            return 0
+        if slots is None:
+            slots = self._all_slots[:total]
+        if self.backend == "loop" or total < MIN_BATCH:
+            return self._send_loop([(slot, ctypes.string_at(a, n))
+                                    for slot, a, n in zip(slots.tolist(), addrs.tolist(),
+                                                          lengths.tolist())])
+
+        sent = 0
+        for start in range(0, total, MAX_BATCH):
+            end = start + MAX_BATCH
+            sent += self._send_mmsg(slots[start:end], addrs[start:end], lengths[start:end])
+        return sent
+
+    def _send_loop(self, items):
+        sent = 0
+        sendto = self.sendto
+        slot_packets, slot_bytes = self.slot_packets, self.slot_bytes
+        for slot, payload in items:
+            try:
+                sendto(payload, self.destinations[slot])
+                sent += 1
+                self.bytes += len(payload)
+                slot_packets[slot] += 1
+                slot_bytes[slot] += len(payload)
+            except OSError:
+                self.errors += 1
+                self.slot_errors[slot] += 1
+        self.calls += len(items)
+        self.packets += sent
+        return sent
+
+    def _send_mmsg(self, slots, addrs, lengths):
+        total = len(slots)
+        self._iov_base_np[:total] = addrs
+        self._iov_len_np[:total] = lengths
+        self._name_np[:total] = self._slot_addr[slots]
+
+        fd = self.sock.fileno()
+        done = 0
+        failed = []
+        while done < total:
+            self.calls += 1
+            ret = _sendmmsg(fd, ctypes.byref(self._msgs[done]), total - done, 0)
+            if ret < 0:
+                if ctypes.get_errno() == errno.EINTR:
+                    continue
+                # Skip the datagram that failed and carry on with the rest
+                failed.append(done)
+                done += 1
+                continue
+            done += ret
+
+        # Slots are unique within one tick, so plain fancy-index adds work
+        slots = np.asarray(slots)
+        lengths = np.asarray(lengths)
+        self.slot_packets[slots] += 1
+        self.slot_bytes[slots] += lengths
+        sent_bytes = int(lengths.sum())
+        if failed:
+            bad = slots[failed]
+            self.slot_packets[bad] -= 1
+            self.slot_bytes[bad] -= lengths[failed]
+            self.slot_errors[bad] += 1
+            sent_bytes -= int(lengths[failed].sum())
+
+        self.errors += len(failed)
+        self.packets += total - len(failed)
+        self.bytes += sent_bytes
+        return total - len(failed)
+
+    # ==================== STATISTICS ====================
+    def reset_stats(self):
+        self.packets = self.bytes = self.calls = self.errors = 0
+        self.t0 = time.perf_counter()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.t0
+        return {
+            "backend": self.backend,
+            "packets": self.packets,
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "pps": self.packets / elapsed if elapsed > 0 else 0.0,
+            "per_call": self.packets / self.calls if self.calls else 0.0,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['backend']}: {s['pps']:.0f} pkt/s, "
+                f"{s['per_call']:.1f} pkt/call, errors {s['errors']}")
+
+# ==================== BENCHMARK ====================
+def benchmark(num_nodes, backend, seconds=2.0):
+    """Blast one datagram per node per tick at a local sink; returns pkt/s"""
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    dest = sink.getsockname()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = BulkSender(sock, [dest] * num_nodes, backend)
+    cache = DatagramCache.from_samples([(2047.7, 2049.1)] * 3600)
+
+    k = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sender.send_cached([(slot, cache, k) for slot in range(num_nodes)])
+        k = (k + 1) % cache.count
+
+    stats = sender.stats()
+    sock.close()
+    sink.close()
+    return stats
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [3, 30, 300]
+    backends = ["loop"] + (["sendmmsg"] if _sendmmsg else [])
+
+    print(f"{'nodes':>6s}  {'backend':9s} {'pkt/s':>10s} {'pkt/call':>9s}")
+    for n in sizes:
+        for backend in backends:
+            s = benchmark(n, backend)
+            print(f"{n:6d}  {backend:9s} {s['pps']:10.0f} {s['per_call']:9.1f}")
@@ -6,9 +6,19 @@
 # Flexible: Choose RMS (actual) or RAW ADC conversion
 # ============================================================
 
+import contextlib
 import csv
+import hashlib
+import io
+import json
 import os
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import sample_store
 
 # ---------------------------------------------------
 # CONFIG: CSV folder + header output folder
@@ -28,6 +38,75 @@ os.makedirs(HEADER_FOLDER, exist_ok=True)
 
 CONVERSION_MODE = 0  # Change this to 1 for RAW mode
 
+# ---------------------------------------------------
+# RAW HEADER LAYOUT (RAW mode only)
+# ---------------------------------------------------
+# "int"     = const int arrays, every sample (original layout)
+# "compact" = const uint16_t arrays; an exactly periodic signal
+#             stores one period, read with NAME_VOLTAGE(k)
+# "rle"     = compact + delta/run-length encoded arrays, read on
+#             the node sample by sample with NAME_VOLTAGE_NEXT(cursor)
+#             straight from flash, no RAM copy of the period (falls
+#             back to compact where it would not be smaller)
+# ---------------------------------------------------
+
+RAW_LAYOUT = "int"
+RAW_LAYOUTS = ("int", "compact", "rle")
+RLE_MAX_RUN = 65535   # runs are uint16_t
+PERIOD_PREFIX = 64    # samples every candidate period must match first
+PERIOD_BLOCK = 1 << 16   # samples per compare when checking a period
+
+# ---------------------------------------------------
+# BUILD CACHE
+# ---------------------------------------------------
+# A header is rebuilt only when the hash of its source CSV, the
+# conversion options or this script changes. Headers are replaced
+# atomically and only when their text differs, so unchanged headers
+# keep their mtime and do not trigger a firmware rebuild.
+# ---------------------------------------------------
+
+CACHE_FILE = ".header_cache.json"   # inside HEADER_FOLDER
+
+# ---------------------------------------------------
+# Header text helpers
+# ---------------------------------------------------
+
+def format_array(values, fmt, per_line):
+    """Array initializer body: per_line items per row, "v, v, " style"""
+    items = [fmt % v for v in values]
+    rows = ["    " + ", ".join(items[k:k + per_line]) for k in range(0, len(items), per_line)]
+    return ", \n".join(rows) + "\n" if rows else ""
+
+
+def new_file_mode():
+    """Mode open() would give a new file (0666 minus the umask)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def write_if_changed(path, text):
+    """Atomically replace path with text; False if it already matched"""
+    data = text.encode()
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+            mode = os.stat(f.fileno()).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = new_file_mode()
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # mkstemp creates 0600; keep the mode the header already had
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
 # ---------------------------------------------------
 # Convert RMS CSV (Voltage_RMS, Current_RMS) → .h file
 # ---------------------------------------------------
@@ -94,45 +173,28 @@ def convert_rms_csv_to_header(csv_filename, header_filename, mode_name):
     sample_count = len(rms_v)
     print(f"{sample_count} samples")
 
-    # Write header file
-    with open(header_path, "w") as h:
-        guard = header_filename.replace(".", "_").upper()
-
-        h.write(f"#ifndef {guard}\n")
-        h.write(f"#define {guard}\n")
-        h.write("// AUTO-GENERATED RMS WAVEFORM FILE\n")
-        h.write(f"// MODE: {mode_name.upper()}\n")
-        h.write(f"// TYPE: RMS (Actual Values)\n")
-        h.write(f"// TOTAL SAMPLES: {sample_count}\n\n")
-        
+    # Write header file (built in memory, one write)
+    guard = header_filename.replace(".", "_").upper()
+    text = [
+        f"#ifndef {guard}\n",
+        f"#define {guard}\n",
+        "// AUTO-GENERATED RMS WAVEFORM FILE\n",
+        f"// MODE: {mode_name.upper()}\n",
+        f"// TYPE: RMS (Actual Values)\n",
+        f"// TOTAL SAMPLES: {sample_count}\n\n",
         # Sample count constant
-        h.write(f"const int {mode_name}_sample_count = {sample_count};\n\n")
-        
+        f"const int {mode_name}_sample_count = {sample_count};\n\n",
         # RMS voltage array
-        h.write(f"const float {mode_name}_raw_voltage[{sample_count}] = {{\n")
-        for i, v in enumerate(rms_v):
-            if i % 5 == 0:
-                h.write("    ")
-            h.write(f"{v:.3f}f")
-            if i < sample_count - 1:
-                h.write(", ")
-            if (i + 1) % 5 == 0 or i == sample_count - 1:
-                h.write("\n")
-        h.write("};\n\n")
-        
+        f"const float {mode_name}_raw_voltage[{sample_count}] = {{\n",
+        format_array(rms_v, "%.3ff", 5),
+        "};\n\n",
         # RMS current array
-        h.write(f"const float {mode_name}_raw_current[{sample_count}] = {{\n")
-        for i, c in enumerate(rms_i):
-            if i % 5 == 0:
-                h.write("    ")
-            h.write(f"{c:.3f}f")
-            if i < sample_count - 1:
-                h.write(", ")
-            if (i + 1) % 5 == 0 or i == sample_count - 1:
-                h.write("\n")
-        h.write("};\n\n")
-        
-        h.write(f"#endif // {guard}\n")
+        f"const float {mode_name}_raw_current[{sample_count}] = {{\n",
+        format_array(rms_i, "%.3ff", 5),
+        "};\n\n",
+        f"#endif // {guard}\n",
+    ]
+    changed = write_if_changed(header_path, "".join(text))
 
     # Print statistics
     v_min, v_max = min(rms_v), max(rms_v)
@@ -140,28 +202,21 @@ def convert_rms_csv_to_header(csv_filename, header_filename, mode_name):
     v_avg = sum(rms_v) / len(rms_v)
     i_avg = sum(rms_i) / len(rms_i)
     
-    print(f"  Generated: {header_filename}")
+    print(f"  {'Generated' if changed else 'Unchanged'}: {header_filename}")
     print(f"    Voltage: min={v_min:.2f}V, max={v_max:.2f}V, avg={v_avg:.2f}V")
     print(f"    Current: min={i_min:.2f}A, max={i_max:.2f}A, avg={i_avg:.2f}A")
+    return True
 
 
 # ---------------------------------------------------
 # Convert RAW CSV (Raw_V, Raw_I) → .h file
 # ---------------------------------------------------
 
-def convert_raw_csv_to_header(csv_filename, header_filename, mode_name):
-    """
-    Read CSV with Raw_V and Raw_I columns.
-    Generate C header file with two integer arrays.
-    """
-    csv_path = f"{CSV_FOLDER}/{csv_filename}"
-    header_path = f"{HEADER_FOLDER}/{header_filename}"
-
+def read_raw_csv(csv_path):
+    """Parse Raw_V/Raw_I columns from CSV as truncated ints"""
     raw_v = []
     raw_i = []
 
-    # Read CSV
-    print(f"Reading: {csv_filename}...", end=" ")
     try:
         with open(csv_path, "r") as f:
             reader = csv.DictReader(f)
@@ -170,7 +225,7 @@ def convert_raw_csv_to_header(csv_filename, header_filename, mode_name):
             first_row = next(reader, None)
             if first_row is None:
                 print(f"ERROR - Empty file!")
-                return
+                return None, None
             
             # Check what columns exist and map them
             columns = list(first_row.keys())
@@ -189,7 +244,7 @@ def convert_raw_csv_to_header(csv_filename, header_filename, mode_name):
             if not v_col or not i_col:
                 print(f"  ERROR - Could not find RAW voltage/current columns!")
                 print(f"  Available columns: {columns}")
-                return
+                return None, None
             
             print(f"  Using: {v_col} and {i_col}")
             
@@ -203,60 +258,321 @@ def convert_raw_csv_to_header(csv_filename, header_filename, mode_name):
                 raw_i.append(int(float(row[i_col])))
     except FileNotFoundError:
         print(f"ERROR - File not found!")
-        return
+        return None, None
     except KeyError as e:
         print(f"ERROR - Missing column: {e}")
+        return None, None
+
+    return raw_v, raw_i
+
+
+def shifted_equal(x, p, block=PERIOD_BLOCK):
+    """x[k] == x[k - p] for every k, compared a block at a time"""
+    n = len(x)
+    for s in range(0, n - p, block):
+        e = min(s + block, n - p)
+        if not np.array_equal(x[s + p:e + p], x[s:e]):
+            return False
+    return True
+
+
+def find_period(x, min_repeats=2):
+    """Smallest p with x[k] == x[k - p] for every k, or len(x) if none"""
+    x = np.asarray(x)
+    n = len(x)
+    # Only lags where the first samples recur can be a period: narrow the
+    # candidates one prefix sample at a time (a vector compare each), then
+    # check the survivors block by block so a mismatch stops early
+    lags = np.flatnonzero(x[1:n // min_repeats + 1] == x[0]) + 1
+    for j in range(1, min(PERIOD_PREFIX, n - n // min_repeats)):
+        if not len(lags):
+            break
+        lags = lags[x[lags + j] == x[j]]
+    for p in lags:
+        if shifted_equal(x, p):
+            return int(p)
+    return n
+
+
+def rle_delta(x):
+    """uint16 samples -> (runs, deltas): each run adds its delta `run` times"""
+    d = np.diff(np.asarray(x, dtype=np.int32), prepend=0)
+    starts = np.flatnonzero(np.r_[True, d[1:] != d[:-1]])
+    runs = np.diff(np.r_[starts, len(d)])
+    deltas = d[starts]
+    # Split runs longer than a uint16_t can count
+    pieces = (runs + RLE_MAX_RUN - 1) // RLE_MAX_RUN
+    if (pieces > 1).any():
+        deltas = np.repeat(deltas, pieces)
+        last = np.cumsum(pieces) - 1
+        split = np.full(pieces.sum(), RLE_MAX_RUN)
+        split[last] = runs - (pieces - 1) * RLE_MAX_RUN
+        runs = split
+    return runs, deltas
+
+
+RLE_READER_TEXT = """\
+// Streaming runs/deltas reader: each run adds its delta to the running
+// value `run` times. A cursor walks the tables in flash one sample per
+// call and wraps to the start of the period after the last run.
+#ifndef RAW_RLE_CURSOR_INIT
+#define RAW_RLE_CURSOR_INIT {0, 0, 0}
+typedef struct {
+    uint32_t run;      // index into runs / deltas
+    uint16_t pos;      // samples already taken from this run
+    uint16_t value;    // last sample returned
+} raw_rle_cursor_t;
+
+static inline uint16_t raw_rle_next(raw_rle_cursor_t *c, const uint16_t *runs,
+                                    const int16_t *deltas, uint32_t nruns)
+{
+    if (c->pos == runs[c->run]) {
+        c->pos = 0;
+        if (++c->run == nruns) {
+            c->run = 0;
+            c->value = 0;    // first delta of a period is the absolute sample
+        }
+    }
+    c->pos++;
+    c->value = (uint16_t)(c->value + deltas[c->run]);
+    return c->value;
+}
+#endif
+
+"""
+
+
+def compact_array_text(name, macro, samples, rle):
+    """One signal as uint16_t data: a single period, optionally delta/RLE"""
+    x = np.asarray(samples, dtype=np.uint16)
+    period = find_period(x)
+    base = x[:period]
+    n = len(x)
+    note = (f"period {period} x {n // period}" + (f" + {n % period}" if n % period else "")
+            if period < n else "no exact period")
+
+    text = [f"#define {macro}_PERIOD {period}\n"]
+    used_rle = False
+    if rle:
+        runs, deltas = rle_delta(base)
+        used_rle = len(runs) * 4 < period * 2   # uint16_t run + int16_t delta
+    if used_rle:
+        note += f", delta/RLE {len(runs)} runs"
+        text += [
+            f"#define {macro}_RUNS {len(runs)}\n",
+            f"const uint16_t {name}_runs[{len(runs)}] = {{\n",
+            format_array(runs.tolist(), "%5d", 10),
+            "};\n",
+            f"const int16_t {name}_deltas[{len(runs)}] = {{\n",
+            format_array(deltas.tolist(), "%5d", 10),
+            "};\n",
+            f"// raw_rle_cursor_t c = RAW_RLE_CURSOR_INIT; each {macro}_NEXT(c) is the next sample\n",
+            f"#define {macro}_NEXT(c) raw_rle_next(&(c), {name}_runs, {name}_deltas, {macro}_RUNS)\n\n",
+        ]
+    else:
+        text += [
+            f"const uint16_t {name}[{period}] = {{\n",
+            format_array(base.tolist(), "%4d", 10),
+            "};\n",
+            f"#define {macro}(k) ({name}[(k) % {macro}_PERIOD])\n\n",
+        ]
+    return note, used_rle, "".join(text)
+
+
+def raw_header_text(raw_v, raw_i, header_filename, mode_name, layout):
+    guard = header_filename.replace(".", "_").upper()
+    sample_count = len(raw_v)
+
+    if layout == "int":
+        return "".join([
+            f"#ifndef {guard}\n",
+            f"#define {guard}\n",
+            "// AUTO-GENERATED RAW ADC WAVEFORM FILE\n",
+            f"// MODE: {mode_name.upper()}\n",
+            f"// TYPE: RAW (ADC Values)\n",
+            f"// TOTAL SAMPLES: {sample_count}\n\n",
+            # Sample count constant
+            f"const int {mode_name}_sample_count = {sample_count};\n\n",
+            # Raw voltage array (as integers)
+            f"const int {mode_name}_raw_voltage[{sample_count}] = {{\n",
+            format_array(raw_v, "%4d", 10),
+            "};\n\n",
+            # Raw current array (as integers)
+            f"const int {mode_name}_raw_current[{sample_count}] = {{\n",
+            format_array(raw_i, "%4d", 10),
+            "};\n\n",
+            f"#endif // {guard}\n",
+        ])
+
+    rle = layout == "rle"
+    v_note, v_rle, v_text = compact_array_text(f"{mode_name}_raw_voltage",
+                                               f"{mode_name.upper()}_VOLTAGE", raw_v, rle)
+    i_note, i_rle, i_text = compact_array_text(f"{mode_name}_raw_current",
+                                               f"{mode_name.upper()}_CURRENT", raw_i, rle)
+    return "".join([
+        f"#ifndef {guard}\n",
+        f"#define {guard}\n",
+        "// AUTO-GENERATED RAW ADC WAVEFORM FILE\n",
+        f"// MODE: {mode_name.upper()}\n",
+        f"// TYPE: RAW (ADC Values, uint16_t, {layout})\n",
+        f"// TOTAL SAMPLES: {sample_count}\n",
+        f"// VOLTAGE: {v_note}\n",
+        f"// CURRENT: {i_note}\n\n",
+        "#include <stdint.h>\n\n",
+        RLE_READER_TEXT if (v_rle or i_rle) else "",
+        f"const int {mode_name}_sample_count = {sample_count};\n\n",
+        v_text,
+        i_text,
+        f"#endif // {guard}\n",
+    ])
+
+
+def convert_raw_csv_to_header(csv_filename, header_filename, mode_name, layout=None):
+    """
+    Read CSV with Raw_V and Raw_I columns.
+    Generate C header file with two integer arrays
+    (or compact uint16_t arrays, see RAW_LAYOUT).
+    """
+    layout = layout or RAW_LAYOUT
+    if layout not in RAW_LAYOUTS:
+        print(f"ERROR - Unknown raw layout: {layout}")
         return
+    csv_path = f"{CSV_FOLDER}/{csv_filename}"
+    header_path = f"{HEADER_FOLDER}/{header_filename}"
+
+    # Read CSV
+    print(f"Reading: {csv_filename}...", end=" ")
+    bin_path = sample_store.find_binary(csv_path)
+    if bin_path:
+        # Memory-mapped binary store: tenths of a count -> int(float(x))
+        tenths = sample_store.load_samples(bin_path)
+        raw_v = (tenths[:, 0] // 10).tolist()
+        raw_i = (tenths[:, 1] // 10).tolist()
+        print(f"  Using: {os.path.basename(bin_path)}")
+    else:
+        raw_v, raw_i = read_raw_csv(csv_path)
+        if raw_v is None:
+            return
 
     sample_count = len(raw_v)
     print(f"{sample_count} samples")
 
-    # Write header file
-    with open(header_path, "w") as h:
-        guard = header_filename.replace(".", "_").upper()
-
-        h.write(f"#ifndef {guard}\n")
-        h.write(f"#define {guard}\n")
-        h.write("// AUTO-GENERATED RAW ADC WAVEFORM FILE\n")
-        h.write(f"// MODE: {mode_name.upper()}\n")
-        h.write(f"// TYPE: RAW (ADC Values)\n")
-        h.write(f"// TOTAL SAMPLES: {sample_count}\n\n")
-        
-        # Sample count constant
-        h.write(f"const int {mode_name}_sample_count = {sample_count};\n\n")
-        
-        # Raw voltage array (as integers)
-        h.write(f"const int {mode_name}_raw_voltage[{sample_count}] = {{\n")
-        for i, v in enumerate(raw_v):
-            if i % 10 == 0:
-                h.write("    ")
-            h.write(f"{v:4d}")
-            if i < sample_count - 1:
-                h.write(", ")
-            if (i + 1) % 10 == 0 or i == sample_count - 1:
-                h.write("\n")
-        h.write("};\n\n")
-        
-        # Raw current array (as integers)
-        h.write(f"const int {mode_name}_raw_current[{sample_count}] = {{\n")
-        for i, c in enumerate(raw_i):
-            if i % 10 == 0:
-                h.write("    ")
-            h.write(f"{c:4d}")
-            if i < sample_count - 1:
-                h.write(", ")
-            if (i + 1) % 10 == 0 or i == sample_count - 1:
-                h.write("\n")
-        h.write("};\n\n")
-        
-        h.write(f"#endif // {guard}\n")
+    # Write header file (built in memory, one write)
+    text = raw_header_text(raw_v, raw_i, header_filename, mode_name, layout)
+    changed = write_if_changed(header_path, text)
 
     # Print statistics
     v_min, v_max = min(raw_v), max(raw_v)
     i_min, i_max = min(raw_i), max(raw_i)
-    print(f"  Generated: {header_filename}")
+    print(f"  {'Generated' if changed else 'Unchanged'}: {header_filename} ({layout}, {len(text)} bytes)")
     print(f"    Voltage range: {v_min:4d} - {v_max:4d} (swing: {v_max-v_min:4d})")
     print(f"    Current range: {i_min:4d} - {i_max:4d} (swing: {i_max-i_min:4d})")
+    return True
+
+
+# ---------------------------------------------------
+# Incremental conversion (build cache + process pool)
+# ---------------------------------------------------
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def job_key(job):
+    """Hash of the source data, the conversion options and this script"""
+    csv_path = f"{job['csv_folder']}/{job['csv']}"
+    source = csv_path if os.path.exists(csv_path) else sample_store.find_binary(csv_path)
+    if source is None:
+        return None
+    options = {k: job[k] for k in ("kind", "header", "mode_name", "layout")}
+    h = hashlib.sha256()
+    h.update(file_sha256(os.path.abspath(__file__)).encode())
+    h.update(json.dumps(options, sort_keys=True).encode())
+    h.update(file_sha256(source).encode())
+    return h.hexdigest()
+
+
+def load_cache(header_folder):
+    try:
+        with open(os.path.join(header_folder, CACHE_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_cache(header_folder, cache):
+    write_if_changed(os.path.join(header_folder, CACHE_FILE),
+                     json.dumps(cache, indent=2, sort_keys=True) + "\n")
+
+
+def run_job(job):
+    """Worker: one conversion, console output captured for the parent"""
+    global CSV_FOLDER, HEADER_FOLDER
+    CSV_FOLDER, HEADER_FOLDER = job["csv_folder"], job["header_folder"]
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        if job["kind"] == "rms":
+            ok = convert_rms_csv_to_header(job["csv"], job["header"], job["mode_name"])
+        else:
+            ok = convert_raw_csv_to_header(job["csv"], job["header"], job["mode_name"], job["layout"])
+    return bool(ok), out.getvalue()
+
+
+def convert_all(conversions, kind, layout=None, force=False, workers=None):
+    """Convert (csv, header, mode_name) tuples, skipping up-to-date headers"""
+    layout = layout or RAW_LAYOUT
+    jobs = [{"kind": kind, "csv": c, "header": h, "mode_name": m,
+             "layout": layout if kind == "raw" else None,
+             "csv_folder": CSV_FOLDER, "header_folder": HEADER_FOLDER}
+            for c, h, m in conversions]
+
+    cache = load_cache(HEADER_FOLDER)
+    stale = []
+    for job in jobs:
+        job["key"] = job_key(job)
+        entry = cache.get(job["header"], {})
+        header_path = os.path.join(HEADER_FOLDER, job["header"])
+        if (not force and job["key"] is not None and entry.get("key") == job["key"]
+                and os.path.exists(header_path) and file_sha256(header_path) == entry.get("output")):
+            print(f"Up to date: {job['header']} ({job['csv']} unchanged)\n")
+        else:
+            stale.append(job)
+
+    if not stale:
+        return
+    workers = min(len(stale), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_job, stale))
+    else:
+        results = [run_job(job) for job in stale]
+
+    for job, (ok, log) in zip(stale, results):
+        print(log)
+        header_path = os.path.join(HEADER_FOLDER, job["header"])
+        if ok and job["key"] is not None:
+            cache[job["header"]] = {"key": job["key"], "source": job["csv"],
+                                    "output": file_sha256(header_path)}
+        else:
+            cache.pop(job["header"], None)
+    save_cache(HEADER_FOLDER, cache)
+
+
+RMS_CONVERSIONS = [
+    ("real_rms.csv",   "real_raw.h",   "real"),
+    ("random_rms.csv", "random_raw.h", "random"),
+    ("wave_rms.csv",   "wave_raw.h",   "wave"),
+]
+
+RAW_CONVERSIONS = [
+    ("real_raw.csv",   "real_raw.h",   "real"),
+    ("random_raw.csv", "random_raw.h", "random"),
+    ("wave_raw.csv",   "wave_raw.h",   "wave"),
+]
 
 
 # ---------------------------------------------------
@@ -264,6 +580,10 @@ def convert_raw_csv_to_header(csv_filename, header_filename, mode_name):
 # ---------------------------------------------------
 
 if __name__ == "__main__":
+    # --force rebuilds every header regardless of the build cache
+    FORCE = "--force" in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg != "--force"]
+
     # Check for command line argument
     if len(sys.argv) > 1:
         try:
@@ -274,6 +594,11 @@ if __name__ == "__main__":
         except ValueError:
             print("ERROR: Mode must be 0 (RMS) or 1 (RAW)")
             sys.exit(1)
+    if len(sys.argv) > 2:
+        RAW_LAYOUT = sys.argv[2]
+        if RAW_LAYOUT not in RAW_LAYOUTS:
+            print(f"ERROR: Layout must be one of {', '.join(RAW_LAYOUTS)}")
+            sys.exit(1)
     
     print("\n" + "="*70)
     print("  CSV TO HEADER CONVERTER")
@@ -287,11 +612,7 @@ if __name__ == "__main__":
         # RMS MODE (ACTUAL VALUES)
         print("\n🔹 CONVERTING RMS FILES (Actual Values)")
         print("="*70)
-        convert_rms_csv_to_header("real_rms.csv", "real_raw.h", "real")
-        print()
-        convert_rms_csv_to_header("random_rms.csv", "random_raw.h", "random")
-        print()
-        convert_rms_csv_to_header("wave_rms.csv", "wave_raw.h", "wave")
+        convert_all(RMS_CONVERSIONS, "rms", force=FORCE)
         
         print("\n" + "="*70)
         print("✓ RMS Conversion Complete!")
@@ -310,33 +631,33 @@ if __name__ == "__main__":
         
     else:
         # RAW MODE (ADC VALUES)
-        print("\n🔹 CONVERTING RAW ADC FILES")
+        print(f"\n🔹 CONVERTING RAW ADC FILES (layout: {RAW_LAYOUT})")
         print("="*70)
-        convert_raw_csv_to_header("real_raw.csv", "real_raw.h", "real")
-        print()
-        convert_raw_csv_to_header("random_raw.csv", "random_raw.h", "random")
-        print()
-        convert_raw_csv_to_header("wave_raw.csv", "wave_raw.h", "wave")
+        convert_all(RAW_CONVERSIONS, "raw", RAW_LAYOUT, force=FORCE)
         
         print("\n" + "="*70)
         print("✓ RAW ADC Conversion Complete!")
         print("="*70)
-        print("\nGenerated files (RAW - int arrays):")
+        raw_type = "int" if RAW_LAYOUT == "int" else "uint16_t"
+        print(f"\nGenerated files (RAW - {raw_type} arrays):")
         print("  - real_raw.h")
         print("  - random_raw.h")
         print("  - wave_raw.h")
         print("\nArray names in headers:")
-        print("  - real_raw_voltage[]    (int)")
-        print("  - real_raw_current[]    (int)")
-        print("  - random_raw_voltage[]  (int)")
-        print("  - random_raw_current[]  (int)")
-        print("  - wave_raw_voltage[]    (int)")
-        print("  - wave_raw_current[]    (int)")
+        print(f"  - real_raw_voltage[]    ({raw_type})")
+        print(f"  - real_raw_current[]    ({raw_type})")
+        print(f"  - random_raw_voltage[]  ({raw_type})")
+        print(f"  - random_raw_current[]  ({raw_type})")
+        print(f"  - wave_raw_voltage[]    ({raw_type})")
+        print(f"  - wave_raw_current[]    ({raw_type})")
     
     print("\nUsage:")
     print("  Default (RMS):  python3 csv_to_header.py")
     print("  Force RMS:      python3 csv_to_header.py 0")
     print("  Force RAW:      python3 csv_to_header.py 1")
+    print("  Compact RAW:    python3 csv_to_header.py 1 compact   (uint16_t, one period)")
+    print("  Compact + RLE:  python3 csv_to_header.py 1 rle       (delta/RLE, read with NAME_VOLTAGE_NEXT)")
+    print("  Rebuild all:    python3 csv_to_header.py [mode] [layout] --force")
     print("\nTo switch modes, edit CONVERSION_MODE at top of script")
     print("or pass mode as command line argument")
     print()
\ No newline at end of file
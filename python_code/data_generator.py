@@ -9,11 +9,20 @@ import csv
 import math
 import random
 import os
+import sys
+import numpy as np
+from fault_schedule import (STATE_NAMES, STATE_CODE, CycleSchedule, compile_schedule,
+                            draw_events, load_scenario, render_schedule)
+import sample_store
+from wave_packets import adc_text
 # OUTPUT CONFIG
 OUT_DIR = "../csv_output"
 os.makedirs(OUT_DIR, exist_ok=True)
 OUT_FILE = "realistic_raw.csv"
 
+# STREAMING CONFIG
+BLOCK_CYCLES = 600               # cycles generated/written per block (~10 s)
+
 # SIGNAL CONFIG
 FREQ = 60.0
 SAMPLES_PER_CYCLE = 60
@@ -38,6 +47,23 @@ V_SAG_LEVEL = 50.0      # Below this = SAG
 V_SWELL_LEVEL = 130.0   # Above this = SWELL
 I_OC_LEVEL = 11.0       # Above this = OVERCURRENT
 
+# RMS ranges drawn per cycle: state -> ((v_lo, v_hi), (i_lo, i_hi))
+# None keeps the NORMAL range for that channel
+NORMAL_VRMS = (105.0, 120.0)
+NORMAL_IRMS = (5.0, 9.0)
+STATE_RMS_RANGES = {
+    "NORMAL":  (None,           None),
+    "SAG":     ((30.0, 45.0),   None),
+    "SWELL":   ((135.0, 145.0), None),
+    "OC":      (None,           (15.5, 16.5)),
+    "RECOVER": (None,           (6.0, 9.0)),
+}
+
+# One cycle of unit sine, identical for every cycle because
+# SAMPLES_PER_CYCLE samples span exactly one period
+CYCLE_PHASE = 2.0 * np.pi * FREQ * np.arange(SAMPLES_PER_CYCLE) / (FREQ * SAMPLES_PER_CYCLE)
+UNIT_SINE = np.sin(CYCLE_PHASE)
+
 # ADC CONVERSION
 def physical_to_adc(v_inst, i_inst):
     """Convert instantaneous physical values to ADC counts"""
@@ -51,35 +77,40 @@ def physical_to_adc(v_inst, i_inst):
     
     return round(v_adc, 1), round(i_adc, 1)
 
+def physical_to_adc_np(v_inst, i_inst, rng, noise=NOISE_COUNTS):
+    """Vectorized physical_to_adc: arrays in, (N, 2) ADC array out"""
+    n = v_inst.size
+    out = np.empty((n, 2))
+    out[:, 0] = ADC_MID + v_inst / V_SCALE
+    out[:, 1] = ADC_MID + i_inst / I_SCALE
+
+    # Noise for both channels in one batch
+    if noise:
+        out += rng.uniform(-noise, noise, size=(n, 2))
+
+    np.clip(out, 0.0, ADC_MAX, out=out)
+    return np.round(out, 1, out=out)
+
 # FAULT SCHEDULER (RARE EVENTS)
-def build_cycle_states(num_cycles):
-    states = ["NORMAL"] * num_cycles
-    
-    # ---- FIRST GUARANTEED TRIP ----
-    for c in range(150, 156):   # sustained OC
-        states[c] = "OC"
-    
-    # ---- SECOND GUARANTEED TRIP ----
-    for c in range(400, 406):
-        states[c] = "OC"
+# Default schedule, same format as the files in ../scenarios
+# (see fault_schedule.py). Add SAG/SWELL events here, e.g.
+#   {"type": "SAG",   "start": 500, "duration": 3},
+#   {"type": "SWELL", "start": 700, "duration": 3},
+DEFAULT_SCENARIO = {
+    "name": "realistic",
+    "cycles": TOTAL_CYCLES,
+    "events": [
+        {"type": "OC", "start": 150,  "duration": 6},   # first guaranteed trip
+        {"type": "OC", "start": 400,  "duration": 6},   # second guaranteed trip
+        {"type": "OC", "start": 600,  "duration": 6},
+        {"type": "OC", "start": 800,  "duration": 6},
+        {"type": "OC", "start": 1000, "duration": 6},
+    ],
+}
 
-    for c in range(600, 606):   # sustained OC
-        states[c] = "OC"
-    
-    for c in range(800, 806):
-        states[c] = "OC"
-    
-    for c in range(1000, 1006):
-        states[c] = "OC"
-    """
-    # ---- OCCASIONAL SAG / SWELL ----
-    for c in range(500, 503):
-        states[c] = "SAG"
-
-    for c in range(700, 703):
-        states[c] = "SWELL"
-    """
-    return states
+def build_cycle_states(num_cycles):
+    codes = compile_schedule(DEFAULT_SCENARIO, num_cycles=num_cycles).codes
+    return [STATE_NAMES[c] for c in codes]
 
 # ============================================================
 # MAIN GENERATOR
@@ -142,13 +173,206 @@ def generate_waveform():
     
     return rows
 
+# ============================================================
+# NUMPY ENGINE
+# Same signal model as generate_waveform(), built a cycle at a time
+# ============================================================
+def states_to_codes(states):
+    """Map a list of state names to an int8 code array"""
+    return np.fromiter((STATE_CODE[s] for s in states), dtype=np.int8, count=len(states))
+
+def draw_cycle_rms(codes, rng, v_mag=None, i_mag=None):
+    """Draw per-cycle Vrms/Irms for an array of state codes.
+    Finite entries of v_mag / i_mag (from a compiled schedule) override the draw."""
+    n = codes.size
+    vrms = rng.uniform(*NORMAL_VRMS, size=n)
+    irms = rng.uniform(*NORMAL_IRMS, size=n)
+
+    for name, (v_range, i_range) in STATE_RMS_RANGES.items():
+        mask = codes == STATE_CODE[name]
+        count = int(np.count_nonzero(mask))
+        if not count:
+            continue
+        if v_range:
+            vrms[mask] = rng.uniform(*v_range, size=count)
+        if i_range:
+            irms[mask] = rng.uniform(*i_range, size=count)
+
+    for rms, mag in ((vrms, v_mag), (irms, i_mag)):
+        if mag is not None:
+            fixed = np.isfinite(mag)
+            rms[fixed] = mag[fixed]
+
+    return vrms, irms
+
+def synthesize_cycles(vrms, irms, rng, noise=NOISE_COUNTS):
+    """Build (cycles * SAMPLES_PER_CYCLE, 2) ADC samples from per-cycle RMS"""
+    vpeak = vrms * math.sqrt(2.0)
+    ipeak = irms * math.sqrt(2.0)
+
+    # (cycles, 1) x (1, samples) -> one row of phase samples per cycle
+    v_inst = np.outer(vpeak, UNIT_SINE).ravel()
+    i_inst = np.outer(ipeak, UNIT_SINE).ravel()
+
+    return physical_to_adc_np(v_inst, i_inst, rng, noise)
+
+def generate_waveform_np(states=None, seed=None, schedule=None, rng=None):
+    """NumPy engine for generate_waveform(), reproducible from seed.
+    Cycle states come from a compiled schedule, a list of state names,
+    or the default schedule."""
+    print("[GEN] Generating realistic power waveform (NumPy engine)...")
+    print(f"[GEN] V_SCALE={V_SCALE:.6f} V/count")
+    print(f"[GEN] I_SCALE={I_SCALE:.6f} A/count")
+    print(f"[GEN] seed={seed}\n")
+
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    v_mag = i_mag = None
+    if schedule is not None:
+        codes, v_mag, i_mag = schedule.codes, schedule.v_mag, schedule.i_mag
+    elif states is not None:
+        codes = states_to_codes(states)
+    else:
+        codes = compile_schedule(DEFAULT_SCENARIO).codes
+
+    vrms, irms = draw_cycle_rms(codes, rng, v_mag, i_mag)
+    rows = synthesize_cycles(vrms, irms, rng)
+
+    # Print statistics
+    counts = np.bincount(codes, minlength=len(STATE_NAMES))
+    print("[STATS] Cycle distribution:")
+    for code, name in enumerate(STATE_NAMES):
+        if name == "RECOVER" and not counts[code]:
+            continue
+        pct = 100.0 * counts[code] / codes.size
+        print(f"  {name:8s}: {counts[code]:4d} cycles ({pct:5.2f}%)")
+
+    return rows
+
+# ============================================================
+# STREAMING MODE
+# Fixed-size blocks of cycles, written as they are produced
+# ============================================================
+
+def format_csv_block(block):
+    """Format an (N, 2) ADC block as CSV text"""
+    # Samples are quantized to 0.1 counts, so a row is two lookups in
+    # the same table the WAVE datagrams are built from
+    text = adc_text(block)
+    return "".join((text[:, 0] + "," + text[:, 1] + "\n").tolist())
+
+class AdcStats:
+    """Running min/max/mean of ADC samples, O(1) memory"""
+
+    def __init__(self):
+        self.count = 0
+        self.min = np.full(2, np.inf)
+        self.max = np.full(2, -np.inf)
+        self.sum = np.zeros(2)
+
+    def update(self, block):
+        if not len(block):
+            return
+        self.count += len(block)
+        np.minimum(self.min, block.min(axis=0), out=self.min)
+        np.maximum(self.max, block.max(axis=0), out=self.max)
+        self.sum += block.sum(axis=0)
+
+    def mean(self):
+        return self.sum / max(self.count, 1)
+
+def iter_waveform_blocks(codes, rng, block_cycles=BLOCK_CYCLES, v_mag=None, i_mag=None):
+    """Yield (block_cycles * SAMPLES_PER_CYCLE, 2) ADC blocks for a code array"""
+    for start in range(0, codes.size, block_cycles):
+        end = start + block_cycles
+        vrms, irms = draw_cycle_rms(
+            codes[start:end], rng,
+            None if v_mag is None else v_mag[start:end],
+            None if i_mag is None else i_mag[start:end])
+        yield synthesize_cycles(vrms, irms, rng)
+
+def write_csv_stream(path, blocks, num_samples=None):
+    """Write blocks to CSV as they arrive; returns running AdcStats.
+    With num_samples, the binary sample store is filled alongside."""
+    stats = AdcStats()
+    store = None
+    if num_samples is not None:
+        store = sample_store.open_writer(sample_store.binary_path(path), num_samples)
+
+    with open(path, "w", newline="") as f:
+        f.write("Raw_V,Raw_I\n")
+        for block in blocks:
+            f.write(format_csv_block(block))
+            if store is not None:
+                store[stats.count:stats.count + len(block)] = sample_store.encode(block)
+            stats.update(block)
+
+    if store is not None:
+        store.flush()
+        del store
+        # Mark the binary as current relative to the CSV just closed
+        os.utime(sample_store.binary_path(path))
+    return stats
+
+def iter_schedule_blocks(num_cycles, block_cycles=BLOCK_CYCLES, events=None):
+    """Yield a CycleSchedule per block of num_cycles. With draw_events()
+    output each block is rendered on its own; without, the default fault
+    schedule is tiled. Only one block of per-cycle arrays exists at a time."""
+    tile = compile_schedule(DEFAULT_SCENARIO).codes if events is None else None
+    for start in range(0, num_cycles, block_cycles):
+        end = min(start + block_cycles, num_cycles)
+        if events is None:
+            yield CycleSchedule(DEFAULT_SCENARIO["name"],
+                                tile[np.arange(start, end) % tile.size], None, None)
+        else:
+            yield render_schedule(events, start, end)
+
+def iter_schedule_waveforms(schedules, rng):
+    """Yield ADC blocks for each CycleSchedule of iter_schedule_blocks()"""
+    for sched in schedules:
+        vrms, irms = draw_cycle_rms(sched.codes, rng, sched.v_mag, sched.i_mag)
+        yield synthesize_cycles(vrms, irms, rng)
+
+def generate_stream(num_cycles, nodes=1, seed=None, block_cycles=BLOCK_CYCLES,
+                    scenario=None, out_file=OUT_FILE):
+    """Stream a long scenario to one CSV per node in constant memory.
+    Without a scenario dict the default schedule is tiled to num_cycles;
+    with one, its events are drawn per node over num_cycles and rendered
+    to per-cycle states a block at a time, so memory is bounded by
+    block_cycles plus the number of drawn events."""
+    seeds = np.random.SeedSequence(seed).spawn(nodes)
+    stem, ext = os.path.splitext(out_file)
+
+    print(f"[STREAM] {num_cycles} cycles x {nodes} node(s), "
+          f"{block_cycles} cycles/block")
+
+    results = {}
+    for nid, node_seed in enumerate(seeds, start=1):
+        name = out_file if nodes == 1 else f"{stem}_n{nid}{ext}"
+        path = os.path.join(OUT_DIR, name)
+        rng = np.random.default_rng(node_seed)
+        events = None if scenario is None else draw_events(scenario, nid, rng, num_cycles)
+        schedules = iter_schedule_blocks(num_cycles, block_cycles, events)
+        blocks = iter_schedule_waveforms(schedules, rng)
+        stats = write_csv_stream(path, blocks, num_cycles * SAMPLES_PER_CYCLE)
+        results[nid] = stats
+        print(f"[OK] Node {nid}: {path} ({stats.count} samples)")
+
+    return results
+
 # WRITE CSV
 def write_csv(rows):
     path = os.path.join(OUT_DIR, OUT_FILE)
-    with open(path, "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(["Raw_V", "Raw_I"])
-        w.writerows(rows)
+    if isinstance(rows, np.ndarray):
+        with open(path, "w", newline="") as f:
+            f.write("Raw_V,Raw_I\n")
+            f.write(format_csv_block(rows))
+    else:
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["Raw_V", "Raw_I"])
+            w.writerows(rows)
+    sample_store.save_samples(sample_store.binary_path(path), rows)
     
     print(f"\n[OK] Saved: {path}")
     print(f"[OK] Samples: {len(rows)}")
@@ -156,20 +380,58 @@ def write_csv(rows):
 
 # STATISTICS
 def print_adc_stats(rows):
-    v_vals = [r[0] for r in rows]
-    i_vals = [r[1] for r in rows]
+    if isinstance(rows, AdcStats):
+        stats = rows
+    else:
+        stats = AdcStats()
+        stats.update(np.asarray(rows, dtype=float))
+    v_min, i_min = stats.min
+    v_max, i_max = stats.max
+    v_avg, i_avg = stats.mean()
     
     print("\n" + "="*50)
     print("ADC RANGE CHECK")
     print("="*50)
-    print(f"V_ADC: min={min(v_vals):.0f}, max={max(v_vals):.0f}, avg={sum(v_vals)/len(v_vals):.0f}")
-    print(f"I_ADC: min={min(i_vals):.0f}, max={max(i_vals):.0f}, avg={sum(i_vals)/len(i_vals):.0f}")
+    print(f"V_ADC: min={v_min:.0f}, max={v_max:.0f}, avg={v_avg:.0f}")
+    print(f"I_ADC: min={i_min:.0f}, max={i_max:.0f}, avg={i_avg:.0f}")
     print(f"ADC range: 0-{ADC_MAX:.0f} (midpoint={ADC_MID:.0f})")
     print("="*50)
 
 # ENTRY POINT
+# Usage:
+#   python3 data_generator.py            -> NumPy engine, random seed
+#   python3 data_generator.py <seed>     -> NumPy engine, fixed seed
+#   python3 data_generator.py legacy     -> original per-sample path
+#   python3 data_generator.py stream <hours> [nodes] [seed]
+#                                        -> streamed, constant memory
+#   python3 data_generator.py scenario <file> [node] [seed]
+#                                        -> <name>.csv from a scenario file
 if __name__ == "__main__":
-    data = generate_waveform()
+    arg = sys.argv[1] if len(sys.argv) > 1 else None
+    if arg == "scenario":
+        scenario = load_scenario(sys.argv[2])
+        node = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        rng = np.random.default_rng(seed)
+        sched = compile_schedule(scenario, node, rng)
+        OUT_FILE = f"{sched.name}.csv"
+        data = generate_waveform_np(seed=seed, schedule=sched, rng=rng)
+        write_csv(data)
+        print_adc_stats(data)
+        sys.exit(0)
+    elif arg == "stream":
+        hours = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+        nodes = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        seed = int(sys.argv[4]) if len(sys.argv) > 4 else None
+        num_cycles = int(hours * 3600 * FREQ)
+        for nid, stats in generate_stream(num_cycles, nodes, seed).items():
+            print(f"\nNode {nid}:")
+            print_adc_stats(stats)
+        sys.exit(0)
+    elif arg == "legacy":
+        data = generate_waveform()
+    else:
+        data = generate_waveform_np(seed=int(arg) if arg is not None else None)
     write_csv(data)
     print_adc_stats(data)
     
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# ============================================================
+# ESP32 NODE EMULATOR
+# Many virtual esp32_code/*.ino nodes in one process
+# Author: Noridel Herron
+# ============================================================
+#
+# Speaks the firmware's UDP protocol:
+#   in : WAVE|v|i and WAVEN|k|... on each node's stream port (6001)
+#        RESET_CYCLE / SET_MODE / SET_SEND / ACK on its command port
+#   out: esp_packet_t {u32 node_id, u32 cycle_id, f32 vrms, f32 irms}
+#        to PI_HOST:5005 every 100 ms while sending is enabled
+#        FAULT|node|OC_TRIP|vrms|irms|ms to PI_HOST:6000 on a trip
+#
+# Same signal path as the firmware: ADC counts -> physical units,
+# RMS over each block of 60 samples, cycle_id++, then the 15 A /
+# 3-cycle trip (counter resets only below 12 A), latched until ACK
+# with irms < 12 A. The push-button is not emulated.
+#
+# All node state lives in NumPy arrays (one row per node). Each
+# poll drains every socket, parses all payloads with one
+# np.fromstring call, sums squares per (node, cycle) with reduceat
+# and runs the fault check for all nodes that finished a cycle.
+#
+# Ports come from a node config (node_registry.py), so the same
+# file drives udp_inputStreamer and the emulator:
+#   python3 esp32_emulator.py ../config/nodes_sim.json [pi_host] [seconds]
+# Without a config: one node (id 1) on 6001, with its commands on 9001
+# (like nodes_sim.json) so it cannot take the Pi's fault port 6000.
+# A node port that equals a Pi port on a local PI_HOST is refused:
+# the emulator would bind it and send its FAULTs to itself.
+# ============================================================
+
+import selectors
+import socket
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from node_registry import NodeRegistry
+from bulk_send import BulkSender
+
+PI_HOST        = "127.0.0.1"
+PI_DATA_PORT   = 5005      # DATA_TX_PORT in the firmware
+PI_FAULT_PORT  = 6000      # CMD_PORT (FAULT messages)
+EMU_CMD_PORT   = 9001      # default node's command port (not the Pi's 6000)
+
+ADC_MID  = np.float32(4095.0 / 2.0)
+V_SCALE  = np.float32(170.0 / (4095.0 / 2.0 * 0.6))
+I_SCALE  = np.float32(0.0244)
+
+RMS_BUFFER_SIZE  = 60
+SEND_INTERVAL_MS = 100
+WAVE_BATCH_MAX   = 60
+
+OC_LIMIT   = 15.0
+OC_CLEAR   = 12.0
+OC_PERSIST = 3
+
+MODE_ADC, MODE_SD, MODE_UDP = range(3)
+MODES = {"MODE_ADC": MODE_ADC, "MODE_SD": MODE_SD, "MODE_UDP": MODE_UDP}
+
+# esp_packet_t (src_c_code/include/structs.h), packed little-endian
+PACKET_DTYPE = np.dtype([("node_id", "<u4"), ("cycle_id", "<u4"),
+                         ("vrms", "<f4"), ("irms", "<f4")])
+
+REPORT_INTERVAL = 2.0
+RECV_SIZE = 2048
+MAX_DRAIN = 256            # datagrams per socket per poll
+
+# ==================== PARSING ====================
+def _payload_body(payload):
+    # -> (k, "v1|i1|...") like getNextSample / parseWaveBatch
+    if payload.startswith(b"WAVEN|"):
+        head, _, body = payload[6:].partition(b"|")
+        try:
+            k = int(head)
+        except ValueError:
+            return 0, b""
+        if k <= 0 or k > WAVE_BATCH_MAX:
+            return 0, b""
+        return k, body
+    if payload.startswith(b"WAVE|"):
+        return 1, payload[5:]
+    return 0, b""
+
+def _parse_one(k, body):
+    values = body.split(b"|")[:2 * k]
+    try:
+        vals = np.array(values, dtype=np.float32)
+    except ValueError:
+        return np.empty(0, dtype=np.float32)
+    return vals[:len(vals) // 2 * 2]
+
+def parse_wave(payloads):
+    """Payloads -> (samples per payload, v_adc, i_adc) in arrival order"""
+    parsed = [_payload_body(p) for p in payloads]
+    counts = np.array([k for k, _ in parsed], dtype=np.int64)
+    bodies = [body for k, body in parsed if k]
+    if not bodies:
+        return counts, np.empty(0, np.float32), np.empty(0, np.float32)
+
+    # Fast path: every payload well formed -> one text parse
+    values = None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            values = np.fromstring(b"|".join(bodies).decode("ascii"), dtype=np.float32, sep="|")
+    except (ValueError, UnicodeDecodeError, DeprecationWarning):
+        pass
+
+    if values is None or len(values) != 2 * counts.sum():
+        chunks = []
+        for j, (k, body) in enumerate(parsed):
+            if not k:
+                continue
+            vals = _parse_one(k, body)
+            counts[j] = len(vals) // 2
+            chunks.append(vals)
+        values = np.concatenate(chunks) if chunks else np.empty(0, np.float32)
+
+    return counts, values[0::2], values[1::2]
+
+def _group_starts(keys):
+    # Indices where a run of equal keys begins
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+# ==================== NODE STATE ====================
+class NodeBank:
+    """Firmware state for n nodes, one array row per node"""
+
+    def __init__(self, ids):
+        n = len(ids)
+        self.ids = np.asarray(ids, dtype=np.uint32)
+        self.sample_idx = np.zeros(n, dtype=np.int64)
+        self.acc_v = np.zeros(n)          # partial sums of squares
+        self.acc_i = np.zeros(n)
+        self.vrms = np.zeros(n, dtype=np.float32)
+        self.irms = np.zeros(n, dtype=np.float32)
+        self.cycle_id = np.zeros(n, dtype=np.uint32)
+        self.mode = np.full(n, MODE_UDP, dtype=np.int8)
+        self.send_enabled = np.ones(n, dtype=bool)
+        self.fault_latched = np.zeros(n, dtype=bool)
+        self.oc_counter = np.zeros(n, dtype=np.int64)
+        self.last_send = np.full(n, -SEND_INTERVAL_MS, dtype=np.int64)
+
+        self.samples = 0
+        self.cycles = 0
+        self.trips = []                   # (slot, vrms, irms) not yet reported
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------- samples ----------
+    def feed(self, slots, v_adc, i_adc):
+        """Consume samples (arrival order) for the given node slots"""
+        keep = self.mode[slots] == MODE_UDP
+        if not keep.all():
+            slots, v_adc, i_adc = slots[keep], v_adc[keep], i_adc[keep]
+        if not len(slots):
+            return
+
+        order = np.argsort(slots, kind="stable")
+        slots, v_adc, i_adc = slots[order], v_adc[order], i_adc[order]
+        n = len(slots)
+        self.samples += n
+
+        # Position of every sample in its node's 60-sample buffer
+        starts = _group_starts(slots)
+        lengths = np.diff(np.r_[starts, n])
+        nodes = slots[starts]
+        rank = np.arange(n) - np.repeat(starts, lengths)
+        pos = self.sample_idx[slots] + rank
+        block = pos // RMS_BUFFER_SIZE
+
+        v = (v_adc - ADC_MID) * V_SCALE
+        i = (i_adc - ADC_MID) * I_SCALE
+
+        # Sums of squares per (node, block); block 0 continues the carry
+        seg = np.flatnonzero(np.r_[True, (slots[1:] != slots[:-1]) | (block[1:] != block[:-1])])
+        sv = np.add.reduceat(v.astype(np.float64) ** 2, seg)
+        si = np.add.reduceat(i.astype(np.float64) ** 2, seg)
+        seg_slot = slots[seg]
+        first = block[seg] == 0
+        sv[first] += self.acc_v[seg_slot[first]]
+        si[first] += self.acc_i[seg_slot[first]]
+
+        seg_last = np.r_[seg[1:], n] - 1
+        done = pos[seg_last] % RMS_BUFFER_SIZE == RMS_BUFFER_SIZE - 1
+
+        # Unfinished block (at most one per node) becomes the new carry
+        self.acc_v[nodes] = 0.0
+        self.acc_i[nodes] = 0.0
+        self.acc_v[seg_slot[~done]] = sv[~done]
+        self.acc_i[seg_slot[~done]] = si[~done]
+        self.sample_idx[nodes] = (self.sample_idx[nodes] + lengths) % RMS_BUFFER_SIZE
+
+        # Finished cycles, one round per cycle so faults see them in order
+        cyc_slot = seg_slot[done]
+        if not len(cyc_slot):
+            return
+        vr = np.sqrt(sv[done] / RMS_BUFFER_SIZE).astype(np.float32)
+        ir = np.sqrt(si[done] / RMS_BUFFER_SIZE).astype(np.float32)
+        c_starts = _group_starts(cyc_slot)
+        c_rank = np.arange(len(cyc_slot)) - np.repeat(c_starts, np.diff(np.r_[c_starts, len(cyc_slot)]))
+        for r in range(int(c_rank.max()) + 1):
+            m = c_rank == r
+            self._complete_cycles(cyc_slot[m], vr[m], ir[m])
+
+    def _complete_cycles(self, s, vr, ir):
+        # computeRMS() + checkFaults() for one cycle of each node in s
+        self.vrms[s] = vr
+        self.irms[s] = ir
+        self.cycle_id[s] += 1
+        self.cycles += len(s)
+
+        live = ~self.fault_latched[s]
+        over = s[live & (ir > OC_LIMIT)]
+        self.oc_counter[over] += 1
+        self.oc_counter[s[live & (ir < OC_CLEAR)]] = 0
+
+        trip = over[self.oc_counter[over] >= OC_PERSIST]
+        if len(trip):
+            self.fault_latched[trip] = True
+            self.send_enabled[trip] = False
+            self.trips.extend(zip(trip.tolist(), self.vrms[trip].tolist(), self.irms[trip].tolist()))
+
+    # ---------- commands ----------
+    def command(self, slot, text):
+        """processCommand() for one node; returns a log line or None"""
+        fields = [f for f in text.split("|") if f]     # strtok skips empties
+        if not fields:
+            return None
+        cmd = fields[0]
+        arg = fields[1] if len(fields) > 1 else ""
+        if len(fields) > 2:
+            target = _atoi(fields[2])
+            if target != int(self.ids[slot]) and target != -1:
+                return None
+
+        if cmd == "ACK" and self.fault_latched[slot] and self.irms[slot] < OC_CLEAR:
+            self.fault_latched[slot] = False
+            self.oc_counter[slot] = 0
+            self.send_enabled[slot] = True
+            return "Fault cleared"
+
+        if cmd == "RESET_CYCLE":
+            self.cycle_id[slot] = 0
+            self.sample_idx[slot] = 0
+            self.acc_v[slot] = self.acc_i[slot] = 0.0
+            self.vrms[slot] = self.irms[slot] = 0.0
+            return "Cycle reset to 0"
+
+        if cmd == "SET_SEND" and not self.fault_latched[slot]:
+            if arg in ("ON", "OFF"):
+                self.send_enabled[slot] = arg == "ON"
+                return f"SEND {arg}"
+            return None
+
+        if cmd == "SET_MODE" and arg in MODES:
+            self.mode[slot] = MODES[arg]
+            return arg.replace("_", " ")
+        return None
+
+    # ---------- output ----------
+    def due_packets(self, now_ms):
+        """sendPacket(): slots due a data packet and the packed records"""
+        due = np.flatnonzero(self.send_enabled & ~self.fault_latched &
+                             (now_ms - self.last_send >= SEND_INTERVAL_MS))
+        self.last_send[due] = now_ms
+        pkts = np.empty(len(due), dtype=PACKET_DTYPE)
+        pkts["node_id"] = self.ids[due]
+        pkts["cycle_id"] = self.cycle_id[due]
+        pkts["vrms"] = self.vrms[due]
+        pkts["irms"] = self.irms[due]
+        return due, pkts
+
+def _atoi(text):
+    # C atoi: leading integer, 0 when there is none
+    digits = ""
+    for ch in text.strip():
+        if ch.isdigit() or (ch in "+-" and not digits):
+            digits += ch
+        else:
+            break
+    try:
+        return int(digits)
+    except ValueError:
+        return 0
+
+def is_local_host(host):
+    """True when host resolves to loopback or one of this machine's addresses"""
+    try:
+        addr = socket.gethostbyname(host)
+    except OSError:
+        return False
+    if addr.startswith("127.") or addr == "0.0.0.0":
+        return True
+    try:
+        return addr in socket.gethostbyname_ex(socket.gethostname())[2]
+    except OSError:
+        return False
+
+def pi_port_clashes(registry, pi_host):
+    """Node ports the emulator would bind that are the Pi's own ports"""
+    if not is_local_host(pi_host):
+        return []
+    node_ports = set(registry.ports.tolist()) | set(registry.cmd_ports.tolist())
+    return sorted(node_ports & {PI_DATA_PORT, PI_FAULT_PORT})
+
+# ==================== EMULATOR ====================
+class Esp32Emulator:
+    def __init__(self, registry, pi_host=PI_HOST, data_port=PI_DATA_PORT,
+                 fault_port=PI_FAULT_PORT, verbose=None):
+        self.registry = registry
+        self.bank = NodeBank(registry.ids)
+        self.fault_addr = (pi_host, fault_port)
+        self.verbose = len(registry) <= 16 if verbose is None else verbose
+        self.t0 = time.monotonic()
+
+        self.sel = selectors.DefaultSelector()
+        self.socks = []
+        for slot in range(len(registry)):
+            self._bind(int(registry.ports[slot]), ("data", slot))
+            self._bind(int(registry.cmd_ports[slot]), ("cmd", slot))
+
+        self.tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.tx.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        self.sender = BulkSender(self.tx, [(pi_host, data_port)] * len(registry))
+        self.faults_sent = 0
+
+    def _bind(self, port, key):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        sock.bind(("", port))
+        sock.setblocking(False)
+        self.sel.register(sock, selectors.EVENT_READ, key)
+        self.socks.append(sock)
+
+    def millis(self):
+        return int((time.monotonic() - self.t0) * 1000)
+
+    def log(self, slot, msg):
+        if self.verbose:
+            print(f"[NODE {self.registry.ids[slot]}] {msg}")
+
+    def poll(self, timeout):
+        """One loop() pass for every node"""
+        payloads, slots = [], []
+        for key, _ in self.sel.select(timeout):
+            sock, (kind, slot) = key.fileobj, key.data
+            for _ in range(MAX_DRAIN):
+                try:
+                    data = sock.recv(RECV_SIZE)
+                except BlockingIOError:
+                    break
+                if kind == "cmd":
+                    msg = self.bank.command(slot, data.decode(errors="ignore").strip("\r\n\0"))
+                    if msg:
+                        self.log(slot, f"[PI] {msg}")
+                else:
+                    payloads.append(data)
+                    slots.append(slot)
+
+        if payloads:
+            counts, v, i = parse_wave(payloads)
+            self.bank.feed(np.repeat(np.array(slots, dtype=np.int64), counts), v, i)
+
+        self._send_faults()
+        self._send_packets()
+
+    def _send_faults(self):
+        bank = self.bank
+        for slot, vrms, irms in bank.trips:
+            msg = f"FAULT|{bank.ids[slot]}|OC_TRIP|{vrms:.2f}|{irms:.2f}|{self.millis()}"
+            try:
+                self.tx.sendto(msg.encode(), self.fault_addr)
+                self.faults_sent += 1
+            except OSError:
+                pass
+            self.log(slot, msg)
+        bank.trips.clear()
+
+    def _send_packets(self):
+        due, pkts = self.bank.due_packets(self.millis())
+        if not len(due):
+            return
+        base = pkts.ctypes.data
+        addrs = base + np.arange(len(due), dtype=np.int64) * PACKET_DTYPE.itemsize
+        lengths = np.full(len(due), PACKET_DTYPE.itemsize, dtype=np.int64)
+        self.sender.send_addresses(due, addrs, lengths)
+
+    def close(self):
+        for sock in self.socks:
+            self.sel.unregister(sock)
+            sock.close()
+        self.sel.close()
+        self.tx.close()
+
+def main():
+    if len(sys.argv) > 1:
+        registry = NodeRegistry.load(sys.argv[1])
+    else:
+        registry = NodeRegistry.from_nodes({1: "127.0.0.1"}, cmd_port=EMU_CMD_PORT)
+    pi_host = sys.argv[2] if len(sys.argv) > 2 else PI_HOST
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    clashes = pi_port_clashes(registry, pi_host)
+    if clashes:
+        print(f"[ERROR] Node port(s) {clashes} are the Pi's ports on {pi_host}; "
+              f"give the nodes other ports (e.g. ../config/nodes_sim.json)")
+        sys.exit(1)
+
+    emu = Esp32Emulator(registry, pi_host)
+    bank = emu.bank
+    print(f"[EMU] {registry.describe()} -> Pi {pi_host}:{PI_DATA_PORT} (faults :{PI_FAULT_PORT})")
+
+    t_start = t_last = time.monotonic()
+    last = (0, 0, 0)
+    try:
+        while seconds is None or time.monotonic() - t_start < seconds:
+            emu.poll(0.002)
+            now = time.monotonic()
+            if now - t_last >= REPORT_INTERVAL:
+                dt = now - t_last
+                cur = (bank.samples, bank.cycles, emu.sender.packets)
+                rates = [(c - p) / dt for c, p in zip(cur, last)]
+                print(f"[EMU] {rates[0]:9.0f} samples/s  {rates[1]:7.0f} cycles/s  "
+                      f"{rates[2]:6.0f} pkt/s to Pi  latched {int(bank.fault_latched.sum())}  "
+                      f"faults {emu.faults_sent}")
+                last, t_last = cur, now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n[EMU] {bank.samples} samples, {bank.cycles} cycles, "
+              f"{emu.sender.packets} packets, {emu.faults_sent} faults")
+        emu.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# ============================================================
+# FAULT EVENT LOG PARSER
+# Reads the fault_events.txt lines written by Process 2
+# Author: Noridel Herron
+# ============================================================
+#
+# Line formats (src_c_code/src/log_thread.c):
+#   [2025-12-18 18:59:58] NODE 2: VOLTAGE SAG DETECTED       -  41.88 V (cycle 438)
+#   [2025-12-18 18:59:58] NODE 2: Voltage returned to NORMAL - 107.76 V (cycle 442)
+#   [ts] NODE n: VOLTAGE SWELL DETECTED / OVERCURRENT DETECTED /
+#                Current returned to NORMAL
+# The timestamp prefix is optional so copied fragments still parse.
+# The banner at the top of the file and blank lines are skipped.
+# ============================================================
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+# Event kinds (index = code stored by the event store)
+EV_SAG, EV_SWELL, EV_V_NORMAL, EV_OC, EV_I_NORMAL = range(5)
+EVENT_KINDS = ("SAG", "SWELL", "V_NORMAL", "OC", "I_NORMAL")
+
+EVENT_TEXT = {
+    "VOLTAGE SAG DETECTED":       EV_SAG,
+    "VOLTAGE SWELL DETECTED":     EV_SWELL,
+    "Voltage returned to NORMAL": EV_V_NORMAL,
+    "OVERCURRENT DETECTED":       EV_OC,
+    "Current returned to NORMAL": EV_I_NORMAL,
+}
+
+EVENT_RE = re.compile(
+    r"^\s*(?:\[(?P<ts>[^\]]*)\]\s*)?NODE\s+(?P<node>\d+):\s*(?P<text>.*?)\s*-\s*"
+    r"(?P<value>-?\d+(?:\.\d*)?)\s*[VA]\s*\(cycle\s+(?P<cycle>\d+)\)")
+
+# timestamp: datetime64[s] (NaT when the line has none)
+FaultEvent = namedtuple("FaultEvent", ["timestamp", "node", "kind", "value", "cycle"])
+
+def parse_event(line):
+    """One fault_events.txt line -> FaultEvent, or None if it is not an event"""
+    m = EVENT_RE.match(line)
+    if not m:
+        return None
+    kind = EVENT_TEXT.get(m.group("text"))
+    if kind is None:
+        return None
+    ts = m.group("ts")
+    try:
+        stamp = np.datetime64(ts, "s") if ts else np.datetime64("NaT", "s")
+    except ValueError:
+        stamp = np.datetime64("NaT", "s")
+    return FaultEvent(stamp, int(m.group("node")), kind, float(m.group("value")),
+                      int(m.group("cycle")))
+
+def read_events(path):
+    """Every event line of a fault_events.txt, in file order"""
+    with open(path, errors="ignore") as f:
+        return [e for e in map(parse_event, f) if e is not None]
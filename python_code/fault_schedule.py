@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# ============================================================
+# FAULT SCHEDULE ENGINE
+# Compiles declarative scenario files into per-cycle state arrays
+# Author: Noridel Herron
+# ============================================================
+#
+# Scenario format (JSON, TOML, or YAML if PyYAML is installed):
+#
+#   {
+#     "name":   "t2",
+#     "cycles": 1200,
+#     "events": [
+#       {"type": "OC",  "start": 300, "duration": 6},
+#       {"type": "SAG", "start": 400, "duration": 3, "magnitude": 40.0},
+#       {"type": "SWELL", "start": 700, "duration": 3, "node": 2},
+#       {"type": "SAG", "arrival": "poisson", "rate_per_min": 60,
+#        "duration": [2, 4], "magnitude": [30.0, 45.0]}
+#     ]
+#   }
+#
+# start / duration are in cycles. magnitude is Vrms for SAG/SWELL and
+# Irms for OC/RECOVER; a [lo, hi] pair is drawn once per event. When
+# omitted, the generator draws its usual per-cycle range for the state.
+# "node" limits an event to one node (default: every node).
+# Poisson events may set "begin"/"end" cycles to bound their window.
+# Later events overwrite earlier ones where they overlap.
+# ============================================================
+
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    import tomllib          # Python 3.11+
+except ImportError:
+    tomllib = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+FREQ = 60.0
+
+# CYCLE STATES (integer codes shared with data_generator)
+STATE_NAMES = ["NORMAL", "SAG", "SWELL", "OC", "RECOVER"]
+STATE_CODE = {name: code for code, name in enumerate(STATE_NAMES)}
+
+# Event types whose magnitude is a Vrms (the rest are Irms)
+VOLTAGE_STATES = ("SAG", "SWELL")
+
+# codes: int8 state per cycle; v_mag / i_mag: float per cycle, NaN = default
+CycleSchedule = namedtuple("CycleSchedule", ["name", "codes", "v_mag", "i_mag"])
+
+# One scenario event drawn for a node: sorted interval starts/lengths,
+# reach = running max of the interval ends, mags = per-interval magnitude
+EventDraw = namedtuple("EventDraw", ["code", "starts", "lengths", "reach", "mags", "voltage"])
+
+# ==================== LOAD ====================
+def load_scenario(path):
+    """Load a scenario description from .json, .toml or .yaml"""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".json":
+        with open(path) as f:
+            return json.load(f)
+    if ext == ".toml":
+        if tomllib is None:
+            raise ValueError(f"Python 3.11+ (tomllib) is required to read {path}")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        if yaml is None:
+            raise ValueError(f"PyYAML is required to read {path}")
+        with open(path) as f:
+            return yaml.safe_load(f)
+
+    raise ValueError(f"Unsupported scenario format: {path}")
+
+# ==================== COMPILE ====================
+def _draw(value, rng, size):
+    # Scalar -> constant, [lo, hi] -> uniform draw(s)
+    if isinstance(value, (list, tuple)):
+        return rng.uniform(value[0], value[1], size=size)
+    return np.full(size, float(value))
+
+def _draw_int(value, rng, size):
+    if isinstance(value, (list, tuple)):
+        return rng.integers(value[0], value[1], size=size, endpoint=True)
+    return np.full(size, int(value))
+
+def _poisson_starts(event, num_cycles, rng):
+    begin = int(event.get("begin", 0))
+    end = min(int(event.get("end", num_cycles)), num_cycles)
+    if end <= begin:
+        return np.empty(0, dtype=np.int64)
+
+    rate = float(event["rate_per_min"]) / (60.0 * FREQ)  # events per cycle
+    count = rng.poisson(rate * (end - begin))
+    return np.sort(rng.integers(begin, end, size=count))
+
+def draw_events(scenario, node=1, rng=None, num_cycles=None):
+    """Draw a scenario's events for one node as sorted cycle intervals.
+    Memory grows with the event count, not with num_cycles."""
+    if rng is None:
+        rng = np.random.default_rng()
+    if num_cycles is None:
+        num_cycles = int(scenario["cycles"])
+
+    events = []
+    for event in scenario.get("events", []):
+        if "node" in event and int(event["node"]) != node:
+            continue
+
+        state = event["type"].upper()
+        if state not in STATE_CODE:
+            raise ValueError(f"Unknown event type: {event['type']}")
+
+        if event.get("arrival") == "poisson":
+            starts = _poisson_starts(event, num_cycles, rng)
+        else:
+            starts = np.array([int(event["start"])])
+        if not starts.size:
+            continue
+
+        lengths = _draw_int(event.get("duration", 1), rng, starts.size)
+        mags = _draw(event["magnitude"], rng, starts.size) if "magnitude" in event else None
+        # Starts are sorted, so a running max of the ends is too
+        reach = np.maximum.accumulate(np.minimum(starts + lengths, num_cycles))
+        events.append(EventDraw(STATE_CODE[state], starts, lengths, reach, mags,
+                                state in VOLTAGE_STATES))
+
+    return events
+
+def render_schedule(events, start, stop, name="scenario"):
+    """CycleSchedule for cycles [start, stop) of draw_events() output"""
+    n = stop - start
+    codes = np.zeros(n, dtype=np.int8)
+    v_mag = np.full(n, np.nan, dtype=np.float32)
+    i_mag = np.full(n, np.nan, dtype=np.float32)
+
+    for ev in events:
+        # Only intervals that can overlap the window
+        lo = np.searchsorted(ev.reach, start, side="right")
+        hi = np.searchsorted(ev.starts, stop)
+        if lo >= hi:
+            continue
+        first = np.maximum(ev.starts[lo:hi], start)
+        lengths = np.clip(np.minimum(ev.starts[lo:hi] + ev.lengths[lo:hi], stop) - first, 0, None)
+
+        # Expand (start, length) pairs into cycle indices in one shot
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        idx = np.repeat(first - start, lengths) + offsets
+
+        # Later events overwrite earlier ones where they overlap
+        codes[idx] = ev.code
+        if ev.mags is not None:
+            target = v_mag if ev.voltage else i_mag
+            target[idx] = np.repeat(ev.mags[lo:hi], lengths)
+
+    return CycleSchedule(name, codes, v_mag, i_mag)
+
+def compile_schedule(scenario, node=1, rng=None, num_cycles=None):
+    """Compile a scenario dict into a CycleSchedule for one node"""
+    if num_cycles is None:
+        num_cycles = int(scenario["cycles"])
+    events = draw_events(scenario, node, rng, num_cycles)
+    return render_schedule(events, 0, num_cycles, scenario.get("name", "scenario"))
+
+def compile_file(path, node=1, seed=None, num_cycles=None):
+    """load_scenario() + compile_schedule() with a seeded RNG"""
+    scenario = load_scenario(path)
+    return compile_schedule(scenario, node, np.random.default_rng(seed), num_cycles)
+
+def describe(schedule):
+    """Per-state cycle counts and event counts of a compiled schedule"""
+    counts = np.bincount(schedule.codes, minlength=len(STATE_NAMES))
+    starts = np.flatnonzero(np.diff(schedule.codes, prepend=0) != 0)
+    events = np.bincount(schedule.codes[starts], minlength=len(STATE_NAMES))
+    return {name: (int(counts[c]), int(events[c])) for c, name in enumerate(STATE_NAMES)}
+
+# ==================== ENTRY POINT ====================
+# Usage: python3 fault_schedule.py <scenario file> [node] [seed]
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 fault_schedule.py <scenario file> [node] [seed]")
+        sys.exit(1)
+
+    node = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    sched = compile_file(sys.argv[1], node, seed)
+
+    print(f"[SCHEDULE] {sched.name}: {sched.codes.size} cycles (node {node})")
+    for name, (cycles, events) in describe(sched).items():
+        if name == "NORMAL":
+            print(f"  {name:8s}: {cycles:6d} cycles")
+        else:
+            print(f"  {name:8s}: {cycles:6d} cycles in {events} event(s)")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# ============================================================
+# FAULT EVENT STORE
+# Indexed SQLite store built from Process 2's fault_events.txt
+# Author: Noridel Herron
+# ============================================================
+#
+# fault_events.txt only grows while Process 2 runs, so each ingest
+# reads from the byte offset saved by the previous one; months of
+# log are parsed once. Process 2 reopens the file with fopen "w"
+# on every start: a file that got shorter, or whose already-read
+# prefix changed, starts a new run and is read from the top.
+# Cycle ids restart with Process 2, so everything is keyed by run.
+#
+# Tables:
+#   events    (run, ts, node, kind, value, cycle)
+#   intervals onset -> recovery pairs per node:
+#               SAG / SWELL closed by V_NORMAL (or the other one)
+#               OC closed by I_NORMAL
+#             end_* stay NULL while the fault is still active
+#   meta      offset / prefix hash / run of the followed log
+# ts is Unix seconds (NULL when the line has no timestamp).
+#
+#   python3 fault_store.py [fault_events.txt] [fault_events.db]
+# ============================================================
+
+import hashlib
+import os
+import sqlite3
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from fault_log import (EV_SAG, EV_SWELL, EV_V_NORMAL, EV_OC, EV_I_NORMAL,
+                       EVENT_KINDS, FaultEvent, parse_event)
+
+# ==================== FILE PATHS ====================
+EVENTS_TXT = "../src_c_code/src/fault_events.txt"
+STORE_DB   = "fault_events.db"
+
+PREFIX_CHECK = 4096   # bytes of already-read log compared on each ingest
+
+# Onsets open an interval; recoveries close the open one of their group
+ONSETS = {EV_SAG: "v", EV_SWELL: "v", EV_OC: "i"}
+RECOVERIES = {EV_V_NORMAL: "v", EV_I_NORMAL: "i"}
+
+FaultInterval = namedtuple("FaultInterval", [
+    "run", "node", "kind", "value", "start", "end", "start_cycle", "end_cycle"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    id    INTEGER PRIMARY KEY,
+    run   INTEGER NOT NULL,
+    ts    INTEGER,
+    node  INTEGER NOT NULL,
+    kind  INTEGER NOT NULL,
+    value REAL NOT NULL,
+    cycle INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    id          INTEGER PRIMARY KEY,
+    run         INTEGER NOT NULL,
+    node        INTEGER NOT NULL,
+    grp         TEXT NOT NULL,
+    kind        INTEGER NOT NULL,
+    value       REAL NOT NULL,
+    start_ts    INTEGER,
+    end_ts      INTEGER,
+    start_cycle INTEGER NOT NULL,
+    end_cycle   INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_node_ts ON events (node, ts);
+CREATE INDEX IF NOT EXISTS events_kind_ts ON events (kind, ts);
+CREATE INDEX IF NOT EXISTS intervals_node_start ON intervals (node, start_ts);
+CREATE INDEX IF NOT EXISTS intervals_kind_start ON intervals (kind, start_ts);
+CREATE INDEX IF NOT EXISTS intervals_open ON intervals (run, node, grp) WHERE end_cycle IS NULL;
+"""
+
+def to_epoch(t):
+    """str / datetime64 / int -> Unix seconds (None stays None)"""
+    if t is None or isinstance(t, (int, np.integer)):
+        return t
+    stamp = np.datetime64(t, "s")
+    return None if np.isnat(stamp) else int(stamp.astype(np.int64))
+
+def from_epoch(ts):
+    return np.datetime64("NaT", "s") if ts is None else np.datetime64(ts, "s")
+
+def prefix_hash(path, length):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+def where_clause(node, kind, start, end, ts_col):
+    """SQL filter shared by the event and interval queries"""
+    terms, args = [], []
+    for col, val in (("node", node), ("kind", kind)):
+        if val is not None:
+            terms.append(f"{col} = ?")
+            args.append(val)
+    if start is not None:
+        terms.append(f"{ts_col} >= ?")
+        args.append(to_epoch(start))
+    if end is not None:
+        terms.append(f"{ts_col} < ?")
+        args.append(to_epoch(end))
+    return (" WHERE " + " AND ".join(terms) if terms else ""), args
+
+# ==================== STORE ====================
+class FaultStore:
+    """fault_events.txt ingested into SQLite, queried by node / kind / time"""
+
+    def __init__(self, path=STORE_DB):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, **values):
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                            [(k, str(v)) for k, v in values.items()])
+
+    # ---------- ingest ----------
+    def ingest(self, log_path=EVENTS_TXT):
+        """Parse lines appended since the last ingest; returns events added"""
+        try:
+            size = os.path.getsize(log_path)
+        except FileNotFoundError:
+            return 0
+
+        log_path = os.path.abspath(log_path)
+        offset = int(self._meta("offset", 0))
+        run = int(self._meta("run", 0))
+        checked = min(offset, PREFIX_CHECK)
+        if (self._meta("path") != log_path or size < offset
+                or prefix_hash(log_path, checked) != self._meta("prefix")):
+            # New log (or Process 2 restarted and rewrote it)
+            offset = 0
+            run += 1
+
+        with open(log_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1      # only complete lines
+        offset += end
+
+        events = [e for e in map(parse_event, data[:end].decode(errors="ignore").splitlines())
+                  if e is not None]
+
+        with self.db:
+            self._add_events(run, events)
+            self._set_meta(path=log_path, run=run, offset=offset,
+                           prefix=prefix_hash(log_path, min(offset, PREFIX_CHECK)))
+        return len(events)
+
+    def _add_events(self, run, events):
+        db = self.db
+        db.executemany("INSERT INTO events (run, ts, node, kind, value, cycle) VALUES (?, ?, ?, ?, ?, ?)",
+                       [(run, to_epoch(e.timestamp), e.node, e.kind, e.value, e.cycle) for e in events])
+
+        # Intervals still open from the previous ingest of this run
+        open_ids = {(node, grp): iid for iid, node, grp in db.execute(
+            "SELECT id, node, grp FROM intervals WHERE run = ? AND end_cycle IS NULL", (run,))}
+
+        for e in events:
+            grp = ONSETS.get(e.kind) or RECOVERIES.get(e.kind)
+            ts = to_epoch(e.timestamp)
+            iid = open_ids.pop((e.node, grp), None)
+            if iid is not None:
+                db.execute("UPDATE intervals SET end_ts = ?, end_cycle = ? WHERE id = ?",
+                           (ts, e.cycle, iid))
+            if e.kind in ONSETS:
+                cur = db.execute(
+                    "INSERT INTO intervals (run, node, grp, kind, value, start_ts, start_cycle) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", (run, e.node, grp, e.kind, e.value, ts, e.cycle))
+                open_ids[(e.node, grp)] = cur.lastrowid
+
+    # ---------- queries ----------
+    def events(self, node=None, kind=None, start=None, end=None):
+        """FaultEvents for node / kind in [start, end), oldest first"""
+        where, args = where_clause(node, kind, start, end, "ts")
+        rows = self.db.execute(
+            f"SELECT ts, node, kind, value, cycle FROM events{where} ORDER BY run, ts, id", args)
+        return [FaultEvent(from_epoch(ts), node, kind, value, cycle)
+                for ts, node, kind, value, cycle in rows]
+
+    def intervals(self, node=None, kind=None, start=None, end=None, closed_only=False):
+        """Fault intervals starting in [start, end); end is NaT while still active"""
+        where, args = where_clause(node, kind, start, end, "start_ts")
+        if closed_only:
+            where += (" AND" if where else " WHERE") + " end_cycle IS NOT NULL"
+        rows = self.db.execute(
+            "SELECT run, node, kind, value, start_ts, end_ts, start_cycle, end_cycle "
+            f"FROM intervals{where} ORDER BY run, start_ts, id", args)
+        return [FaultInterval(run, node, kind, value, from_epoch(t0), from_epoch(t1), c0, c1)
+                for run, node, kind, value, t0, t1, c0, c1 in rows]
+
+    def duration_stats(self, node=None, kind=None, start=None, end=None):
+        """Closed-interval durations in cycles and seconds"""
+        where, args = where_clause(node, kind, start, end, "start_ts")
+        where += " AND" if where else " WHERE"
+        rows = self.db.execute(
+            "SELECT end_cycle - start_cycle, end_ts - start_ts "
+            f"FROM intervals{where} end_cycle IS NOT NULL", args).fetchall()
+        active = self.db.execute(
+            f"SELECT COUNT(*) FROM intervals{where} end_cycle IS NULL", args).fetchone()[0]
+
+        cycles = np.array([r[0] for r in rows], dtype=float)
+        seconds = np.array([r[1] for r in rows if r[1] is not None], dtype=float)
+        stats = {'count': len(cycles), 'active': active}
+        for name, x in (("cycles", cycles), ("seconds", seconds)):
+            if len(x):
+                p50, p95 = np.percentile(x, [50, 95])
+                stats[name] = {'mean': x.mean(), 'p50': p50, 'p95': p95,
+                               'min': x.min(), 'max': x.max(), 'total': x.sum()}
+            else:
+                stats[name] = None
+        return stats
+
+    def nodes(self):
+        return [n for (n,) in self.db.execute("SELECT DISTINCT node FROM events ORDER BY node")]
+
+# ==================== MAIN ====================
+def main():
+    log_path = sys.argv[1] if len(sys.argv) > 1 else EVENTS_TXT
+    db_path = sys.argv[2] if len(sys.argv) > 2 else STORE_DB
+
+    store = FaultStore(db_path)
+    added = store.ingest(log_path)
+    print(f"Ingested {added} new events from {log_path} into {db_path}")
+
+    for n in store.nodes():
+        print(f"\nNode {n}:")
+        for kind in ONSETS:
+            s = store.duration_stats(node=n, kind=kind)
+            if s['count'] == 0 and s['active'] == 0:
+                continue
+            line = f"  {EVENT_KINDS[kind]:5s}: {s['count']} intervals"
+            c = s['cycles']
+            if c is not None:
+                line += (f", duration p50 {c['p50']:.0f} / p95 {c['p95']:.0f} / "
+                         f"max {c['max']:.0f} cycles, total {c['total']:.0f} cycles")
+            if s['active']:
+                line += f", {s['active']} still active"
+            print(line)
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# ============================================================
+# LIVE VALIDATOR
+# Follows power_monitor.csv and fault_events.txt while Process 2 runs
+# Author: Noridel Herron
+# ============================================================
+#
+# Same checks as validator.py / verify.py (validation.py), applied
+# to each row as it is appended instead of after the test run:
+#   - running Vrms/Irms mean, stdev, min, max per node (Welford,
+#     merged per batch of new rows with Chan's update)
+#   - drift: each node's newest DRIFT_WINDOW cycles against the
+#     reference cycle each row reports (the align_cycles join, with
+#     the scenario offset estimated over the window). A node whose mean
+#     error clears the rms_pct band by DRIFT_SIGMA standard errors is
+#     flagged [DRIFT] until the mean is back inside the band; repeated
+#     cycle ids (a node that stopped sending) and fault cycles on either
+#     side are left out
+#   - pass/fail counters for Vpeak, Ipeak, power, vstat, istat
+#   - fault_events.txt: each event's value must match its status
+#     (a SAG line below 50 V, NORMAL between 50 and 130 V, ...)
+# State is a handful of numbers and one drift window per node, so
+# memory stays constant however long the capture runs.
+#
+# Files are followed like tail -f: new complete lines are read from
+# the last offset; a truncated or replaced file (Process 2 restarts
+# with fopen "w") is read again from the top.
+#
+#   python3 live_validator.py [power_monitor.csv] [fault_events.txt] [seconds]
+#   python3 live_validator.py --replay [power_monitor.csv] [fault_events.txt]
+#     one pass over a finished capture; exit status 1 on any [DRIFT]
+# ============================================================
+
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+import validation as V
+from fault_log import (EV_SAG, EV_SWELL, EV_V_NORMAL, EV_OC, EV_I_NORMAL,
+                       EVENT_KINDS, parse_event)
+
+# ==================== FILE PATHS ====================
+BASELINE_CSV = "../csv_output/base.csv"
+PROCESS2_CSV = "../src_c_code/src/power_monitor.csv"
+EVENTS_TXT   = "../src_c_code/src/fault_events.txt"
+
+TOLERANCES = V.VERIFY_TOLERANCES
+
+POLL_INTERVAL   = 0.5    # seconds between file checks
+REPORT_INTERVAL = 10.0   # seconds between summaries (Process 2 logs every 10 s)
+DRIFT_WINDOW    = 30     # newest cycles per node in the drift mean (~5 min of rows)
+DRIFT_MIN_ROWS  = 10     # cycles needed before a node is judged
+DRIFT_SIGMA     = 2.0    # standard errors the mean error must clear the band by
+
+CHECKS = ("vpeak", "ipeak", "power", "vstat", "istat")
+
+# Newest logged cycles of one node (same fields estimate_offset reads)
+DriftWindow = namedtuple("DriftWindow", ["cycle", "vrms", "irms"])
+
+# Status an event's value must produce (voltage, current)
+EVENT_STATUS = {
+    EV_SAG:      ("v", V.VSTATUS_SAG),
+    EV_SWELL:    ("v", V.VSTATUS_SWELL),
+    EV_V_NORMAL: ("v", V.VSTATUS_NORMAL),
+    EV_OC:       ("i", V.ISTATUS_OC),
+    EV_I_NORMAL: ("i", V.ISTATUS_NORMAL),
+}
+
+# ==================== FILE FOLLOWER ====================
+class Follower:
+    """Complete new lines of a growing text file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pos = 0
+        self.inode = None
+        self.partial = b""
+        self.restarts = 0
+
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if self.inode is not None and (st.st_ino != self.inode or st.st_size < self.pos):
+            # Rewritten from scratch: start over
+            self.pos = 0
+            self.partial = b""
+            self.restarts += 1
+        self.inode = st.st_ino
+        if st.st_size == self.pos:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.pos)
+            data = f.read()
+        self.pos += len(data)
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        return [line.decode(errors="ignore").rstrip("\r") for line in lines]
+
+# ==================== RUNNING STATISTICS ====================
+class RunningStats:
+    """Count / mean / M2 / min / max per node, O(1) memory"""
+
+    def __init__(self, nodes):
+        self.count = np.zeros(nodes, dtype=np.int64)
+        self.mean = np.zeros(nodes)
+        self.m2 = np.zeros(nodes)
+        self.min = np.full(nodes, np.inf)
+        self.max = np.full(nodes, -np.inf)
+
+    def update(self, x, valid):
+        """Merge a (rows, nodes) batch; rows where valid is False are ignored"""
+        nb = valid.sum(axis=0)
+        seen = nb > 0
+        if not seen.any():
+            return
+        xs = np.where(valid, x, 0.0)
+        mean_b = np.divide(xs.sum(axis=0), nb, out=np.zeros(len(nb)), where=seen)
+        m2_b = np.where(valid, (x - mean_b) ** 2, 0.0).sum(axis=0)
+
+        na = self.count
+        n = na + nb
+        delta = mean_b - self.mean
+        safe = np.maximum(n, 1)
+        self.mean = np.where(seen, self.mean + delta * nb / safe, self.mean)
+        self.m2 = np.where(seen, self.m2 + m2_b + delta * delta * na * nb / safe, self.m2)
+        self.count = n
+        self.min = np.minimum(self.min, np.where(valid, x, np.inf).min(axis=0))
+        self.max = np.maximum(self.max, np.where(valid, x, -np.inf).max(axis=0))
+
+    def std(self):
+        return np.sqrt(np.divide(self.m2, self.count - 1, out=np.zeros(len(self.m2)),
+                                 where=self.count > 1))
+
+def extend_window(w, cycle, vrms, irms, size=DRIFT_WINDOW):
+    # Append new rows, dropping repeats of the previous cycle id
+    prev = w.cycle[-1:] if len(w.cycle) else np.array([-1])
+    fresh = cycle != np.r_[prev, cycle[:-1]]
+    return DriftWindow(*(np.concatenate((old, new[fresh]))[-size:]
+                         for old, new in zip(w, (cycle, vrms, irms))))
+
+def empty_window():
+    return DriftWindow(np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+
+# ==================== VALIDATOR ====================
+class LiveValidator:
+    def __init__(self, vrms_ref, irms_ref, tol=TOLERANCES, nodes=V.NODES, out=print):
+        # vrms_ref / irms_ref: reference RMS of every scenario cycle
+        self.vrms_ref = np.asarray(vrms_ref, dtype=np.float64)
+        self.irms_ref = np.asarray(irms_ref, dtype=np.float64)
+        self.tol = tol
+        self.nodes = tuple(nodes)
+        self.out = out
+        self.reset_rows()
+        self.reset_events()
+
+    # Process 2 rewrites each file when it restarts: a new run starts
+    # from empty state instead of merging into the previous one
+    def reset_rows(self):
+        """Forget everything read from power_monitor.csv"""
+        n = len(self.nodes)
+        self.columns = None
+        self.width = 0
+        self.rows = 0
+        self.malformed = 0
+        self.last_stamp = ""
+        self.vrms = RunningStats(n)
+        self.irms = RunningStats(n)
+        self.window = [empty_window() for _ in self.nodes]
+        self.drift = np.full((n, 2), np.nan)     # mean % error, Vrms / Irms
+        self.drifting = np.zeros((n, 2), dtype=bool)
+        self.drift_alarms = 0
+        self.passed = np.zeros(n, dtype=np.int64)
+        self.failed = np.zeros((n, len(CHECKS)), dtype=np.int64)
+
+    def reset_events(self):
+        """Forget everything read from fault_events.txt"""
+        n = len(self.nodes)
+        self.events = np.zeros((n, len(EVENT_KINDS)), dtype=np.int64)
+        self.event_mismatch = np.zeros(n, dtype=np.int64)
+        self.open_faults = [set() for _ in self.nodes]
+
+    # ---------- power_monitor.csv ----------
+    def feed_rows(self, lines):
+        body = []
+        for line in lines:
+            if not line.strip():
+                continue
+            if line.startswith("timestamp"):
+                header = line.strip().split(",")
+                self.columns = {name: k for k, name in enumerate(header)}
+                self.width = len(header)
+                continue
+            if self.columns is None:
+                self.malformed += 1
+                continue
+            body.append(line)
+        if not body:
+            return
+
+        stamps, values = self._parse(body)
+        if not len(values):
+            return
+        self.rows += len(values)
+        self.last_stamp = stamps[-1]
+
+        field = {f: np.stack([self._column(values, f"{f}{n}") for n in self.nodes], axis=1)
+                 for f in V.RECORD_FIELDS}
+        vrms, irms = field["vrms"], field["irms"]
+        valid = ~np.isnan(np.stack([field[f] for f in V.RECORD_FIELDS])).any(axis=0)
+        valid &= ~V.init_mask(vrms, irms, self.tol.init_floor)
+        self.vrms.update(vrms, valid)
+        self.irms.update(irms, valid)
+
+        checks = np.stack([
+            V.relative_ok(field["vpeak"], vrms * V.SQRT2, self.tol.peak),
+            V.relative_ok(field["ipeak"], irms * V.SQRT2, self.tol.peak),
+            V.relative_ok(field["power"], vrms * irms, self.tol.power),
+            field["vstat"] == V.expected_vstatus(vrms),
+            field["istat"] == V.expected_istatus(irms),
+        ])                                      # (checks, rows, nodes)
+        ok = checks.all(axis=0) & valid
+        self.passed += ok.sum(axis=0)
+        self.failed += (~checks & valid).sum(axis=1).T
+        self._report_status_mismatch(stamps, field, checks, valid)
+
+        normal = (valid & (field["vstat"] == V.VSTATUS_NORMAL)
+                  & (field["istat"] == V.ISTATUS_NORMAL))
+        cycles = field["cycle"].astype(np.int64)
+        for k in range(len(self.nodes)):
+            rows = normal[:, k]
+            self.window[k] = extend_window(self.window[k], cycles[rows, k],
+                                           vrms[rows, k], irms[rows, k])
+        self._check_drift()
+
+    def _parse(self, body):
+        width = self.width
+        ok = [line for line in body if line.count(",") == width - 1]
+        self.malformed += len(body) - len(ok)
+        if not ok:
+            return [], np.empty((0, width - 1))
+        stamps, _, rest = zip(*(line.partition(",") for line in ok))
+        return list(stamps), V.parse_rows(rest, width - 1)
+
+    def _column(self, values, name):
+        k = self.columns.get(name)
+        if k is None:
+            return np.full(len(values), np.nan)
+        return values[:, k - 1]
+
+    def _report_status_mismatch(self, stamps, field, checks, valid):
+        bad = (~checks[3:] & valid).any(axis=0)
+        for r, k in zip(*np.nonzero(bad)):
+            n = self.nodes[k]
+            self.out(f"[MISMATCH] {stamps[r]} Node {n}: vrms {field['vrms'][r, k]:.2f} "
+                     f"vstat {int(field['vstat'][r, k])} (expected {int(V.expected_vstatus(field['vrms'][r, k]))}), "
+                     f"irms {field['irms'][r, k]:.2f} istat {int(field['istat'][r, k])} "
+                     f"(expected {int(V.expected_istatus(field['irms'][r, k]))})")
+
+    def drift_error(self, w):
+        """(mean, standard error) of the window's % error per Vrms / Irms; None if too few"""
+        offset = V.estimate_offset(w, self.vrms_ref, self.irms_ref)
+        idx = V.reference_index(w.cycle, len(self.vrms_ref), offset)
+        v_ref, i_ref = self.vrms_ref[idx], self.irms_ref[idx]
+        # Expected fault cycles are the fault reconciliation's job
+        ok = ((V.expected_vstatus(v_ref) == V.VSTATUS_NORMAL)
+              & (V.expected_istatus(i_ref) == V.ISTATUS_NORMAL))
+        count = int(ok.sum())
+        if count < DRIFT_MIN_ROWS:
+            return None
+        err = np.stack([w.vrms[ok] / np.maximum(v_ref[ok], 0.001),
+                        w.irms[ok] / np.maximum(i_ref[ok], 0.001)]) * 100 - 100
+        return err.mean(axis=1), err.std(axis=1, ddof=1) / np.sqrt(count)
+
+    def _check_drift(self):
+        # Judged nodes only; the others keep their last verdict
+        flagged = self.drifting.copy()
+        for k, w in enumerate(self.window):
+            if len(w.cycle) < DRIFT_MIN_ROWS:
+                continue
+            result = self.drift_error(w)
+            if result is None:
+                continue
+            mean, sem = result
+            self.drift[k] = mean
+            # Raised once noise cannot explain the error, cleared once the
+            # mean itself is back in the band
+            band = self.tol.rms_pct
+            flagged[k] = np.where(self.drifting[k], np.abs(mean) > band,
+                                  np.abs(mean) - DRIFT_SIGMA * sem > band)
+
+        for k, j in zip(*np.nonzero(flagged != self.drifting)):
+            n, name = self.nodes[k], ("Vrms", "Irms")[j]
+            if flagged[k, j]:
+                self.drift_alarms += 1
+                self.out(f"[DRIFT] {self.last_stamp} Node {n}: {name} {self.drift[k, j]:+.1f}% "
+                         f"from the reference over its last {len(self.window[k].cycle)} cycles")
+            else:
+                self.out(f"[DRIFT] {self.last_stamp} Node {n}: {name} back within "
+                         f"{self.tol.rms_pct:g}% ({self.drift[k, j]:+.1f}%)")
+        self.drifting = flagged
+
+    # ---------- fault_events.txt ----------
+    def feed_events(self, lines):
+        for line in lines:
+            ev = parse_event(line)
+            if ev is None or ev.node not in self.nodes:
+                continue
+            k = self.nodes.index(ev.node)
+            self.events[k, ev.kind] += 1
+            which, status = EVENT_STATUS[ev.kind]
+            expected = (V.expected_vstatus(ev.value) if which == "v"
+                        else V.expected_istatus(ev.value))
+            if int(expected) != status:
+                self.event_mismatch[k] += 1
+                self.out(f"[MISMATCH] {ev.timestamp} Node {ev.node}: {EVENT_KINDS[ev.kind]} "
+                         f"logged at {ev.value:.2f} (cycle {ev.cycle})")
+            if ev.kind in (EV_SAG, EV_SWELL, EV_OC):
+                self.open_faults[k].add(ev.kind)
+            elif ev.kind == EV_V_NORMAL:
+                self.open_faults[k] -= {EV_SAG, EV_SWELL}
+            else:
+                self.open_faults[k].discard(EV_OC)
+
+    # ---------- report ----------
+    def report_lines(self):
+        lines = [f"[LIVE] {self.rows} rows (last {self.last_stamp or '-'}), "
+                 f"{self.malformed} malformed"]
+        vstd, istd = self.vrms.std(), self.irms.std()
+        for k, n in enumerate(self.nodes):
+            if not self.vrms.count[k]:
+                lines.append(f"  Node {n}: no data")
+                continue
+            fails = " ".join(f"{c}:{self.failed[k, j]}" for j, c in enumerate(CHECKS) if self.failed[k, j])
+            flags = [name for name, d in zip(("V", "I"), self.drifting[k]) if d]
+            faults = ",".join(EVENT_KINDS[e] for e in sorted(self.open_faults[k])) or "none"
+            lines.append(
+                f"  Node {n}: V {self.vrms.mean[k]:6.2f}±{vstd[k]:5.2f} "
+                f"[{self.vrms.min[k]:.2f}, {self.vrms.max[k]:.2f}]  "
+                f"I {self.irms.mean[k]:5.2f}±{istd[k]:4.2f} "
+                f"[{self.irms.min[k]:.2f}, {self.irms.max[k]:.2f}]  "
+                f"pass {self.passed[k]}/{self.vrms.count[k]}"
+                f"{f' (fail {fails})' if fails else ''}  "
+                f"events {self.events[k].sum()} open {faults} mismatch {self.event_mismatch[k]}"
+                f"{'  DRIFT ' + '/'.join(flags) if flags else ''}")
+        return lines
+
+def replay(live, csv_path, events_path):
+    """One pass over a finished capture; True if no node was ever flagged"""
+    # Row by row, as Process 2 appended them
+    for line in Follower(csv_path).poll():
+        live.feed_rows([line])
+    live.feed_events(Follower(events_path).poll())
+    print("\n".join(live.report_lines()))
+    print(f"[LIVE] {live.drift_alarms} drift alarms")
+    return live.drift_alarms == 0
+
+def main():
+    args = sys.argv[1:]
+    replay_only = bool(args) and args[0] == "--replay"
+    if replay_only:
+        args = args[1:]
+    csv_path = args[0] if len(args) > 0 else PROCESS2_CSV
+    events_path = args[1] if len(args) > 1 else EVENTS_TXT
+    seconds = float(args[2]) if len(args) > 2 else None
+
+    v_samples, i_samples = V.load_baseline_csv(BASELINE_CSV)
+    if v_samples is None:
+        return
+    vrms_cycles, irms_cycles = V.calculate_reference_rms(v_samples, i_samples)
+    live = LiveValidator(vrms_cycles, irms_cycles)
+    print(f"[LIVE] Reference {len(vrms_cycles)} cycles (Vrms {vrms_cycles.mean():.2f} V, "
+          f"Irms {irms_cycles.mean():.2f} A); following {csv_path} and {events_path}")
+    if replay_only:
+        sys.exit(0 if replay(live, csv_path, events_path) else 1)
+
+    followed = ((Follower(csv_path), live.reset_rows, live.feed_rows),
+                (Follower(events_path), live.reset_events, live.feed_events))
+    t_start = t_last = time.monotonic()
+    try:
+        while seconds is None or time.monotonic() - t_start < seconds:
+            for follower, reset, feed in followed:
+                restarts = follower.restarts
+                lines = follower.poll()
+                if follower.restarts != restarts:
+                    # Close out the old run before its state is dropped
+                    print("\n".join(live.report_lines()))
+                    print(f"[LIVE] {follower.path} was rewritten (Process 2 restarted), "
+                          f"starting over from the top")
+                    reset()
+                feed(lines)
+            if time.monotonic() - t_last >= REPORT_INTERVAL:
+                t_last = time.monotonic()
+                print("\n".join(live.report_lines()))
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n".join(live.report_lines()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# ============================================================
+# MULTI-PROCESS STREAMER
+# Nodes split across worker processes over shared scenario buffers
+# Author: Noridel Herron
+# ============================================================
+#
+# Parent (MultiStreamer, keyboard + node commands + status):
+#   - encodes the scenarios once into shared_scenarios.SharedScenarios
+#   - keeps per-node state (scenario / idx / restart / pending) in
+#     SharedArrays
+#   - starts WORKERS processes, each owning a contiguous slice of slots
+#   - publishes one perf_counter_ns anchor (t0) once every worker is
+#     ready, so all workers tick on the same deadline grid
+# Worker (WorkerCore): a normal StreamerCore over its slice, with the
+# state arrays bound to the shared block. Scenario switches / resets
+# reach it through restart[] flags: the parent only writes pending[]
+# and restart[], and the worker's clock moves pending[] into
+# scenario[] between ticks. A reset raises CTL_HOLD; dropping it back
+# to 0 publishes a new anchor that every worker re-anchors on. Each worker
+# publishes clock and send statistics into its row of the stats table. Per-node send counters
+# and each worker's lateness histogram live in the shared block too,
+# so the parent's telemetry reads them directly.
+#
+# Usage: python3 udp_inputStreamer.py <nodes.json> <workers>
+# ============================================================
+
+import asyncio
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from stream_core import StreamerCore
+from shared_scenarios import SharedArrays, SharedScenarios
+from pacing import HIST_BINS
+
+# Control words
+CTL_STOP, CTL_STATS_GEN, CTL_T0, CTL_HOLD = range(4)
+
+# Per-worker statistics row
+STAT_FIELDS = ("ready", "achieved_hz", "skipped", "late", "lateness_max_us",
+               "pps", "packets", "errors")
+STAT = {name: k for k, name in enumerate(STAT_FIELDS)}
+
+COUNTER_FIELDS = ("packets", "bytes", "errors")
+
+PUBLISH_INTERVAL = 0.25     # worker -> stats table
+START_MARGIN_NS = 20_000_000
+READY_TIMEOUT = 30.0
+
+# ==================== WORKER ====================
+class WorkerCore(StreamerCore):
+    def __init__(self, scenarios, nodes, state, worker, slots, **options):
+        super().__init__(scenarios, nodes, **options)
+        self.state = state
+        self.worker = worker
+        self._stats_gen = 0
+        # Counters and histogram straight into the shared block
+        self.slot_counters = tuple(state[f][slots] for f in COUNTER_FIELDS)
+        self.pacer.hist = state["hist"][worker]
+
+    def _publish(self):
+        row = self.state["stats"][self.worker]
+        p, s = self.pacer.stats(), self.sender.stats()
+        row[STAT["achieved_hz"]] = p["achieved_hz"]
+        row[STAT["skipped"]] = p["skipped"]
+        row[STAT["late"]] = p["late"]
+        row[STAT["lateness_max_us"]] = p["lateness_max_us"]
+        row[STAT["pps"]] = s["pps"]
+        row[STAT["packets"]] = s["packets"]
+        row[STAT["errors"]] = s["errors"]
+
+    async def _clock(self):
+        # Wait for the shared anchor, then stream on the common grid
+        ctl = self.state["ctl"]
+        self.state["stats"][self.worker, STAT["ready"]] = 1
+        while not ctl[CTL_T0]:
+            await asyncio.sleep(0.005)
+        self.clock_t0 = int(ctl[CTL_T0])
+        await super()._clock()
+
+    def sending(self):
+        return not self.state["ctl"][CTL_HOLD]
+
+    def resume_anchor(self):
+        return int(self.state["ctl"][CTL_T0])
+
+    async def _status(self):
+        ctl = self.state["ctl"]
+        while True:
+            await asyncio.sleep(PUBLISH_INTERVAL)
+            if ctl[CTL_STOP]:
+                self.stop()
+            if ctl[CTL_STATS_GEN] != self._stats_gen:
+                # Send counters only; the clock stays on the shared grid
+                self._stats_gen = int(ctl[CTL_STATS_GEN])
+                self.sender.reset_stats()
+            self._publish()
+
+def worker_main(spec, registry, start, stop, worker, options):
+    scenarios = SharedScenarios.attach(spec["scenarios"])
+    state = SharedArrays.attach(spec["state"])
+    registry.bind_state(state["scenario"], state["idx"], state["restart"], state["pending"])
+    try:
+        core = WorkerCore(scenarios, registry.subset(start, stop), state, worker,
+                          slice(start, stop), **options)
+        asyncio.run(core.run(reset=False))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Drop every view of the shared pages before unmapping
+        core = registry = None
+        state.close()
+        scenarios.close()
+
+# ==================== CONTROLLER ====================
+class MultiStreamer(StreamerCore):
+    """StreamerCore front (commands, status, control) driving worker processes"""
+
+    def __init__(self, scenarios, nodes, workers, **options):
+        workers = max(1, min(workers, len(nodes)))
+        self.shared = SharedScenarios.create(scenarios)
+        self.state = SharedArrays.create({
+            "scenario": (np.int64, (len(nodes),)),
+            "idx":      (np.int64, (len(nodes),)),
+            "restart":  (np.int8,  (len(nodes),)),
+            "pending":  (np.int64, (len(nodes),)),
+            "packets":  (np.int64, (len(nodes),)),
+            "bytes":    (np.int64, (len(nodes),)),
+            "errors":   (np.int64, (len(nodes),)),
+            "ctl":      (np.int64, (4,)),
+            "stats":    (np.float64, (workers, len(STAT_FIELDS))),
+            "hist":     (np.int64, (workers, HIST_BINS)),
+        })
+        nodes.bind_state(self.state["scenario"], self.state["idx"], self.state["restart"],
+                         self.state["pending"])
+
+        self.workers = workers
+        self.options = options
+        self.procs = []
+        super().__init__(self.shared, nodes, **options)
+        self.slot_counters = tuple(self.state[f] for f in COUNTER_FIELDS)
+
+    # ---------- control goes through the workers' control words ----------
+    def reset_stats(self):
+        self.state["ctl"][CTL_STATS_GEN] += 1
+
+    def hold_sends(self):
+        self.state["ctl"][CTL_HOLD] += 1
+
+    def resume_sends(self):
+        ctl = self.state["ctl"]
+        if ctl[CTL_HOLD] == 1 and ctl[CTL_T0]:
+            # Anchor first: a worker reads it as soon as the hold drops
+            ctl[CTL_T0] = time.perf_counter_ns() + START_MARGIN_NS
+        ctl[CTL_HOLD] -= 1
+
+    def stop(self):
+        self.state["ctl"][CTL_STOP] = 1
+        super().stop()
+
+    # ---------- status from the workers' rows ----------
+    def clock_summary(self):
+        st = self.state["stats"]
+        hz = st[:, STAT["achieved_hz"]]
+        return (f"{self.workers} workers | rate {hz.min():.1f}-{hz.max():.1f}/{self.pacer.rate:.0f} Hz | "
+                f"late max {st[:, STAT['lateness_max_us']].max():.1f} us | "
+                f"late {st[:, STAT['late']].sum():.0f} skipped {st[:, STAT['skipped']].sum():.0f}")
+
+    def send_summary(self):
+        st = self.state["stats"]
+        return (f"{st[:, STAT['pps']].sum():.0f} pkt/s over {self.workers} workers, "
+                f"errors {st[:, STAT['errors']].sum():.0f}")
+
+    def clock_stats(self):
+        st = self.state["stats"]
+        return {
+            "target_hz": self.pacer.rate,
+            "workers": self.workers,
+            "achieved_hz": st[:, STAT["achieved_hz"]].tolist(),
+            "skipped": int(st[:, STAT["skipped"]].sum()),
+            "late": int(st[:, STAT["late"]].sum()),
+            "lateness_max_us": float(st[:, STAT["lateness_max_us"]].max()),
+        }
+
+    def lateness_hist(self):
+        return self.state["hist"].sum(axis=0)
+
+    # ---------- workers ----------
+    def _start_workers(self):
+        ctx = mp.get_context("spawn")
+        spec = {"scenarios": self.shared.spec(), "state": self.state.spec()}
+        bounds = np.linspace(0, len(self.nodes), self.workers + 1).astype(int)
+        for w in range(self.workers):
+            p = ctx.Process(target=worker_main, name=f"streamer-{w}",
+                            args=(spec, self.nodes, int(bounds[w]), int(bounds[w + 1]), w, self.options))
+            p.start()
+            self.procs.append(p)
+
+    async def _clock(self):
+        # No sends here: release the workers on one anchor and watch them
+        ready = self.state["stats"][:, STAT["ready"]]
+        deadline = time.monotonic() + READY_TIMEOUT
+        while not ready.all():
+            if time.monotonic() > deadline or not all(p.is_alive() for p in self.procs):
+                self.log("[ERROR] Streaming workers failed to start")
+                self.stop()
+                return
+            await asyncio.sleep(0.01)
+
+        self.state["ctl"][CTL_T0] = time.perf_counter_ns() + START_MARGIN_NS
+        self.log(f"[WORKERS] {self.workers} processes streaming {len(self.nodes)} nodes "
+                 f"({self.shared.nbytes() / 1e6:.1f} MB shared)")
+        while True:
+            await asyncio.sleep(0.5)
+            dead = [p.name for p in self.procs if not p.is_alive()]
+            if dead:
+                self.log(f"[ERROR] Worker exited: {', '.join(dead)}")
+                self.stop()
+                return
+
+    async def run(self, reset=True):
+        self._start_workers()
+        try:
+            await super().run(reset)
+        finally:
+            self.state["ctl"][CTL_STOP] = 1
+            for p in self.procs:
+                p.join(2.0)
+                if p.is_alive():
+                    p.terminate()
+                    p.join()
+
+    def close(self):
+        # Keep a private copy of the final state, then release the blocks
+        self.nodes.bind_state(self.nodes.scenario.copy(), self.nodes.idx.copy(),
+                              self.nodes.restart.copy(), self.nodes.pending.copy())
+        self.slot_counters = tuple(c.copy() for c in self.slot_counters)
+        self._base = self._length = self._start = self._offsets = None
+        self.state.close()
+        self.shared.close()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# ============================================================
+# NODE REGISTRY
+# Streamer endpoints loaded from config, per-node state in arrays
+# Author: Noridel Herron
+# ============================================================
+#
+# Config format (JSON, TOML or YAML, same loader as scenarios):
+#
+#   {
+#     "cmd_gap": 0.1,
+#     "nodes": [
+#       {"id": 1, "ip": "192.168.1.50", "scenario": "base"},
+#       {"id": 2, "ip": "192.168.1.51", "scenario": "t1", "phase": 30}
+#     ],
+#     "virtual": {"count": 200, "first_id": 101, "ip": "127.0.0.1",
+#                 "port": 7001, "cmd_port": 9001,
+#                 "scenarios": ["base", "t1", "t2"], "phase_step": 60}
+#   }
+#
+# "nodes" lists real ESP32s (port / cmd_port default to 6001 / 6000).
+# "virtual" expands to `count` endpoints on consecutive ports, for
+# load tests against udp_sink.py. Scenarios are assigned round-robin
+# and node k starts k * phase_step samples into its scenario, so the
+# fleet does not send identical samples in lockstep.
+# cmd_gap is the pause after each node command (0 for virtual fleets).
+# ============================================================
+
+import sys
+
+import numpy as np
+
+from fault_schedule import load_scenario as load_config
+
+DATA_PORT = 6001
+CMD_PORT  = 6000
+CMD_GAP   = 0.1
+
+class NodeRegistry:
+    """Fixed set of endpoints plus array-backed streaming state.
+
+    Slot i (0..n-1) is the row for node ids[i] in every array and the
+    destination slot in bulk_send.BulkSender.
+      scenario[i] -> index into the streamer's scenario list
+      phase[i]    -> sample offset the node restarts from
+      idx[i]      -> next sample to send
+      pending[i]  -> scenario the node takes at its next restart
+      restart[i]  -> set by a controller (keyboard, another process);
+                     the clock copies pending[i] into scenario[i] and
+                     restarts the node from its phase offset
+    """
+
+    def __init__(self, ids, ips, ports, cmd_ports, scenarios, phases, cmd_gap=CMD_GAP):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        if len(np.unique(self.ids)) != len(self.ids):
+            raise ValueError("Duplicate node id in registry")
+        self.ips = list(ips)
+        self.ports = np.asarray(ports, dtype=np.int64)
+        self.cmd_ports = np.asarray(cmd_ports, dtype=np.int64)
+        self.scenario_names = list(scenarios)    # initial, by name
+        self.phase = np.asarray(phases, dtype=np.int64)
+        self.cmd_gap = cmd_gap
+
+        n = len(self.ids)
+        self.scenario = np.zeros(n, dtype=np.int64)
+        self.idx = np.zeros(n, dtype=np.int64)
+        self.restart = np.zeros(n, dtype=np.int8)
+        self.pending = np.zeros(n, dtype=np.int64)
+        self.slot_of = {int(nid): slot for slot, nid in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_nodes(cls, nodes, scenario="base", port=DATA_PORT, cmd_port=CMD_PORT):
+        """Registry for a plain {id: ip} dict (the streamer's NODES)"""
+        n = len(nodes)
+        return cls(list(nodes), list(nodes.values()), [port] * n, [cmd_port] * n,
+                   [scenario] * n, [0] * n)
+
+    @classmethod
+    def from_config(cls, config):
+        ids, ips, ports, cmd_ports, scenarios, phases = [], [], [], [], [], []
+
+        for node in config.get("nodes", []):
+            ids.append(int(node["id"]))
+            ips.append(node["ip"])
+            ports.append(int(node.get("port", DATA_PORT)))
+            cmd_ports.append(int(node.get("cmd_port", CMD_PORT)))
+            scenarios.append(node.get("scenario", "base"))
+            phases.append(int(node.get("phase", 0)))
+
+        virtual = config.get("virtual")
+        if virtual:
+            count = int(virtual["count"])
+            first_id = int(virtual.get("first_id", max(ids, default=0) + 1))
+            port = int(virtual.get("port", DATA_PORT))
+            cmd_port = virtual.get("cmd_port")
+            names = virtual.get("scenarios", [virtual.get("scenario", "base")])
+            phase_step = int(virtual.get("phase_step", 0))
+
+            for k in range(count):
+                ids.append(first_id + k)
+                ips.append(virtual.get("ip", "127.0.0.1"))
+                ports.append(port + k)
+                cmd_ports.append(CMD_PORT if cmd_port is None else int(cmd_port) + k)
+                scenarios.append(names[k % len(names)])
+                phases.append(k * phase_step)
+
+        if not ids:
+            raise ValueError("Node config defines no nodes")
+        return cls(ids, ips, ports, cmd_ports, scenarios, phases,
+                   float(config.get("cmd_gap", CMD_GAP)))
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_config(load_config(path))
+
+    def bind_state(self, scenario, idx, restart, pending):
+        """Use external (e.g. shared-memory) arrays for the streaming state"""
+        self.scenario, self.idx, self.restart, self.pending = scenario, idx, restart, pending
+
+    def subset(self, start, stop):
+        """Registry for slots [start, stop); state arrays are views, not copies"""
+        sub = NodeRegistry(self.ids[start:stop], self.ips[start:stop],
+                           self.ports[start:stop], self.cmd_ports[start:stop],
+                           self.scenario_names[start:stop], self.phase[start:stop],
+                           self.cmd_gap)
+        sub.bind_state(self.scenario[start:stop], self.idx[start:stop],
+                       self.restart[start:stop], self.pending[start:stop])
+        return sub
+
+    # ==================== ENDPOINTS ====================
+    def destinations(self):
+        return [(ip, int(port)) for ip, port in zip(self.ips, self.ports)]
+
+    def cmd_destinations(self):
+        return [(int(nid), ip, int(port))
+                for nid, ip, port in zip(self.ids, self.ips, self.cmd_ports)]
+
+    def select(self, node=None):
+        """Slots for one node id, or every slot when node is None"""
+        if node is None:
+            return np.arange(len(self.ids))
+        return np.array([self.slot_of[node]])
+
+    def describe(self):
+        ports = f"{self.ports.min()}-{self.ports.max()}" if len(set(self.ports)) > 1 else str(self.ports[0])
+        hosts = sorted(set(self.ips))
+        return f"{len(self)} nodes -> {', '.join(hosts[:3])}{' ...' if len(hosts) > 3 else ''} port {ports}"
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python3 node_registry.py <nodes.json>")
+        sys.exit(1)
+    reg = NodeRegistry.load(sys.argv[1])
+    print(reg.describe())
+    for name in sorted(set(reg.scenario_names)):
+        print(f"  {name:6s} {reg.scenario_names.count(name)} nodes")
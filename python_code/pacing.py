@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# ============================================================
+# DRIFT-FREE SAMPLE PACING
+# Absolute-deadline scheduler for udp_inputStreamer
+# Author: Noridel Herron
+# ============================================================
+#
+# Deadlines are t0 + k * 1e9 / rate (ns), so the average rate
+# never drifts no matter how long each iteration takes. Waiting is
+# hybrid: sleep until SPIN_NS before the deadline, then busy-wait on
+# perf_counter_ns for the last stretch (time.sleep alone overshoots
+# by 50-100+ us on a Pi).
+#
+# When an iteration runs late:
+#   "catchup" -> wait() returns how many ticks are due (up to
+#                max_burst); the caller emits them back to back and
+#                anything beyond max_burst is skipped
+#   "skip"    -> missed ticks are dropped, wait() always returns 1 and
+#                the next deadline stays on the original grid
+#
+# hist counts how late every emitted tick went out against its own
+# deadline, in power-of-two microsecond bins (see HIST_BINS).
+# ============================================================
+
+import time
+
+import numpy as np
+
+SPIN_NS = 200_000        # busy-wait the last 200 us before a deadline
+MAX_BURST = 60           # at most one cycle of catch-up per wait()
+
+POLICIES = ("catchup", "skip")
+
+# Lateness histogram: bin 0 = under 1 us, bin k = [2^(k-1), 2^k) us,
+# last bin = everything from 2^(HIST_BINS-2) us (~65 ms) up
+HIST_BINS = 18
+
+def hist_edges_us():
+    """Lower edge of every lateness bin in microseconds"""
+    return [0] + [1 << (k - 1) for k in range(1, HIST_BINS)]
+
+class PacingScheduler:
+    def __init__(self, rate_hz, policy="catchup", spin_ns=SPIN_NS, max_burst=MAX_BURST):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown pacing policy: {policy}")
+        self.rate = rate_hz
+        self.policy = policy
+        self.spin_ns = spin_ns
+        self.max_burst = max_burst
+        self.period_ns = 1_000_000_000 / rate_hz
+        self.hist = np.zeros(HIST_BINS, dtype=np.int64)
+        self.start()
+
+    def start(self, t0=None):
+        """(Re)anchor the deadline grid at t0 (default now) and clear statistics
+
+        t0 is a perf_counter_ns() value; it is system-wide (CLOCK_MONOTONIC)
+        on Linux, so several processes can share one grid.
+        """
+        self.t0 = time.perf_counter_ns() if t0 is None else t0
+        self.tick = 0            # index of the next deadline
+        self.waits = 0           # wait() calls
+        self.sent = 0            # ticks handed to the caller
+        self.skipped = 0         # ticks dropped by policy / burst limit
+        self.late = 0            # waits released more than one period late
+        self.lateness_sum = 0
+        self.lateness_max = 0
+        self.hist[:] = 0         # in place: may be a shared-memory view
+
+    def deadline(self, k):
+        # Computed from k, never accumulated, so rounding cannot drift
+        return self.t0 + int(k * 1_000_000_000 / self.rate)
+
+    def wait(self):
+        """Block until the next deadline; return the number of ticks to emit"""
+        target = self.deadline(self.tick)
+        now = time.perf_counter_ns()
+
+        remaining = target - now
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / 1e9)
+        while now < target:
+            now = time.perf_counter_ns()
+
+        lateness = now - target
+        self.waits += 1
+        self.lateness_sum += lateness
+        if lateness > self.lateness_max:
+            self.lateness_max = lateness
+        if lateness > self.period_ns:
+            self.late += 1
+
+        # Every deadline up to now is due
+        due = int(lateness // self.period_ns) + 1
+
+        if self.policy == "skip":
+            emit = 1
+        else:
+            emit = min(due, self.max_burst)
+
+        # Each emitted tick against its own deadline; the emitted ticks are
+        # the newest `emit` of those due (older ones are the skipped ones)
+        hist = self.hist
+        for k in range(due - emit, due):
+            late_us = (now - self.deadline(self.tick + k)) // 1000
+            hist[min(late_us.bit_length(), HIST_BINS - 1)] += 1
+
+        self.skipped += due - emit
+        self.sent += emit
+        self.tick += due
+        return emit
+
+    # ==================== STATISTICS ====================
+    def elapsed(self):
+        return (time.perf_counter_ns() - self.t0) / 1e9
+
+    def stats(self):
+        elapsed = self.elapsed()
+        waits = max(self.waits, 1)
+        return {
+            "target_hz": self.rate,
+            "achieved_hz": self.sent / elapsed if elapsed > 0 else 0.0,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "late": self.late,
+            "lateness_avg_us": self.lateness_sum / waits / 1e3,
+            "lateness_max_us": self.lateness_max / 1e3,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"rate {s['achieved_hz']:.1f}/{s['target_hz']:.0f} Hz | "
+                f"late avg {s['lateness_avg_us']:.1f} us max {s['lateness_max_us']:.1f} us | "
+                f"late {s['late']} skipped {s['skipped']}")
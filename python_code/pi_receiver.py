@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# ============================================================
+# PI RECEIVER (Process 1 stand-in)
+# esp_packet_t aggregation with drop and cycle-gap accounting
+# Author: Noridel Herron
+# ============================================================
+#
+# Reference receiver for the data path in src_c_code/src/network.c:
+#   DATA_PORT 5005 -> esp_packet_t {u32 node_id, u32 cycle_id,
+#                                   f32 vrms, f32 irms}, 16 bytes packed
+#   CMD_PORT  6000 -> FAULT|node|type|... from the nodes
+# Each node's latest cycle / Vrms / Irms lands in preallocated arrays
+# (the combined_pkt of the C code, for any number of nodes).
+#
+# Receive backends (both driven by one asyncio loop via add_reader):
+#   "recvmmsg" -> Linux recvmmsg(2) through ctypes, up to BATCH
+#                 datagrams per syscall, decoded with a NumPy view
+#   "asyncio"  -> recvmsg per datagram, decoded with struct.Struct
+#   "auto"     -> recvmmsg when libc provides it
+#
+# Accounting:
+#   kernel drops -> SO_RXQ_OVFL counter (datagrams the socket queue
+#                   discarded because we were too slow)
+#   bad size     -> datagrams that are not exactly 16 bytes (ignored,
+#                   like the C receiver)
+#   cycle gaps   -> per node, cycle_id delta between packets. Nodes
+#                   send every 100 ms, so the delta is ~6 cycles when
+#                   streamed in real time; a delta of d > 1.5*expected
+#                   counts round(d / expected) - 1 lost packets.
+#                   A delta of 0 is a stall (node sending without new
+#                   samples), a negative delta a reset (RESET_CYCLE)
+#                   or reorder.
+#
+#   python3 pi_receiver.py [backend] [seconds]
+#   python3 pi_receiver.py bench [nodes] [seconds]
+# ============================================================
+
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import multiprocessing as mp
+import socket
+import struct
+import sys
+import time
+
+import numpy as np
+
+from bulk_send import WORD, iovec, msghdr, mmsghdr, BulkSender
+
+DATA_PORT = 5005
+CMD_PORT  = 6000
+
+MAX_NODES = 1024            # node ids 1..MAX_NODES
+EXPECTED_DELTA = 6          # cycles between packets (100 ms at 60 Hz)
+LOSS_FACTOR = 1.5
+REPORT_INTERVAL = 2.0
+DETAIL_NODES = 16
+
+BATCH = 256                 # datagrams per recvmmsg call
+SLOT = 32                   # bytes per receive slot (> 16 so oversize shows)
+RCVBUF = 4 << 20
+
+ESP_PACKET = struct.Struct("<IIff")
+PACKET_DTYPE = np.dtype([("node_id", "<u4"), ("cycle_id", "<u4"),
+                         ("vrms", "<f4"), ("irms", "<f4")])
+SLOT_DTYPE = np.dtype([("pkt", PACKET_DTYPE), ("pad", f"V{SLOT - PACKET_DTYPE.itemsize}")])
+
+SO_RXQ_OVFL = getattr(socket, "SO_RXQ_OVFL", 40)
+CMSG_SPACE = 32             # room for one cmsghdr + u32
+# cmsghdr {size_t len; int level; int type;} then data at CMSG_LEN(0):
+# 12 bytes in on 32-bit Linux, 16 on 64-bit
+CMSG_LEVEL_OFFSET = ctypes.sizeof(ctypes.c_size_t)
+CMSG_DATA_OFFSET = socket.CMSG_LEN(0) if hasattr(socket, "CMSG_LEN") else 2 * WORD
+BACKENDS = ("auto", "recvmmsg", "asyncio")
+
+def _load_recvmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fn = libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.POINTER(mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    fn.restype = ctypes.c_int
+    return fn
+
+_recvmmsg = _load_recvmmsg()
+
+# ==================== PER-NODE AGGREGATE ====================
+class NodeTable:
+    """Latest reading and gap statistics per node id (row = id - 1)"""
+
+    def __init__(self, max_nodes=MAX_NODES, expected_delta=EXPECTED_DELTA):
+        n = max_nodes
+        self.max_nodes = n
+        self.expected = expected_delta
+        self.packets = np.zeros(n, dtype=np.int64)
+        self.cycle = np.full(n, -1, dtype=np.int64)
+        self.vrms = np.zeros(n, dtype=np.float32)
+        self.irms = np.zeros(n, dtype=np.float32)
+        self.active = np.zeros(n, dtype=bool)
+        self.gap_min = np.full(n, np.iinfo(np.int64).max, dtype=np.int64)
+        self.gap_max = np.zeros(n, dtype=np.int64)
+        self.gap_sum = np.zeros(n, dtype=np.int64)
+        self.gap_count = np.zeros(n, dtype=np.int64)
+        self.lost = np.zeros(n, dtype=np.int64)
+        self.resets = np.zeros(n, dtype=np.int64)
+        self.stalls = np.zeros(n, dtype=np.int64)
+        self.faults = np.zeros(n, dtype=np.int64)
+        self.unknown = 0
+
+    def update(self, node_id, cycle_id, vrms, irms):
+        """Apply a batch of packets (arrival order) in a few vector ops"""
+        idx = node_id.astype(np.int64) - 1
+        ok = (idx >= 0) & (idx < self.max_nodes)
+        if not ok.all():
+            self.unknown += int((~ok).sum())
+            idx, cycle_id, vrms, irms = idx[ok], cycle_id[ok], vrms[ok], irms[ok]
+        if not len(idx):
+            return
+
+        order = np.argsort(idx, kind="stable")
+        idx, cyc = idx[order], cycle_id[order].astype(np.int64)
+        first = np.r_[True, idx[1:] != idx[:-1]]
+        last = np.r_[idx[1:] != idx[:-1], True]
+
+        # Delta to the previous packet of the same node (stored or in batch)
+        prev = np.empty_like(cyc)
+        prev[1:] = cyc[:-1]
+        prev[first] = self.cycle[idx[first]]
+        has_prev = prev >= 0
+        delta = cyc - prev
+        self._account(idx[has_prev], delta[has_prev])
+
+        np.add.at(self.packets, idx, 1)
+        nodes = idx[last]
+        self.cycle[nodes] = cyc[last]
+        self.vrms[nodes] = vrms[order][last]
+        self.irms[nodes] = irms[order][last]
+        self.active[nodes] = True
+
+    def update_one(self, node_id, cycle_id, vrms, irms):
+        """Scalar path for the per-datagram receiver"""
+        k = node_id - 1
+        if not 0 <= k < self.max_nodes:
+            self.unknown += 1
+            return
+        prev = self.cycle[k]
+        if prev >= 0:
+            d = cycle_id - prev
+            if d < 0:
+                self.resets[k] += 1
+            elif d == 0:
+                self.stalls[k] += 1
+            else:
+                self.gap_sum[k] += d
+                self.gap_count[k] += 1
+                if d < self.gap_min[k]:
+                    self.gap_min[k] = d
+                if d > self.gap_max[k]:
+                    self.gap_max[k] = d
+                if d > LOSS_FACTOR * self.expected:
+                    self.lost[k] += round(d / self.expected) - 1
+        self.packets[k] += 1
+        self.cycle[k] = cycle_id
+        self.vrms[k] = vrms
+        self.irms[k] = irms
+        self.active[k] = True
+
+    def _account(self, idx, delta):
+        np.add.at(self.resets, idx[delta < 0], 1)
+        np.add.at(self.stalls, idx[delta == 0], 1)
+        idx, delta = idx[delta > 0], delta[delta > 0]
+        np.add.at(self.gap_sum, idx, delta)
+        np.add.at(self.gap_count, idx, 1)
+        np.minimum.at(self.gap_min, idx, delta)
+        np.maximum.at(self.gap_max, idx, delta)
+        big = delta > LOSS_FACTOR * self.expected
+        np.add.at(self.lost, idx[big], np.rint(delta[big] / self.expected).astype(np.int64) - 1)
+
+    # ---------- reporting ----------
+    def node_lines(self):
+        lines = []
+        for k in np.flatnonzero(self.active):
+            cnt = self.gap_count[k]
+            gaps = (f"gap {self.gap_min[k]}/{self.gap_sum[k] / cnt:.1f}/{self.gap_max[k]}"
+                    if cnt else "gap -")
+            lines.append(f"  Node {k + 1}: pkts {self.packets[k]} cycle {self.cycle[k]} "
+                         f"V {self.vrms[k]:.2f} I {self.irms[k]:.2f} {gaps} "
+                         f"lost {self.lost[k]} stalls {self.stalls[k]} resets {self.resets[k]} "
+                         f"faults {self.faults[k]}")
+        return lines
+
+    def fleet_line(self):
+        act = np.flatnonzero(self.active)
+        if not len(act):
+            return "  no nodes heard yet"
+        cnt = self.gap_count[act]
+        mean = self.gap_sum[act].sum() / max(cnt.sum(), 1)
+        line = (f"  {len(act)} nodes | gap mean {mean:.1f} max {self.gap_max[act].max()} | "
+                f"lost {self.lost[act].sum()} stalls {self.stalls[act].sum()} "
+                f"resets {self.resets[act].sum()} faults {self.faults.sum()}")
+        worst = act[np.argsort(self.lost[act])[::-1][:3]]
+        worst = worst[self.lost[worst] > 0]
+        if len(worst):
+            line += " | worst " + " ".join(f"N{k + 1}:{self.lost[k]}" for k in worst)
+        return line
+
+# ==================== RECEIVER ====================
+class PiReceiver:
+    def __init__(self, table=None, backend="auto", host="", data_port=DATA_PORT,
+                 cmd_port=CMD_PORT, verbose=True):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown receive backend: {backend}")
+        if backend == "auto":
+            backend = "recvmmsg" if _recvmmsg else "asyncio"
+        if backend == "recvmmsg" and not _recvmmsg:
+            raise OSError("recvmmsg is not available on this platform")
+
+        self.table = table or NodeTable()
+        self.backend = backend
+        self.verbose = verbose
+
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
+        self.sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+        self.sock.bind((host, data_port))
+        self.sock.setblocking(False)
+
+        self.fault_sock = None
+        if cmd_port is not None:
+            self.fault_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.fault_sock.bind((host, cmd_port))
+            self.fault_sock.setblocking(False)
+
+        self.datagrams = 0
+        self.bad_size = 0
+        self.kernel_drops = 0
+        self.calls = 0
+        self.fault_log = []
+
+        if backend == "recvmmsg":
+            self._build_tables()
+
+    def _build_tables(self):
+        self._buf = np.zeros(BATCH, dtype=SLOT_DTYPE)
+        self._ctrl = np.zeros((BATCH, CMSG_SPACE), dtype=np.uint8)
+        self._iov = (iovec * BATCH)()
+        self._msgs = (mmsghdr * BATCH)()
+        base = self._buf.ctypes.data
+        ctrl = self._ctrl.ctypes.data
+        for k in range(BATCH):
+            self._iov[k].iov_base = base + k * SLOT
+            self._iov[k].iov_len = SLOT
+            hdr = self._msgs[k].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self._iov[k])
+            hdr.msg_iovlen = 1
+            hdr.msg_control = ctrl + k * CMSG_SPACE
+
+        # msg_controllen must be re-armed before every call; msg_len is read back
+        words = np.frombuffer(self._msgs, dtype=np.uintp).reshape(BATCH, ctypes.sizeof(mmsghdr) // WORD)
+        self._controllen = words[:, (mmsghdr.msg_hdr.offset + msghdr.msg_controllen.offset) // WORD]
+        self._msg_len = np.frombuffer(self._msgs, dtype=np.uint32).reshape(BATCH, -1)[
+            :, mmsghdr.msg_len.offset // 4]
+
+    # ---------- data path ----------
+    def _drain_mmsg(self):
+        fd = self.sock.fileno()
+        while True:
+            self._controllen[:] = CMSG_SPACE
+            self.calls += 1
+            n = _recvmmsg(fd, self._msgs, BATCH, socket.MSG_DONTWAIT, None)
+            if n < 0:
+                err = ctypes.get_errno()
+                if err == errno.EINTR:
+                    continue
+                return
+            if n == 0:
+                return
+            lengths = self._msg_len[:n]
+            good = lengths == PACKET_DTYPE.itemsize
+            pkts = self._buf["pkt"][:n][good]
+            self.datagrams += n
+            self.bad_size += int(n - good.sum())
+            self.table.update(pkts["node_id"], pkts["cycle_id"], pkts["vrms"], pkts["irms"])
+            self._read_overflow(self._ctrl[n - 1], int(self._msgs[n - 1].msg_hdr.msg_controllen))
+            if n < BATCH:
+                return
+
+    def _read_overflow(self, ctrl, length):
+        # One cmsghdr carrying the u32 drop counter (native layout)
+        if length >= CMSG_DATA_OFFSET + 4:
+            level, kind = struct.unpack_from("=ii", ctrl, CMSG_LEVEL_OFFSET)
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                self.kernel_drops = struct.unpack_from("=I", ctrl, CMSG_DATA_OFFSET)[0]
+
+    def _drain_struct(self):
+        unpack = ESP_PACKET.unpack
+        update = self.table.update_one
+        size = ESP_PACKET.size
+        while True:
+            self.calls += 1
+            try:
+                data, anc, _, _ = self.sock.recvmsg(SLOT, socket.CMSG_SPACE(4))
+            except BlockingIOError:
+                return
+            self.datagrams += 1
+            if len(data) != size:
+                self.bad_size += 1
+            else:
+                update(*unpack(data))
+            for level, kind, value in anc:
+                if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                    self.kernel_drops = struct.unpack("<I", value[:4])[0]
+
+    def _drain_faults(self):
+        while True:
+            try:
+                data = self.fault_sock.recv(256)
+            except BlockingIOError:
+                return
+            text = data.decode(errors="ignore").strip()
+            fields = text.split("|")
+            # Same acceptance as sscanf("FAULT|%d|%15[^|]")
+            if len(fields) >= 3 and fields[0] == "FAULT" and fields[1].lstrip("-").isdigit():
+                node = int(fields[1])
+                if 1 <= node <= self.table.max_nodes:
+                    self.table.faults[node - 1] += 1
+                self.fault_log.append(text)
+                if self.verbose:
+                    print(f"[FAULT] Node {node} reported {fields[2][:15]}")
+
+    # ---------- loop ----------
+    def attach(self, loop):
+        drain = self._drain_mmsg if self.backend == "recvmmsg" else self._drain_struct
+        loop.add_reader(self.sock.fileno(), drain)
+        if self.fault_sock:
+            loop.add_reader(self.fault_sock.fileno(), self._drain_faults)
+
+    def detach(self, loop):
+        loop.remove_reader(self.sock.fileno())
+        if self.fault_sock:
+            loop.remove_reader(self.fault_sock.fileno())
+
+    async def run(self, seconds=None, interval=REPORT_INTERVAL):
+        loop = asyncio.get_running_loop()
+        self.attach(loop)
+        t_start = t_last = time.perf_counter()
+        last = (0, 0)
+        try:
+            while seconds is None or time.perf_counter() - t_start < seconds:
+                await asyncio.sleep(interval if seconds is None
+                                    else min(interval, max(seconds - (time.perf_counter() - t_start), 0)))
+                now = time.perf_counter()
+                if self.verbose and now - t_last >= interval:
+                    last = self.report(now - t_last, last)
+                    t_last = now
+        finally:
+            self.detach(loop)
+
+    def report(self, dt, last):
+        pkts = int(self.table.packets.sum())
+        print(f"[RX] {(pkts - last[0]) / dt:8.0f} pkt/s ({self.backend}, "
+              f"{(pkts - last[0]) / max(self.calls - last[1], 1):.1f} pkt/call) | "
+              f"kernel drops {self.kernel_drops} bad size {self.bad_size} "
+              f"unknown {self.table.unknown}")
+        lines = (self.table.node_lines() if self.table.active.sum() <= DETAIL_NODES
+                 else [self.table.fleet_line()])
+        for line in lines:
+            print(line)
+        return pkts, self.calls
+
+    def close(self):
+        self.sock.close()
+        if self.fault_sock:
+            self.fault_sock.close()
+
+# ==================== BENCHMARK ====================
+def _blast(port, nodes, seconds, ready):
+    # Sender process: every node sends packets with cycle += 6
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender = BulkSender(sock, [("127.0.0.1", port)] * nodes)
+    pkts = np.zeros(nodes, dtype=PACKET_DTYPE)
+    pkts["node_id"] = np.arange(1, nodes + 1)
+    pkts["vrms"], pkts["irms"] = 120.0, 8.0
+    addrs = pkts.ctypes.data + np.arange(nodes, dtype=np.int64) * PACKET_DTYPE.itemsize
+    lengths = np.full(nodes, PACKET_DTYPE.itemsize, dtype=np.int64)
+    ready.wait()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sender.send_addresses(None, addrs, lengths)
+        pkts["cycle_id"] += EXPECTED_DELTA
+    sock.close()
+
+def benchmark(nodes=100, seconds=3.0, port=15005):
+    backends = ["asyncio"] + (["recvmmsg"] if _recvmmsg else [])
+    print(f"{'backend':9s} {'nodes':>6s} {'rx pkt/s':>10s} {'pkt/call':>9s} "
+          f"{'kernel drops':>13s} {'lost (gaps)':>12s}")
+    for backend in backends:
+        rx = PiReceiver(NodeTable(max(nodes, 1)), backend, "127.0.0.1", port, None, verbose=False)
+        ctx = mp.get_context("spawn")
+        ready = ctx.Event()
+        proc = ctx.Process(target=_blast, args=(port, nodes, seconds, ready))
+        proc.start()
+
+        async def go():
+            ready.set()
+            await rx.run(seconds + 0.5)
+        t = time.perf_counter()
+        asyncio.run(go())
+        dt = time.perf_counter() - t
+        proc.join()
+        got = int(rx.table.packets.sum())
+        print(f"{backend:9s} {nodes:6d} {got / dt:10.0f} {got / max(rx.calls, 1):9.1f} "
+              f"{rx.kernel_drops:13d} {int(rx.table.lost.sum()):12d}")
+        rx.close()
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == "bench":
+        nodes = int(args[1]) if len(args) > 1 else 100
+        seconds = float(args[2]) if len(args) > 2 else 3.0
+        benchmark(nodes, seconds)
+        return
+
+    backend = args[0] if args else "auto"
+    seconds = float(args[1]) if len(args) > 1 else None
+    rx = PiReceiver(backend=backend)
+    print(f"[RX] Listening on :{DATA_PORT} (data, {rx.backend}) and :{CMD_PORT} (faults)")
+    try:
+        asyncio.run(rx.run(seconds))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n[RX] {int(rx.table.packets.sum())} packets, kernel drops {rx.kernel_drops}, "
+              f"bad size {rx.bad_size}, faults {len(rx.fault_log)}")
+        rx.close()
+
+if __name__ == "__main__":
+    main()
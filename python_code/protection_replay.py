@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# ============================================================
+# ESP32 PROTECTION REPLAY
+# What a node's overcurrent protection does over a whole scenario
+# Author: Noridel Herron
+# ============================================================
+#
+# Same rules as checkFaults() / processCommand() in esp32_code:
+#   - a cycle with Irms > 15 A counts toward the trip, one below
+#     12 A resets the counter (12..15 A leaves it unchanged)
+#   - the 3rd counted cycle trips: FAULT|...|OC_TRIP is sent and
+#     the node stops transmitting (fault latched)
+#   - while latched the counter is frozen; an ACK clears the latch
+#     only if the latest Irms is below 12 A
+# ACK timing is an input: the Pi (or operator) starts sending ACK
+# ack_delay cycles after the trip and repeats it until the node
+# accepts it. ack_delay=None means nobody acknowledges.
+#
+# Per-cycle RMS comes from validation.calculate_reference_rms (one
+# reshape over the scenario). The counter is rebuilt from two
+# cumulative sums (over-limit cycles, last reset cycle), so finding
+# every trip and clear is a few searchsorted calls per trip instead
+# of a Python loop over cycles.
+#
+# Cycle ids follow the firmware: the first complete cycle is 1.
+# A suppressed window runs from the trip cycle up to the cycle before
+# the one whose Irms let the ACK through; that cycle is the latest
+# value when sending resumes, so it is the first one reported again.
+#   python3 protection_replay.py [scenario.csv] [ack_delay | never]
+# ============================================================
+
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from validation import WINDOW, load_baseline_csv, calculate_reference_rms
+from esp32_emulator import OC_LIMIT, OC_CLEAR, OC_PERSIST
+
+# ==================== FILE PATHS ====================
+SCENARIO_CSV = "../csv_output/oc.csv"
+
+ACK_DELAY = 0        # cycles from trip to the first ACK
+CYCLE_HZ  = 60.0     # for reporting windows in seconds
+
+# clear_cycle: cycle whose Irms let the ACK through (None = still latched)
+Trip = namedtuple("Trip", ["cycle", "vrms", "irms", "clear_cycle"])
+
+# ==================== STATE MACHINE ====================
+def oc_counter(irms):
+    """oc_counter after each cycle if the node never latched"""
+    over = irms > OC_LIMIT
+    idx = np.arange(len(irms))
+    counted = np.cumsum(over)
+    last_reset = np.maximum.accumulate(np.where(irms < OC_CLEAR, idx, -1))
+    at_reset = np.where(last_reset >= 0, counted[np.maximum(last_reset, 0)], 0)
+    return counted - at_reset
+
+def replay(irms, vrms=None, ack_delay=ACK_DELAY):
+    """Trips and latched-cycle mask for one node's per-cycle RMS"""
+    irms = np.asarray(irms, dtype=np.float64)
+    vrms = np.zeros_like(irms) if vrms is None else np.asarray(vrms, dtype=np.float64)
+    n = len(irms)
+
+    # A clear (ACK accepted) always happens on a reset cycle, so the
+    # counter after it equals the never-latched counter: trips are the
+    # never-latched trip candidates that fall outside latched windows.
+    candidates = np.flatnonzero((irms > OC_LIMIT) & (oc_counter(irms) >= OC_PERSIST))
+    below = np.flatnonzero(irms < OC_CLEAR)
+
+    trips = []
+    latched = np.zeros(n, dtype=bool)
+    start = 0
+    while True:
+        k = np.searchsorted(candidates, start)
+        if k == len(candidates):
+            break
+        t = int(candidates[k])
+        clear = None
+        if ack_delay is not None:
+            j = np.searchsorted(below, t + max(ack_delay, 1))
+            if j < len(below):
+                clear = int(below[j])
+        latched[t:n if clear is None else clear] = True
+        trips.append(Trip(t + 1, vrms[t], irms[t], None if clear is None else clear + 1))
+        if clear is None:
+            break
+        start = clear + 1
+    return trips, latched
+
+def suppressed_windows(latched):
+    """(first, last) cycle ids of each run of latched cycles"""
+    edges = np.diff(np.r_[0, latched.astype(np.int8), 0])
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return np.column_stack((starts + 1, ends))
+
+def replay_scenario(path, ack_delay=ACK_DELAY):
+    """Per-cycle RMS + replay for a Raw_V/Raw_I scenario; None if missing"""
+    v, i = load_baseline_csv(path)
+    if v is None:
+        return None
+    vrms, irms = calculate_reference_rms(v, i, WINDOW)
+    trips, latched = replay(irms, vrms, ack_delay)
+    return {
+        'cycles': len(irms),
+        'vrms': vrms,
+        'irms': irms,
+        'trips': trips,
+        'latched': latched,
+        'windows': suppressed_windows(latched),
+    }
+
+# ==================== MAIN ====================
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else SCENARIO_CSV
+    ack_delay = ACK_DELAY
+    if len(sys.argv) > 2:
+        ack_delay = None if sys.argv[2] == "never" else int(sys.argv[2])
+
+    t0 = time.perf_counter()
+    result = replay_scenario(path, ack_delay)
+    if result is None:
+        return
+    elapsed = time.perf_counter() - t0
+
+    ack_text = "never" if ack_delay is None else f"{ack_delay} cycles after trip"
+    print(f"Replayed {result['cycles']} cycles of {path} in {elapsed * 1000:.1f} ms (ACK: {ack_text})")
+    print(f"Irms max {result['irms'].max():.2f} A, cycles above {OC_LIMIT:g} A: "
+          f"{int((result['irms'] > OC_LIMIT).sum())}")
+
+    print(f"\nTrips: {len(result['trips'])}")
+    for t in result['trips']:
+        cleared = "still latched" if t.clear_cycle is None else f"cleared at cycle {t.clear_cycle}"
+        print(f"  cycle {t.cycle:6d}: FAULT OC_TRIP Vrms {t.vrms:6.2f} V, Irms {t.irms:5.2f} A, {cleared}")
+
+    windows = result['windows']
+    suppressed = int(result['latched'].sum())
+    print(f"\nSuppressed transmission: {suppressed} cycles ({suppressed / CYCLE_HZ:.2f} s) in {len(windows)} windows")
+    for first, last in windows:
+        print(f"  cycles {first:6d} - {last:6d} ({(last - first + 1) / CYCLE_HZ:6.2f} s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# ============================================================
+# BINARY SAMPLE STORE
+# Compact .npy companion files for the Raw_V/Raw_I CSVs
+# Author: Noridel Herron
+# ============================================================
+#
+# Layout: standard .npy, dtype uint16 (little-endian), shape (N, 2),
+# columns [Raw_V, Raw_I], stored in tenths of an ADC count.
+# The CSVs carry one decimal (e.g. 2047.7), and 4095.0 -> 40950 fits
+# in uint16, so the conversion is lossless at 4 bytes per sample
+# (vs ~14 bytes per CSV line).
+#
+# A binary file sits next to its CSV with the same stem
+# (base.csv -> base.npy). Loaders use it when it is at least as new
+# as the CSV and memory-map it instead of parsing text.
+# ============================================================
+
+import csv
+import glob
+import os
+import sys
+
+import numpy as np
+
+STORE_DTYPE = np.dtype("<u2")
+STORE_SCALE = 10.0               # stored value = ADC count * 10
+STORE_EXT = ".npy"
+
+CSV_DIR = "../csv_output"
+
+# ==================== PATHS ====================
+def binary_path(csv_path):
+    return os.path.splitext(csv_path)[0] + STORE_EXT
+
+def find_binary(csv_path):
+    """Return the .npy companion of csv_path if it is usable, else None"""
+    path = binary_path(csv_path)
+    if not os.path.exists(path):
+        return None
+    if os.path.exists(csv_path) and os.path.getmtime(path) < os.path.getmtime(csv_path):
+        return None  # stale: CSV was regenerated after the binary
+    return path
+
+# ==================== ENCODE / WRITE ====================
+def encode(rows):
+    """(N, 2) ADC counts -> (N, 2) uint16 tenths"""
+    arr = np.asarray(rows, dtype=float)
+    return np.rint(arr * STORE_SCALE).astype(STORE_DTYPE)
+
+def save_samples(path, rows):
+    np.save(path, encode(rows))
+
+def open_writer(path, num_samples):
+    """Preallocated, memory-mapped .npy for block-by-block writes"""
+    return np.lib.format.open_memmap(path, mode="w+", dtype=STORE_DTYPE,
+                                     shape=(num_samples, 2))
+
+# ==================== READ ====================
+def load_samples(path):
+    """Memory-map a store file: (N, 2) uint16 tenths, read-only"""
+    return np.load(path, mmap_mode="r")
+
+def load_adc(path, rows=slice(None)):
+    """Float ADC counts for a slice of rows (only that slice is converted)"""
+    return load_samples(path)[rows] / STORE_SCALE
+
+def load_adc_columns(path):
+    """(Raw_V, Raw_I) float arrays from a store file, one column at a time"""
+    tenths = load_samples(path)
+    columns = []
+    for k in range(tenths.shape[1]):
+        col = tenths[:, k].astype(np.float64)
+        col /= STORE_SCALE
+        columns.append(col)
+    return tuple(columns)
+
+# ==================== CONVERT ====================
+def convert_csv(csv_path):
+    """Write the .npy companion for an existing Raw_V/Raw_I CSV"""
+    with open(csv_path, newline="") as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return None
+        skip = 1 if first[0].lower().startswith("raw") else 0
+
+    rows = np.loadtxt(csv_path, delimiter=",", skiprows=skip, usecols=(0, 1), ndmin=2)
+    path = binary_path(csv_path)
+    save_samples(path, rows)
+    return path, len(rows)
+
+# ==================== ENTRY POINT ====================
+# Usage: python3 sample_store.py [file.csv ...]   (default: all of CSV_DIR)
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(CSV_DIR, "*.csv")))
+
+    for csv_path in paths:
+        result = convert_csv(csv_path)
+        if result is None:
+            print(f"[SKIP] {csv_path}: empty")
+            continue
+        path, count = result
+        csv_size = os.path.getsize(csv_path)
+        bin_size = os.path.getsize(path)
+        print(f"[OK] {path}: {count} samples, "
+              f"{bin_size} bytes ({csv_size / bin_size:.1f}x smaller than CSV)")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# ============================================================
+# SHARED SCENARIO BUFFERS
+# Pre-encoded scenarios in multiprocessing.shared_memory
+# Author: Noridel Herron
+# ============================================================
+#
+# The parent encodes every scenario once and copies the datagrams
+# into two shared blocks:
+#   data    -> all datagram bytes back to back
+#   offsets -> int64 byte offsets into `data` (one table, every
+#              scenario shifted to its position in the block)
+# Workers attach by name and hand stream_core the same lookup tables
+# it builds for in-process DatagramCaches, as NumPy views over the
+# shared pages: no CSV parsing, encoding or copying per worker.
+#
+# SharedArrays is the generic piece: a few named NumPy arrays laid out
+# in one block, used for the per-node state and the worker control /
+# statistics words (see multi_streamer.py).
+# ============================================================
+
+import ctypes
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ALIGN = 64
+
+def _address(shm):
+    # Base address of a mapped block (the temporary ctypes view is
+    # released at once, so the block can still be closed later)
+    return ctypes.addressof(ctypes.c_char.from_buffer(shm.buf))
+
+# ==================== NAMED ARRAYS ====================
+class SharedArrays:
+    """Named NumPy arrays in one shared block.
+
+    fields: {name: (dtype, shape)}; spec() is a small picklable dict
+    that attach() turns back into the same views in another process.
+    """
+
+    def __init__(self, shm, fields, owner):
+        self.shm = shm
+        self.fields = fields
+        self.owner = owner
+        self.arrays = {}
+        pos = 0
+        for name, (dtype, shape) in fields.items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape))
+            self.arrays[name] = np.ndarray(shape, dtype, buffer=shm.buf, offset=pos)
+            pos += -(-count * dtype.itemsize // ALIGN) * ALIGN
+
+    @staticmethod
+    def _size(fields):
+        return sum(-(-int(np.prod(shape)) * np.dtype(dtype).itemsize // ALIGN) * ALIGN
+                   for dtype, shape in fields.values()) or ALIGN
+
+    @classmethod
+    def create(cls, fields):
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(fields))
+        block = cls(shm, fields, owner=True)
+        for arr in block.arrays.values():
+            arr[...] = 0
+        return block
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(shared_memory.SharedMemory(name=spec["name"]), spec["fields"], owner=False)
+
+    def spec(self):
+        return {"name": self.shm.name, "fields": self.fields}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# ==================== SCENARIOS ====================
+class SharedScenarios:
+    """Scenario datagram tables shared by every streaming process"""
+
+    def __init__(self, data, tables, names, batch, owner):
+        self.data = data
+        self.tables_block = tables
+        self.names = list(names)
+        self.batch = batch
+        self.owner = owner
+
+    @classmethod
+    def create(cls, scenarios):
+        """Copy {name: DatagramCache} into shared memory (parent side)"""
+        names = list(scenarios)
+        caches = [scenarios[name] for name in names]
+        total = sum(len(c.buf) for c in caches)
+        entries = sum(c.count + 1 for c in caches)
+
+        data = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        tables = SharedArrays.create({
+            "offsets": (np.int64, (entries,)),
+            "start":   (np.int64, (len(caches),)),
+            "length":  (np.int64, (len(caches),)),
+        })
+
+        pos = row = 0
+        for s, cache in enumerate(caches):
+            size = len(cache.buf)
+            data.buf[pos:pos + size] = cache.buf
+            tables["offsets"][row:row + cache.count + 1] = np.asarray(cache.offsets) + pos
+            tables["start"][s] = row
+            tables["length"][s] = len(cache)
+            pos += size
+            row += cache.count + 1
+
+        batch = caches[0].batch if caches else 1
+        return cls(data, tables, names, batch, owner=True)
+
+    @classmethod
+    def attach(cls, spec):
+        data = shared_memory.SharedMemory(name=spec["data"])
+        tables = SharedArrays.attach(spec["tables"])
+        return cls(data, tables, spec["names"], spec["batch"], owner=False)
+
+    def spec(self):
+        return {"data": self.data.name, "tables": self.tables_block.spec(),
+                "names": self.names, "batch": self.batch}
+
+    def tables(self):
+        """(base, length, start, offsets) as used by stream_core.StreamerCore"""
+        base = np.full(len(self.names), _address(self.data), dtype=np.int64)
+        t = self.tables_block
+        return base, t["length"], t["start"], t["offsets"]
+
+    def nbytes(self):
+        return self.data.size + self.tables_block.shm.size
+
+    def close(self):
+        self.tables_block.close()
+        self.data.close()
+        if self.owner:
+            self.data.unlink()
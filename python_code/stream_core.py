@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# ============================================================
+# STREAMER CORE (asyncio)
+# Sample clock, sends, commands and status as independent tasks
+# Author: Noridel Herron
+# ============================================================
+#
+# One event loop runs:
+#   clock   -> owns the sample-clock thread, which paces ticks and
+#              sends every due datagram on its own, so nothing else
+#              the loop runs can make a tick late
+#   status  -> periodic [STATUS] lines
+#   printer -> writes log lines from a queue in a worker thread,
+#              so a slow terminal never blocks the clock
+#   telemetry -> per-node rates, JSON lines, local endpoint
+#              (telemetry.py; configure via core.telemetry.configure)
+# Node commands (RESET_CYCLE / SET_MODE / SET_SEND) go out through
+# their own datagram transport as separate tasks. A reset holds every
+# send from RESET_CYCLE until the nodes are back in UDP mode, then the
+# clock restarts all nodes from their phase on a freshly anchored grid.
+#
+# Nodes come from a node_registry.NodeRegistry (or a plain {id: ip}
+# dict). Per-node state lives in the registry's arrays and each tick
+# is a handful of vector ops: index -> datagram address/length via
+# one concatenated offset table, then one BulkSender call.
+#
+# The core needs no TTY; udp_inputStreamer.py adds the keyboard.
+# Library use:
+#
+#   core = StreamerCore({"base": DatagramCache.from_samples(s)},
+#                       NodeRegistry.load("../config/nodes_sim.json"))
+#   asyncio.run(core.run())
+# ============================================================
+
+import asyncio
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from pacing import PacingScheduler
+from bulk_send import BulkSender
+from node_registry import NodeRegistry
+from telemetry import Telemetry
+
+CMD_PORT  = 6000
+DATA_PORT = 6001
+
+SAMPLES_PER_CYCLE = 60
+SAMPLE_RATE       = 3600.0
+STATUS_INTERVAL   = 10.0     # seconds between [STATUS] lines
+DETAIL_NODES      = 16       # list nodes one by one up to this many
+HOLD_POLL         = 0.005    # seconds between checks while sends are held
+CLOCK_WATCH       = 0.5      # seconds between clock-thread liveness checks
+
+def scenario_tables(caches):
+    """(base, length, start, offsets) lookup arrays for a list of DatagramCaches"""
+    base = np.array([c.address for c in caches], dtype=np.int64)
+    length = np.array([len(c) for c in caches], dtype=np.int64)
+    offsets = [np.asarray(c.offsets) for c in caches]
+    start = np.cumsum([0] + [len(o) for o in offsets[:-1]]).astype(np.int64)
+    return base, length, start, np.concatenate(offsets)
+
+class StreamerCore:
+    def __init__(self, scenarios, nodes, sample_rate=SAMPLE_RATE, batch=1,
+                 backend="auto", policy="catchup", status_interval=STATUS_INTERVAL,
+                 data_port=DATA_PORT, cmd_port=CMD_PORT, default_scenario="base",
+                 out=sys.stdout):
+        # scenarios: name -> DatagramCache (same batch size for all), or a
+        #            shared_scenarios.SharedScenarios attached in this process
+        # nodes:     NodeRegistry, or {id: ip} using data_port / cmd_port
+        if not isinstance(nodes, NodeRegistry):
+            nodes = NodeRegistry.from_nodes(nodes, default_scenario, data_port, cmd_port)
+        self.nodes = nodes
+        self.batch = batch
+        self.backend = backend
+        self.status_interval = status_interval
+        self.out = out
+
+        # Scenario tables: datagram k of scenario s is
+        # [base[s] + offsets[start[s] + k], base[s] + offsets[start[s] + k + 1])
+        if isinstance(scenarios, dict):
+            self.names = list(scenarios)
+            tables = scenario_tables([scenarios[name] for name in self.names])
+        else:
+            self.names = list(scenarios.names)
+            tables = scenarios.tables()
+        self._base, self._length, self._start, self._offsets = tables
+        self.scenario_index = {name: s for s, name in enumerate(self.names)}
+
+        if default_scenario not in self.scenario_index:
+            default_scenario = self.names[0]
+        for slot, name in enumerate(nodes.scenario_names):
+            if name not in self.scenario_index:
+                print(f"[WARN] Node {nodes.ids[slot]}: no scenario '{name}', using {default_scenario}",
+                      file=out)
+                name = default_scenario
+            nodes.scenario[slot] = self.scenario_index[name]
+        nodes.pending[:] = nodes.scenario
+        self._restart(slice(None))
+
+        self.pacer = PacingScheduler(sample_rate, policy)
+        self.clock_t0 = None     # shared perf_counter_ns anchor, None = start now
+        self._holds = 0          # resets in progress; the clock sends at 0
+        self.sender = None
+        # Per-node packets / bytes / errors, filled by the sender
+        self.slot_counters = tuple(np.zeros(len(nodes), dtype=np.int64) for _ in range(3))
+        self.telemetry = Telemetry(self)
+        self.loop = None
+        self._stop = None
+        self._log_queue = None
+        self._cmd_transport = None
+        self._clocking = False
+
+    # ==================== LOGGING ====================
+    def log(self, msg):
+        """Queue a line for the printer task (never blocks the loop)"""
+        if self._log_queue is None:
+            print(msg, file=self.out)
+        else:
+            self._log_queue.put_nowait(msg)
+
+    async def _printer(self):
+        # None is the shutdown marker; everything queued before it is written
+        done = False
+        while not done:
+            lines = [await self._log_queue.get()]
+            while not self._log_queue.empty():
+                lines.append(self._log_queue.get_nowait())
+            if None in lines:
+                lines = lines[:lines.index(None)]
+                done = True
+            if lines:
+                text = "\n".join(lines) + "\n"
+                await self.loop.run_in_executor(None, self._write, text)
+
+    def _write(self, text):
+        self.out.write(text)
+        self.out.flush()
+
+    # ==================== CONTROL ====================
+    # Scenario switches and rewinds are requests: pending[] / restart[]
+    # are written here and applied by the clock between ticks, so a
+    # tick never sees a scenario without its matching idx (the clock
+    # may run in another process, see multi_streamer).
+    def set_scenario(self, name, node=None):
+        """Switch one node (or all when node is None) and restart its playback"""
+        if name not in self.scenario_index:
+            return False
+        slots = self.nodes.select(node)
+        self.nodes.pending[slots] = self.scenario_index[name]
+        self.nodes.restart[slots] = 1
+        return True
+
+    def rewind(self):
+        self.nodes.restart[:] = 1
+
+    def _restart(self, slots):
+        # Back to each node's phase offset within its scenario
+        reg = self.nodes
+        reg.idx[slots] = reg.phase[slots] % self._length[reg.scenario[slots]]
+
+    def node_cycle(self, slots=slice(None)):
+        return self.nodes.idx[slots] // SAMPLES_PER_CYCLE
+
+    def scenario_of(self, node):
+        return self.names[self.nodes.pending[self.nodes.slot_of[node]]]
+
+    async def send_cmd(self, ip, msg, port=CMD_PORT, quiet=False):
+        self._cmd_transport.sendto(msg.encode(), (ip, port))
+        if not quiet:
+            self.log(f"[CMD -> {ip}] {msg}")
+        await asyncio.sleep(self.nodes.cmd_gap)
+
+    async def _broadcast(self, fmt):
+        # One command per node; large fleets get a single summary line
+        targets = self.nodes.cmd_destinations()
+        quiet = len(targets) > DETAIL_NODES
+        for nid, ip, port in targets:
+            await self.send_cmd(ip, fmt.format(nid=nid), port, quiet)
+        if quiet:
+            self.log(f"[CMD -> {len(targets)} nodes] {fmt.format(nid='<id>')}")
+
+    async def reset_nodes(self):
+        self.log("\n===== RESETTING ALL ESP32 NODES =====")
+        self.hold_sends()
+        try:
+            await self._broadcast("RESET_CYCLE|0|{nid}")
+
+            await asyncio.sleep(1)
+
+            await self._broadcast("SET_MODE|MODE_UDP|{nid}")
+            await self._broadcast("SET_SEND|ON|{nid}")
+
+            await asyncio.sleep(0.5)
+            self.rewind()
+            self.reset_stats()
+        finally:
+            self.resume_sends()
+        self.log("[OK] All nodes reset\n")
+
+    def hold_sends(self):
+        """Stop the clock sending until the matching resume_sends()"""
+        self._holds += 1
+
+    def resume_sends(self):
+        self._holds -= 1
+
+    def sending(self):
+        return self._holds == 0
+
+    def resume_anchor(self):
+        # Grid the clock re-anchors on after a hold (None = now)
+        return None
+
+    def reset_stats(self):
+        self.sender.reset_stats()
+
+    def request_reset(self):
+        return self.loop.create_task(self.reset_nodes())
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    # ==================== STATUS ====================
+    def status_line(self):
+        reg = self.nodes
+        cycles = self.node_cycle()
+        if len(reg) <= DETAIL_NODES:
+            return " | ".join(f"N{nid}:{self.names[s]}@{c}"
+                              for nid, s, c in zip(reg.ids, reg.scenario, cycles))
+        counts = np.bincount(reg.scenario, minlength=len(self.names))
+        mix = " ".join(f"{name}:{n}" for name, n in zip(self.names, counts) if n)
+        return f"{len(reg)} nodes | {mix} | cycle {cycles.min()}-{cycles.max()}"
+
+    def status_lines(self):
+        reg = self.nodes
+        if len(reg) <= DETAIL_NODES:
+            lines = [f"  Node {nid}: {self.names[s]:6s} cycle {c}"
+                     for nid, s, c in zip(reg.ids, reg.scenario, self.node_cycle())]
+        else:
+            lines = [f"  Nodes : {self.status_line()}"]
+        lines.append(f"  Clock : {self.clock_summary()}")
+        lines.append(f"  Send  : {self.send_summary()}")
+        lines.extend(self.telemetry.report_lines())
+        return lines
+
+    def clock_summary(self):
+        return self.pacer.summary()
+
+    def send_summary(self):
+        return self.sender.summary()
+
+    def clock_stats(self):
+        return self.pacer.stats()
+
+    def counters(self):
+        """Cumulative per-node (packets, bytes, errors) arrays"""
+        return self.slot_counters
+
+    def lateness_hist(self):
+        return self.pacer.hist
+
+    async def _status(self):
+        while True:
+            await asyncio.sleep(self.status_interval)
+            self.log(f"[STATUS] {self.status_line()}")
+            self.log(f"[CLOCK]  {self.clock_summary()}")
+            self.log(f"[SEND]   {self.send_summary()}")
+
+    # ==================== SAMPLE CLOCK ====================
+    def tick(self, ticks=1):
+        """Advance every node by `ticks` samples, sending what is due"""
+        reg = self.nodes
+        batch = self.batch
+        for _ in range(ticks):
+            idx = reg.idx
+            if batch == 1:
+                slots = None
+                scen = reg.scenario
+                k = idx
+            else:
+                # Batched datagrams go out on the first tick of their window
+                slots = np.flatnonzero(idx % batch == 0)
+                scen = reg.scenario[slots]
+                k = idx[slots] // batch
+
+            if slots is None or len(slots):
+                pos = self._start[scen] + k
+                first = self._offsets[pos]
+                addrs = self._base[scen] + first
+                lengths = self._offsets[pos + 1] - first
+                self.sender.send_addresses(slots, addrs, lengths)
+
+            idx += 1
+            idx[idx >= self._length[reg.scenario]] = 0
+
+    def apply_restarts(self):
+        # Flag first, then scenario: a request written after the copy
+        # keeps its flag and is picked up on the next tick
+        reg = self.nodes
+        if reg.restart.any():
+            slots = np.flatnonzero(reg.restart)
+            reg.restart[slots] = 0
+            reg.scenario[slots] = reg.pending[slots]
+            self._restart(slots)
+
+    def _clock_loop(self):
+        # Runs in the sample-clock thread until _clocking is cleared
+        pacer = self.pacer
+        pacer.start(self.clock_t0)
+        ticks = 1
+        while self._clocking:
+            if not self.sending():
+                # Nothing goes out during a reset; drop the ticks missed
+                # meanwhile and start over on a new grid
+                while not self.sending():
+                    if not self._clocking:
+                        return
+                    time.sleep(HOLD_POLL)
+                pacer.start(self.resume_anchor())
+                ticks = pacer.wait()
+            self.apply_restarts()
+            self.tick(ticks)
+            ticks = pacer.wait()
+
+    async def _clock(self):
+        self._clocking = True
+        thread = threading.Thread(target=self._clock_loop, name="sample-clock", daemon=True)
+        thread.start()
+        try:
+            while thread.is_alive():
+                await asyncio.sleep(CLOCK_WATCH)
+            self.log("[ERROR] Sample clock thread exited")
+            self.stop()
+        finally:
+            self._clocking = False
+            thread.join()
+
+    def close(self):
+        """Release resources that outlive run() (see multi_streamer)"""
+
+    # ==================== RUN ====================
+    async def run(self, reset=True):
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._log_queue = asyncio.Queue()
+
+        # Data goes straight out of the clock thread; a full socket
+        # buffer counts as a send error instead of stalling the clock
+        data_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        data_sock.setblocking(False)
+        self._cmd_transport, _ = await self.loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, family=socket.AF_INET)
+
+        self.sender = BulkSender(data_sock, self.nodes.destinations(), self.backend,
+                                 counters=self.slot_counters)
+
+        printer = self.loop.create_task(self._printer())
+        tasks = [self.loop.create_task(self.telemetry.run())]
+        try:
+            if reset:
+                await self.reset_nodes()
+            tasks += [self.loop.create_task(self._clock()),
+                      self.loop.create_task(self._status())]
+            await self._stop.wait()
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Flush whatever is still queued for the terminal
+            self._log_queue.put_nowait(None)
+            await asyncio.gather(printer, return_exceptions=True)
+            self._log_queue = None
+
+            data_sock.close()
+            self._cmd_transport.close()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# ============================================================
+# STREAMER TELEMETRY
+# Per-node send rates, errors and sample-clock lateness
+# Author: Noridel Herron
+# ============================================================
+#
+# Sources (all cumulative, read without locking):
+#   core.counters()     -> per-node packets / bytes / errors
+#                          (bulk_send.BulkSender slot counters)
+#   core.lateness_hist()-> pacing.PacingScheduler.hist, how late each
+#                          tick went out against its deadline
+# sample() turns the counter deltas since the previous sample into
+# per-node rates. A streamer falling behind shows up as pps/node
+# below the sample rate, lateness mass beyond one period (~278 us)
+# and a growing `skipped` count.
+#
+# Outputs:
+#   'p' key        -> report_lines()
+#   JSON lines     -> json_path "-" (stdout) or a file, every interval
+#   local endpoint -> http_port: GET /telemetry on 127.0.0.1
+#                     unix_path: connect and read one JSON document
+#                     (e.g. socat - UNIX-CONNECT:/tmp/streamer.sock)
+# ============================================================
+
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+from pacing import hist_edges_us
+
+SAMPLE_INTERVAL = 1.0    # seconds between rate samples
+JSON_INTERVAL   = 10.0   # seconds between JSON lines
+WORST_NODES     = 5      # slowest nodes listed by report_lines()
+
+class Telemetry:
+    def __init__(self, core):
+        self.core = core
+        n = len(core.nodes)
+        self.pps = np.zeros(n)
+        self.bps = np.zeros(n)
+        self.window = 0.0
+        self._prev = None
+        self._prev_t = None
+
+        self.json_path = None
+        self.json_interval = JSON_INTERVAL
+        self.http_port = None
+        self.unix_path = None
+        self._servers = []
+
+    def configure(self, json_path=None, json_interval=JSON_INTERVAL, http_port=None, unix_path=None):
+        self.json_path = json_path
+        self.json_interval = json_interval
+        self.http_port = http_port
+        self.unix_path = unix_path
+
+    # ==================== SAMPLING ====================
+    def sample(self):
+        """Update per-node rates from the counters since the last sample"""
+        packets, size, _ = self.core.counters()
+        now = time.perf_counter()
+        current = (packets.copy(), size.copy())
+        if self._prev is not None and now > self._prev_t:
+            dt = now - self._prev_t
+            self.pps = (current[0] - self._prev[0]) / dt
+            self.bps = (current[1] - self._prev[1]) / dt
+            self.window = dt
+        self._prev, self._prev_t = current, now
+
+    def snapshot(self):
+        core = self.core
+        reg = core.nodes
+        packets, size, errors = core.counters()
+        hist = core.lateness_hist()
+        clock = core.clock_stats()
+        return {
+            "time": time.time(),
+            "window_s": round(self.window, 3),
+            "clock": clock,
+            "lateness_hist": {"edges_us": hist_edges_us(), "counts": hist.tolist()},
+            "totals": {
+                "pps": float(self.pps.sum()),
+                "bps": float(self.bps.sum()),
+                "packets": int(packets.sum()),
+                "bytes": int(size.sum()),
+                "errors": int(errors.sum()),
+            },
+            # Columnar: one list per field, index = registry slot
+            "nodes": {
+                "id": reg.ids.tolist(),
+                "scenario": [core.names[s] for s in reg.scenario],
+                "cycle": core.node_cycle().tolist(),
+                "pps": np.round(self.pps, 1).tolist(),
+                "bps": np.round(self.bps, 1).tolist(),
+                "errors": errors.tolist(),
+            },
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), separators=(",", ":"))
+
+    # ==================== TEXT REPORT ====================
+    def report_lines(self):
+        core = self.core
+        _, _, errors = core.counters()
+        hist = core.lateness_hist()
+        lines = [f"  Rate  : {self.pps.sum():.0f} pkt/s, {self.bps.sum() / 1e3:.1f} kB/s "
+                 f"(per node {self.pps.mean():.0f} pkt/s, last {self.window:.1f} s), "
+                 f"errors {int(errors.sum())}"]
+
+        # Lateness histogram: only non-empty bins, share of ticks
+        total = max(int(hist.sum()), 1)
+        edges = hist_edges_us()
+        bins = [f"{'<1' if k == 0 else f'>={edges[k]}'}us:{100 * c / total:.1f}%"
+                for k, c in enumerate(hist) if c]
+        lines.append(f"  Late  : {' '.join(bins) or 'no ticks yet'}")
+
+        if len(core.nodes) > 1:
+            slow = np.argsort(self.pps)[:WORST_NODES]
+            ids = core.nodes.ids
+            lines.append("  Slow  : " + " ".join(f"N{ids[k]}:{self.pps[k]:.0f}" for k in slow))
+        bad = np.flatnonzero(errors)
+        if len(bad):
+            ids = core.nodes.ids
+            lines.append("  Errors: " + " ".join(f"N{ids[k]}:{errors[k]}" for k in bad[:10]))
+        return lines
+
+    # ==================== TASKS ====================
+    async def run(self):
+        """Sample rates forever; emit JSON lines when configured"""
+        loop = asyncio.get_running_loop()
+        await self._start_endpoints()
+        last_json = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(SAMPLE_INTERVAL)
+                self.sample()
+                if self.json_path and time.monotonic() - last_json >= self.json_interval:
+                    last_json = time.monotonic()
+                    line = self.to_json()
+                    if self.json_path == "-":
+                        self.core.log(line)
+                    else:
+                        await loop.run_in_executor(None, _append_line, self.json_path, line)
+        finally:
+            for server in self._servers:
+                server.close()
+            if self.unix_path and os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+
+    async def _start_endpoints(self):
+        if self.http_port is not None:
+            server = await asyncio.start_server(self._serve_http, "127.0.0.1", self.http_port)
+            self._servers.append(server)
+            self.core.log(f"[TELEMETRY] http://127.0.0.1:{self.http_port}/telemetry")
+        if self.unix_path:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+            server = await asyncio.start_unix_server(self._serve_unix, self.unix_path)
+            self._servers.append(server)
+            self.core.log(f"[TELEMETRY] unix socket {self.unix_path}")
+
+    async def _serve_http(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 2.0)
+            while (await asyncio.wait_for(reader.readline(), 2.0)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.split()
+            path = parts[1].decode(errors="ignore") if len(parts) > 1 else ""
+            if path in ("/", "/telemetry"):
+                status, body = "200 OK", self.to_json().encode()
+            else:
+                status, body = "404 Not Found", b'{"error":"not found"}'
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve_unix(self, reader, writer):
+        try:
+            writer.write(self.to_json().encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def _append_line(path, line):
+    with open(path, "a") as f:
+        f.write(line + "\n")
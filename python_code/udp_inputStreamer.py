@@ -6,15 +6,19 @@
 # December 2025
 # ============================================================
 
-import socket
+import asyncio
 import csv
-import time
 import os
 import sys
-import select
 import termios
 import tty
 
+import sample_store
+from wave_packets import DatagramCache, adc_tenths
+from stream_core import StreamerCore
+from multi_streamer import MultiStreamer
+from node_registry import NodeRegistry
+
 # ==================== CONFIG ====================
 CMD_PORT  = 6000
 DATA_PORT = 6001
@@ -23,9 +27,39 @@ CSV_DIR = "../csv_output"
 
 SAMPLES_PER_CYCLE = 60
 SAMPLE_RATE       = 3600.0
-SAMPLE_PERIOD     = 1.0 / SAMPLE_RATE
+STATUS_INTERVAL   = 10.0
+
+# Samples per datagram: 1 = WAVE|v|i, >1 = WAVEN|k|v1|i1|... (max 60).
+# A node gets one datagram every WAVE_BATCH ticks; batching needs
+# firmware that understands WAVEN. Scenarios are always pre-encoded.
+WAVE_BATCH = 1
+
+# Sample clock: "catchup" re-sends missed samples in a burst,
+# "skip" drops them and stays on the deadline grid (see pacing.py)
+PACING_POLICY = "catchup"
+
+# Worker processes for large fleets (1 = stream in this process).
+# Workers share the encoded scenarios and one clock anchor; see
+# multi_streamer.py. The second command-line argument overrides it.
+STREAM_WORKERS = 1
+
+# Telemetry (see telemetry.py): per-node pkt/s, bytes/s, errors and
+# a sample-clock lateness histogram. 'p' always shows it; optionally
+# also a JSON line every TELEMETRY_INTERVAL s ("-" = stdout, or a
+# file path), GET /telemetry on 127.0.0.1:TELEMETRY_HTTP_PORT and/or
+# one JSON document per connection on the TELEMETRY_UNIX socket.
+TELEMETRY_JSON      = None
+TELEMETRY_INTERVAL  = 10.0
+TELEMETRY_HTTP_PORT = None      # e.g. 8765
+TELEMETRY_UNIX      = None      # e.g. "/tmp/udp_streamer.sock"
+
+# Cached datagrams for all nodes go out together each tick:
+# "sendmmsg" (Linux, one syscall), "loop" (sendto per node), "auto"
+SEND_BACKEND = "auto"
 
 # ==================== ESP NODES ====================
+# Used when no node config is given on the command line
+# (python3 udp_inputStreamer.py ../config/nodes_sim.json)
 NODES = {
     # change "xx.xxx" based on your ESP assigned address
     1: "192.168.XX.XXX", 
@@ -42,6 +76,15 @@ CSV_FILES = {
     "oc":   "oc.csv",
 }
 
+# key -> (scenario, label)
+SCENARIO_KEYS = {
+    "b": ("base", "BASE"),
+    "s": ("t1",   "SAG (t1)"),
+    "w": ("t2",   "SWELL (t2)"),
+    "m": ("t3",   "MIXED (t3)"),
+    "o": ("oc",   "OVERCURRENT"),
+}
+
 # ==================== TERMINAL MODE ====================
 old_settings = None
 
@@ -57,10 +100,16 @@ def disable_raw_mode():
 
 # ==================== LOAD CSV ====================
 def load_csv(path):
+    # (N, 2) samples in tenths of a count; prefer the memory-mapped
+    # binary store next to the CSV, already in that form
+    bin_path = sample_store.find_binary(path)
+    if bin_path:
+        return sample_store.load_samples(bin_path)
+
     data = []
     if not os.path.exists(path):
         print(f"[ERROR] File not found: {path}")
-        return data
+        return adc_tenths(data)
     
     with open(path, newline="") as f:
         rows = list(csv.reader(f))
@@ -70,63 +119,83 @@ def load_csv(path):
                 data.append((float(r[0]), float(r[1])))
             except (ValueError, IndexError):
                 continue
-    return data
-
-# ==================== SEND COMMAND ====================
-def send_cmd(sock, ip, msg):
-    sock.sendto(msg.encode(), (ip, CMD_PORT))
-    print(f"[CMD -> {ip}] {msg}")
-    time.sleep(0.1)
-
-# ==================== RESET ALL NODES ====================
-def reset_all_nodes(cmd_sock):
-    print("\n===== RESETTING ALL ESP32 NODES =====")
-    
-    for nid, ip in NODES.items():
-        send_cmd(cmd_sock, ip, f"RESET_CYCLE|0|{nid}")
-    
-    time.sleep(1)
-    
-    for nid, ip in NODES.items():
-        send_cmd(cmd_sock, ip, f"SET_MODE|MODE_UDP|{nid}")
-        send_cmd(cmd_sock, ip, f"SET_SEND|ON|{nid}")
-    
-    time.sleep(0.5)
-    print("[OK] All nodes reset\n")
+    return adc_tenths(data)
+
+# ==================== KEYBOARD ====================
+class KeyboardControl:
+    """Reads keys from stdin without blocking the streamer's event loop"""
+
+    def __init__(self, core):
+        self.core = core
+        self.selected_node = 0  # 0 = ALL, else a node id
+
+    def attach(self, loop, fd):
+        loop.add_reader(fd, self._on_readable, fd)
+
+    def _on_readable(self, fd):
+        try:
+            data = os.read(fd, 32)
+        except OSError:
+            return
+        if not data:
+            # stdin closed: keep streaming, stop listening
+            asyncio.get_running_loop().remove_reader(fd)
+            return
+        for key in data.decode(errors="ignore"):
+            self.handle(key)
+
+    def handle(self, key):
+        core = self.core
+        log = core.log
+
+        # Node selection
+        if key == 'a':
+            self.selected_node = 0
+            log("\n[SELECT] ALL nodes")
+
+        elif key.isdigit() and int(key) in core.nodes.slot_of:
+            self.selected_node = int(key)
+            log(f"\n[SELECT] Node {key} ({core.scenario_of(self.selected_node)})")
+
+        # Scenario selection
+        elif key in SCENARIO_KEYS:
+            name, label = SCENARIO_KEYS[key]
+            if self.selected_node == 0:
+                if core.set_scenario(name):
+                    log(f"\n[SCENARIO] ALL -> {label}")
+            elif core.set_scenario(name, self.selected_node):
+                log(f"\n[SCENARIO] Node {self.selected_node} -> {label}")
+
+        elif key == 'r':
+            # Runs as its own task; sends are held until the nodes are back
+            log("\n[RESET] Resetting all nodes...")
+            core.request_reset()
+
+        elif key == 'p':
+            selected = "ALL" if self.selected_node == 0 else f"Node {self.selected_node}"
+            log("\n".join(["\n===== STATUS =====", f"Selected: {selected}",
+                           *core.status_lines(), "=================="]))
+
+        elif key == 'q':
+            log("\n[QUIT]")
+            core.stop()
 
 # ==================== MAIN ====================
-def main():
-    print("\n=== UDP WAVE STREAMER (PER-NODE CONTROL) ===\n")
-
-    cmd_sock  = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    data_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-
-    # Load CSVs
+def load_scenarios():
     scenarios = {}
     for name, fname in CSV_FILES.items():
         path = os.path.join(CSV_DIR, fname)
         samples = load_csv(path)
-        if samples:
-            scenarios[name] = samples
+        if len(samples):
+            scenarios[name] = DatagramCache.from_tenths(samples, WAVE_BATCH)
             cycles = len(samples) // SAMPLES_PER_CYCLE
             print(f"[OK] {name}: {len(samples)} samples ({cycles} cycles)")
+    return scenarios
 
-    if not scenarios:
-        print("[ERROR] No scenarios loaded")
-        return
-
-    # Per-node state
-    node_scenario = {1: "base", 2: "base", 3: "base"}
-    node_idx      = {1: 0, 2: 0, 3: 0}
-    node_cycle    = {1: 0, 2: 0, 3: 0}
-
-    selected_node = 0  # 0 = ALL, 1-3 = specific node
-
-    reset_all_nodes(cmd_sock)
-
+def print_controls():
     print("Controls:")
     print("  a     -> select ALL nodes")
-    print("  1,2,3 -> select specific node")
+    print("  1-9   -> select node by id")
     print("  b     -> base scenario (for selected)")
     print("  s     -> sag scenario t1 (for selected)")
     print("  w     -> swell scenario t2 (for selected)")
@@ -136,159 +205,55 @@ def main():
     print("  p     -> print status")
     print("  q     -> quit\n")
 
-    enable_raw_mode()
-
-    start_time = time.time()
-    last_status = time.time()
+async def run(core):
+    loop = asyncio.get_running_loop()
+    keyboard = KeyboardControl(core)
 
+    # Without a TTY (service, pipe) the core just streams
+    fd = sys.stdin.fileno() if sys.stdin and sys.stdin.isatty() else None
+    if fd is not None:
+        enable_raw_mode()
+        keyboard.attach(loop, fd)
     try:
-        print("[STREAMING] All nodes: BASE\n")
-        
-        while True:
-            # ---------- Keyboard Input ----------
-            if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                key = sys.stdin.read(1)
-
-                # Node selection
-                if key == 'a':
-                    selected_node = 0
-                    print("\n[SELECT] ALL nodes")
-
-                elif key == '1':
-                    selected_node = 1
-                    print(f"\n[SELECT] Node 1 ({node_scenario[1]})")
-
-                elif key == '2':
-                    selected_node = 2
-                    print(f"\n[SELECT] Node 2 ({node_scenario[2]})")
-
-                elif key == '3':
-                    selected_node = 3
-                    print(f"\n[SELECT] Node 3 ({node_scenario[3]})")
-
-                # Scenario selection
-                elif key == 'b':
-                    if selected_node == 0:
-                        for n in [1, 2, 3]:
-                            node_scenario[n] = "base"
-                            node_idx[n] = 0
-                            node_cycle[n] = 0
-                        print("\n[SCENARIO] ALL -> BASE")
-                    else:
-                        node_scenario[selected_node] = "base"
-                        node_idx[selected_node] = 0
-                        node_cycle[selected_node] = 0
-                        print(f"\n[SCENARIO] Node {selected_node} -> BASE")
-
-                elif key == 's' and "t1" in scenarios:
-                    if selected_node == 0:
-                        for n in [1, 2, 3]:
-                            node_scenario[n] = "t1"
-                            node_idx[n] = 0
-                            node_cycle[n] = 0
-                        print("\n[SCENARIO] ALL -> SAG (t1)")
-                    else:
-                        node_scenario[selected_node] = "t1"
-                        node_idx[selected_node] = 0
-                        node_cycle[selected_node] = 0
-                        print(f"\n[SCENARIO] Node {selected_node} -> SAG (t1)")
-
-                elif key == 'w' and "t2" in scenarios:
-                    if selected_node == 0:
-                        for n in [1, 2, 3]:
-                            node_scenario[n] = "t2"
-                            node_idx[n] = 0
-                            node_cycle[n] = 0
-                        print("\n[SCENARIO] ALL -> SWELL (t2)")
-                    else:
-                        node_scenario[selected_node] = "t2"
-                        node_idx[selected_node] = 0
-                        node_cycle[selected_node] = 0
-                        print(f"\n[SCENARIO] Node {selected_node} -> SWELL (t2)")
-
-                elif key == 'm' and "t3" in scenarios:
-                    if selected_node == 0:
-                        for n in [1, 2, 3]:
-                            node_scenario[n] = "t3"
-                            node_idx[n] = 0
-                            node_cycle[n] = 0
-                        print("\n[SCENARIO] ALL -> MIXED (t3)")
-                    else:
-                        node_scenario[selected_node] = "t3"
-                        node_idx[selected_node] = 0
-                        node_cycle[selected_node] = 0
-                        print(f"\n[SCENARIO] Node {selected_node} -> MIXED (t3)")
-
-                elif key == 'o' and "oc" in scenarios:
-                    if selected_node == 0:
-                        for n in [1, 2, 3]:
-                            node_scenario[n] = "oc"
-                            node_idx[n] = 0
-                            node_cycle[n] = 0
-                        print("\n[SCENARIO] ALL -> OVERCURRENT")
-                    else:
-                        node_scenario[selected_node] = "oc"
-                        node_idx[selected_node] = 0
-                        node_cycle[selected_node] = 0
-                        print(f"\n[SCENARIO] Node {selected_node} -> OVERCURRENT")
-
-                elif key == 'r':
-                    print("\n[RESET] Resetting all nodes...")
-                    reset_all_nodes(cmd_sock)
-                    for n in [1, 2, 3]:
-                        node_idx[n] = 0
-                        node_cycle[n] = 0
-                    start_time = time.time()
-
-                elif key == 'p':
-                    print("\n===== STATUS =====")
-                    print(f"Selected: {'ALL' if selected_node == 0 else f'Node {selected_node}'}")
-                    for n in [1, 2, 3]:
-                        print(f"  Node {n}: {node_scenario[n]:6s} cycle {node_cycle[n]}")
-                    print("==================")
-
-                elif key == 'q':
-                    print("\n[QUIT]")
-                    break
-
-            # ---------- Stream One Sample Per Node ----------
-            for nid, ip in NODES.items():
-                scenario = node_scenario[nid]
-                samples = scenarios[scenario]
-                idx = node_idx[nid]
-
-                v_adc, i_adc = samples[idx]
-                msg = f"WAVE|{v_adc:.1f}|{i_adc:.1f}"
-                
-                # Send to THIS node only
-                data_sock.sendto(msg.encode(), (ip, DATA_PORT))
-
-                node_idx[nid] += 1
-
-                # Track cycles
-                if node_idx[nid] % SAMPLES_PER_CYCLE == 0:
-                    node_cycle[nid] += 1
-
-                # Loop back
-                if node_idx[nid] >= len(samples):
-                    node_idx[nid] = 0
-                    node_cycle[nid] = 0
-
-            # Status update every 10 seconds
-            if time.time() - last_status >= 10:
-                print(f"[STATUS] N1:{node_scenario[1]}@{node_cycle[1]} | N2:{node_scenario[2]}@{node_cycle[2]} | N3:{node_scenario[3]}@{node_cycle[3]}")
-                last_status = time.time()
-
-            time.sleep(SAMPLE_PERIOD)
+        await core.run()
+    finally:
+        if fd is not None:
+            loop.remove_reader(fd)
+            disable_raw_mode()
+
+def main():
+    print("\n=== UDP WAVE STREAMER (PER-NODE CONTROL) ===\n")
 
+    if len(sys.argv) > 1:
+        nodes = NodeRegistry.load(sys.argv[1])
+    else:
+        nodes = NodeRegistry.from_nodes(NODES, "base", DATA_PORT, CMD_PORT)
+    print(f"[NODES] {nodes.describe()}")
+
+    scenarios = load_scenarios()
+    if not scenarios:
+        print("[ERROR] No scenarios loaded")
+        return
+
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else STREAM_WORKERS
+    options = dict(sample_rate=SAMPLE_RATE, batch=WAVE_BATCH, backend=SEND_BACKEND,
+                   policy=PACING_POLICY, status_interval=STATUS_INTERVAL)
+    if workers > 1:
+        core = MultiStreamer(scenarios, nodes, workers, **options)
+    else:
+        core = StreamerCore(scenarios, nodes, **options)
+    core.telemetry.configure(TELEMETRY_JSON, TELEMETRY_INTERVAL,
+                             TELEMETRY_HTTP_PORT, TELEMETRY_UNIX)
+    print_controls()
+    print(f"[STREAMING] {core.status_line()}\n")
+
+    try:
+        asyncio.run(run(core))
     except KeyboardInterrupt:
         print("\n\n[STOPPED] Ctrl+C")
-
     finally:
-        disable_raw_mode()
-        cmd_sock.close()
-        data_sock.close()
+        core.close()
         print("[CLEANUP] Done")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
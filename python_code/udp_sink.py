@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# ============================================================
+# LOCAL UDP SINK
+# Stands in for a fleet of ESP32 stream endpoints during load tests
+# Author: Noridel Herron
+# ============================================================
+#
+# Binds every data port in a node config (see node_registry.py) on
+# this host and counts what udp_inputStreamer sends to each node:
+# datagrams, bytes and samples (WAVE = 1, WAVEN|k = k).
+#
+#   terminal 1: python3 udp_sink.py ../config/nodes_sim.json [seconds]
+#   terminal 2: python3 udp_inputStreamer.py ../config/nodes_sim.json
+#
+# Every REPORT_INTERVAL it prints fleet totals and the slowest and
+# fastest node, so sample-rate shortfalls and idle nodes show up.
+# ============================================================
+
+import selectors
+import socket
+import sys
+import time
+
+import numpy as np
+
+from node_registry import NodeRegistry
+
+REPORT_INTERVAL = 2.0
+RECV_SIZE = 2048
+RCVBUF = 1 << 20
+
+SAMPLES_PER_SEC = 3600
+
+def samples_in(payload):
+    # WAVEN|k|... carries k samples, WAVE|v|i carries one
+    if payload.startswith(b"WAVEN|"):
+        end = payload.find(b"|", 6)
+        try:
+            return int(payload[6:end])
+        except ValueError:
+            return 0
+    return 1 if payload.startswith(b"WAVE|") else 0
+
+class UdpSink:
+    def __init__(self, registry, host=None):
+        self.registry = registry
+        n = len(registry)
+        self.packets = np.zeros(n, dtype=np.int64)
+        self.bytes = np.zeros(n, dtype=np.int64)
+        self.samples = np.zeros(n, dtype=np.int64)
+        self.other = 0           # datagrams that were not WAVE/WAVEN
+
+        self.sel = selectors.DefaultSelector()
+        self.socks = []
+        for slot, (ip, port) in enumerate(registry.destinations()):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF)
+            sock.bind((host or ip, port))
+            sock.setblocking(False)
+            self.sel.register(sock, selectors.EVENT_READ, slot)
+            self.socks.append(sock)
+
+    def poll(self, timeout):
+        """Drain every readable socket once; returns datagrams received"""
+        got = 0
+        for key, _ in self.sel.select(timeout):
+            sock, slot = key.fileobj, key.data
+            packets = size = samples = 0
+            while True:
+                try:
+                    payload = sock.recv(RECV_SIZE)
+                except BlockingIOError:
+                    break
+                packets += 1
+                size += len(payload)
+                k = samples_in(payload)
+                if k:
+                    samples += k
+                else:
+                    self.other += 1
+            self.packets[slot] += packets
+            self.bytes[slot] += size
+            self.samples[slot] += samples
+            got += packets
+        return got
+
+    def snapshot(self):
+        return self.packets.copy(), self.bytes.copy(), self.samples.copy()
+
+    def close(self):
+        for sock in self.socks:
+            self.sel.unregister(sock)
+            sock.close()
+        self.sel.close()
+
+def report(sink, prev, dt):
+    packets, size, samples = sink.snapshot()
+    d_pkt = packets - prev[0]
+    d_samples = (samples - prev[2]) / dt
+    total_bytes = size.sum() - prev[1].sum()
+    idle = int(np.count_nonzero(d_pkt == 0))
+    slow, fast = int(np.argmin(d_samples)), int(np.argmax(d_samples))
+    ids = sink.registry.ids
+
+    print(f"[SINK] {d_pkt.sum() / dt:9.0f} pkt/s  {total_bytes / dt / 1e6:6.2f} MB/s  "
+          f"samples/node {d_samples.mean():7.1f}/s (target {SAMPLES_PER_SEC})  "
+          f"min N{ids[slow]} {d_samples[slow]:.0f}  max N{ids[fast]} {d_samples[fast]:.0f}  "
+          f"idle {idle}")
+    return packets, size, samples
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 udp_sink.py <nodes.json> [seconds]")
+        sys.exit(1)
+
+    registry = NodeRegistry.load(sys.argv[1])
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    sink = UdpSink(registry)
+    print(f"[SINK] Listening for {registry.describe()}")
+
+    prev = sink.snapshot()
+    t_start = t_last = time.perf_counter()
+    try:
+        while seconds is None or time.perf_counter() - t_start < seconds:
+            sink.poll(0.1)
+            now = time.perf_counter()
+            if now - t_last >= REPORT_INTERVAL:
+                prev = report(sink, prev, now - t_last)
+                t_last = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        elapsed = time.perf_counter() - t_start
+        print(f"\n[SINK] {sink.packets.sum()} datagrams, {sink.samples.sum()} samples "
+              f"in {elapsed:.1f} s from {np.count_nonzero(sink.packets)}/{len(registry)} nodes"
+              f"{f', {sink.other} unrecognized' if sink.other else ''}")
+        sink.close()
+
+if __name__ == "__main__":
+    main()
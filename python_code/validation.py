@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+# ============================================================
+# VALIDATION ENGINE (ESP32 + Process 2)
+# Shared model and checks behind validator.py / verify.py
+# Author: Noridel Herron
+# ============================================================
+#
+# Reference : baseline Raw_V/Raw_I samples -> physical units -> RMS
+#             per 60-sample cycle (or sliding, hop < 60)
+# Observed  : power_monitor.csv, parsed as one text block into a
+#             (rows, 24) matrix, then split into one NodeRecords per
+#             node with one typed array per field (cycle, vrms, vpeak,
+#             irms, ipeak, vstat, istat, power)
+# Checks    : mean Vrms/Irms vs reference (percent), Process 2 logic
+#             per record (peaks, status, power), and each record joined
+#             to the reference cycle it reports (cycle id modulo the
+#             scenario length), all as array expressions over a node's
+#             records
+# Faults    : optional; sag/swell/OC onsets expected from the reference
+#             RMS reconciled with fault_events.txt and power_monitor.csv
+#             status changes (missed, spurious, late, latency in cycles)
+#
+# Tolerances differ per front end, so they are passed in:
+#   validator.py -> VALIDATOR_TOLERANCES (0.1% peaks/power, skip
+#                   records with Vrms and Irms below 0.01)
+#   verify.py    -> VERIFY_TOLERANCES (1% peaks/power, skip records
+#                   that are exactly zero)
+# ============================================================
+
+import csv
+import os
+import warnings
+from collections import namedtuple
+
+import numpy as np
+
+import sample_store
+from fault_log import EV_SAG, EV_SWELL, EV_V_NORMAL, EV_OC, EV_I_NORMAL, read_events
+
+# ==================== ADC + SCALING (same as ESP32) ====================
+ADC_MAX = 4095.0
+ADC_MID = ADC_MAX / 2.0
+V_SCALE = 170.0 / (ADC_MID * 0.6)
+I_SCALE = 0.0244
+
+WINDOW  = 60  # ESP32 RMS window size
+SQRT2   = 1.414213562
+
+# ==================== FAULT THRESHOLDS ====================
+V_SAG_LEVEL    = 50.0
+V_SWELL_LEVEL  = 130.0
+I_OC_LEVEL     = 11.0
+
+VSTATUS_NORMAL = 0
+VSTATUS_SAG    = 1
+VSTATUS_SWELL  = 2
+ISTATUS_NORMAL = 0
+ISTATUS_OC     = 1
+
+NODES = (1, 2, 3)
+
+PARSE_BLOCK = 1024   # power_monitor.csv rows per text parse on the slow path
+
+# Fault reconciliation
+V_EVENTS = np.array([EV_V_NORMAL, EV_SAG, EV_SWELL])   # event kind per vstat
+I_EVENTS = np.array([EV_I_NORMAL, EV_OC])             # event kind per istat
+FAULT_KINDS = ((EV_SAG, "v"), (EV_SWELL, "v"), (EV_OC, "i"))
+EVENT_LATE_CYCLES = 6   # one 100 ms ESP32 send interval at 60 cycles/s
+MATCH_SLACK = 1         # cycles an onset may trail the end of its expected fault
+
+# ==================== MODEL ====================
+# rms_pct    : allowed |mean - reference| / reference, in percent
+# peak       : relative tolerance on Vpeak/Ipeak = RMS * sqrt(2)
+# power      : relative tolerance on power = Vrms * Irms
+# init_floor : skip records with Vrms and Irms both below this value
+#              (0.0 -> skip only records that are exactly zero)
+# cycle_pct  : per-cycle |logged - reference| / reference, in percent
+Tolerances = namedtuple("Tolerances", ["rms_pct", "peak", "power", "init_floor", "cycle_pct"],
+                        defaults=(5.0, 0.01, 0.01, 0.0, 1.0))
+
+VALIDATOR_TOLERANCES = Tolerances(rms_pct=5.0, peak=0.001, power=0.001, init_floor=0.01)
+VERIFY_TOLERANCES    = Tolerances(rms_pct=5.0, peak=0.01,  power=0.01,  init_floor=0.0)
+
+RECORD_FIELDS = ("cycle", "vrms", "vpeak", "irms", "ipeak", "vstat", "istat", "power")
+RECORD_TYPES  = (np.int64, np.float64, np.float64, np.float64, np.float64,
+                 np.int8, np.int8, np.float64)
+
+NodeRecords = namedtuple("NodeRecords", RECORD_FIELDS)
+
+# ==================== STATUS LOGIC ====================
+def expected_vstatus(vrms):
+    # Same decision as the voltage thread; scalar or array
+    vrms = np.asarray(vrms)
+    status = np.where(vrms < V_SAG_LEVEL, VSTATUS_SAG,
+                      np.where(vrms > V_SWELL_LEVEL, VSTATUS_SWELL, VSTATUS_NORMAL))
+    return np.where(vrms < 0.1, VSTATUS_NORMAL, status)
+
+def expected_istatus(irms):
+    irms = np.asarray(irms)
+    return np.where((irms >= 0.1) & (irms > I_OC_LEVEL), ISTATUS_OC, ISTATUS_NORMAL)
+
+# ==================== REFERENCE ====================
+def load_baseline_csv(filepath):
+    # Load baseline ADC samples and convert to physical values
+    bin_path = sample_store.find_binary(filepath)
+    if bin_path:
+        # Scaled in place: one float array per channel, no (N, 2) copy
+        v, i = sample_store.load_adc_columns(bin_path)
+        v -= ADC_MID
+        v *= V_SCALE
+        i -= ADC_MID
+        i *= I_SCALE
+        return v, i
+
+    if not os.path.exists(filepath):
+        print(f"[ERROR] Baseline CSV not found: {filepath}")
+        return None, None
+
+    v_samples = []
+    i_samples = []
+
+    with open(filepath, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)  # skip header
+
+        for row in reader:
+            if len(row) < 2:
+                continue
+            try:
+                v_adc = float(row[0])
+                i_adc = float(row[1])
+            except ValueError:
+                continue
+            v_samples.append(v_adc)
+            i_samples.append(i_adc)
+
+    v_adc = np.array(v_samples)
+    i_adc = np.array(i_samples)
+    return (v_adc - ADC_MID) * V_SCALE, (i_adc - ADC_MID) * I_SCALE
+
+def calculate_reference_rms(v_samples, i_samples, window=WINDOW, hop=None):
+    # hop = None (or window): one RMS per complete cycle, like the ESP32
+    # hop < window: sliding RMS every `hop` samples
+    v = np.asarray(v_samples, dtype=np.float64)
+    i = np.asarray(i_samples, dtype=np.float64)
+    return window_rms(v, window, hop), window_rms(i, window, hop)
+
+def window_rms(x, window=WINDOW, hop=None):
+    if hop is None or hop == window:
+        # (cycles, window) view -> one mean square per row
+        num_cycles = len(x) // window
+        cycles = x[:num_cycles * window].reshape(num_cycles, window)
+        return np.sqrt(np.einsum("ij,ij->i", cycles, cycles) / window)
+
+    if not 0 < hop < window:
+        raise ValueError(f"hop must be in 1..{window}, got {hop}")
+    # Sum of squares over [s, s + window) from one cumulative sum
+    csum = np.concatenate(([0.0], np.cumsum(x * x)))
+    starts = np.arange(0, len(x) - window + 1, hop)
+    sq = (csum[starts + window] - csum[starts]) / window
+    return np.sqrt(np.maximum(sq, 0.0))
+
+def series_stats(values):
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {"avg": 0.0, "std": 0.0, "min": 0.0, "max": 0.0, "count": 0}
+    return {
+        "avg": float(values.mean()),
+        "std": float(values.std(ddof=1)) if len(values) > 1 else 0.0,
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "count": len(values),
+    }
+
+# ==================== PROCESS 2 OUTPUT ====================
+def init_mask(vrms, irms, init_floor):
+    # Initialization records: node not heard yet (all-zero row)
+    if init_floor > 0.0:
+        return (vrms < init_floor) & (irms < init_floor)
+    return (vrms == 0.0) & (irms == 0.0)
+
+def _parse_fields(body, width):
+    # Slow path for one damaged line: unparsable or missing -> NaN
+    fields = body.split(",")
+    values = np.full(width, np.nan)
+    for k in range(min(width, len(fields))):
+        try:
+            values[k] = float(fields[k])
+        except ValueError:
+            pass
+    return values
+
+def _parse_timestamps(stamps):
+    try:
+        return np.array(stamps, dtype="datetime64[s]")
+    except ValueError:
+        out = np.full(len(stamps), np.datetime64("NaT"), dtype="datetime64[s]")
+        for k, stamp in enumerate(stamps):
+            try:
+                out[k] = np.datetime64(stamp, "s")
+            except ValueError:
+                pass
+        return out
+
+def read_power_monitor(filepath):
+    """power_monitor.csv -> (columns, timestamps, values)
+
+    columns maps a header name (cycle1, vrms2, ...) to its index in
+    values, a (rows, 24) float64 matrix of every field after the
+    timestamp. Fields that do not parse are NaN.
+    """
+    with open(filepath) as f:
+        header = f.readline().strip().split(",")
+        width = len(header) - 1
+        columns = {name: k - 1 for k, name in enumerate(header) if k}
+
+        # Fast path: every row intact -> one C-level parse of the file
+        row_dtype = np.dtype([("timestamp", "datetime64[s]"), ("values", np.float64, (width,))])
+        start = f.tell()
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # header-only file
+                rows = np.loadtxt(f, delimiter=",", dtype=row_dtype, ndmin=1)
+            return columns, rows["timestamp"], rows["values"]
+        except ValueError:
+            f.seek(start)
+            lines = [line for line in f.read().splitlines() if line.strip()]
+
+    if not lines:
+        return columns, np.empty(0, dtype="datetime64[s]"), np.empty((0, width))
+    stamps, _, bodies = zip(*(line.partition(",") for line in lines))
+    return columns, _parse_timestamps(stamps), parse_rows(bodies, width)
+
+def _parse_block(bodies, width):
+    # One text parse for a run of rows with width fields each; None if
+    # any field is damaged
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            values = np.fromstring(",".join(bodies), dtype=np.float64, sep=",")
+    except (ValueError, DeprecationWarning):
+        return None
+    if len(values) != width * len(bodies):
+        return None
+    return values.reshape(len(bodies), width)
+
+def parse_rows(bodies, width, block=PARSE_BLOCK):
+    # Field counts are checked row by row: a short row next to a long one
+    # still adds up to the right total and would shift every field between
+    shaped = [body.count(",") == width - 1 for body in bodies]
+    if all(shaped):
+        values = _parse_block(bodies, width)
+        if values is not None:
+            return values
+
+    # Damaged rows somewhere: misshapen ones line by line, the rest in
+    # blocks (line by line only where a block fails)
+    values = np.empty((len(bodies), width))
+    rows = []
+    for k, ok in enumerate(shaped):
+        if ok:
+            rows.append(k)
+        else:
+            values[k] = _parse_fields(bodies[k], width)
+    for start in range(0, len(rows), block):
+        chunk = rows[start:start + block]
+        lines = [bodies[k] for k in chunk]
+        parsed = _parse_block(lines, width)
+        if parsed is None:
+            parsed = np.array([_parse_fields(body, width) for body in lines])
+        values[chunk] = parsed
+    return values
+
+def load_process2_output(filepath, init_floor=0.0, nodes=NODES):
+    # Load Process 2 CSV output into one NodeRecords per node
+    if not os.path.exists(filepath):
+        print(f"[ERROR] Process 2 CSV not found: {filepath}")
+        return None
+
+    columns, _, values = read_power_monitor(filepath)
+
+    records = {}
+    for n in nodes:
+        idx = [columns.get(f"{field}{n}") for field in RECORD_FIELDS]
+        if None in idx:
+            block = np.empty((0, len(RECORD_FIELDS)))
+        else:
+            block = values[:, idx]
+            # A damaged field drops that node's record, like a failed float()
+            block = block[~np.isnan(block).any(axis=1)]
+        rec = NodeRecords(*(block[:, k].astype(t) for k, t in enumerate(RECORD_TYPES)))
+        keep = ~init_mask(rec.vrms, rec.irms, init_floor)
+        records[n] = NodeRecords(*(field[keep] for field in rec))
+    return records
+
+# ==================== CHECKS ====================
+def relative_ok(actual, expected, tolerance):
+    return np.abs(actual - expected) / np.maximum(expected, 0.001) < tolerance
+
+def check_rms(rec, vrms_ref, irms_ref, tol):
+    # Mean RMS of one node against the reference mean
+    v = series_stats(rec.vrms)
+    i = series_stats(rec.irms)
+    v_err = abs(v["avg"] - vrms_ref) / vrms_ref * 100
+    i_err = abs(i["avg"] - irms_ref) / irms_ref * 100
+    return {
+        'vrms_avg': v["avg"], 'irms_avg': i["avg"],
+        'vrms_std': v["std"], 'irms_std': i["std"],
+        'vrms_min': v["min"], 'vrms_max': v["max"],
+        'irms_min': i["min"], 'irms_max': i["max"],
+        'v_err'   : v_err,
+        'i_err'   : i_err,
+        'v_pass'  : v_err < tol.rms_pct,
+        'i_pass'  : i_err < tol.rms_pct,
+        'count'   : len(rec.vrms),
+    }
+
+def check_logic(rec, tol):
+    # Process 2 derived fields, counted over all records at once
+    return {
+        'vpeak_ok': int(relative_ok(rec.vpeak, rec.vrms * SQRT2, tol.peak).sum()),
+        'ipeak_ok': int(relative_ok(rec.ipeak, rec.irms * SQRT2, tol.peak).sum()),
+        'vstat_ok': int((rec.vstat == expected_vstatus(rec.vrms)).sum()),
+        'istat_ok': int((rec.istat == expected_istatus(rec.irms)).sum()),
+        'power_ok': int(relative_ok(rec.power, rec.vrms * rec.irms, tol.power).sum()),
+        'total'   : len(rec.vrms),
+    }
+
+def logic_pass(logic):
+    total = logic['total']
+    return all(logic[k] == total for k in ('vpeak_ok', 'ipeak_ok', 'vstat_ok', 'istat_ok', 'power_ok'))
+
+# ==================== PER-CYCLE ALIGNMENT ====================
+# The ESP32 increments cycle_id after each complete 60-sample window,
+# so a record logged with cycle c carries the RMS of window c - 1. The
+# streamer loops the scenario, so that window is reference cycle
+# (c - 1 + offset) % len(reference); offset is the scenario cycle the
+# node started on (0 after RESET_CYCLE with a fresh stream).
+
+def reference_index(cycles, num_cycles, offset=0):
+    return (np.asarray(cycles, dtype=np.int64) - 1 + offset) % num_cycles
+
+def estimate_offset(rec, vrms_ref, irms_ref, max_records=256):
+    """Scenario offset that best explains a node's records"""
+    if not len(rec.cycle):
+        return 0
+    pick = np.linspace(0, len(rec.cycle) - 1, min(len(rec.cycle), max_records)).astype(np.int64)
+    L = len(vrms_ref)
+    # (records, offsets) matrix of reference indices
+    idx = (rec.cycle[pick, None] - 1 + np.arange(L)[None, :]) % L
+    v_err = np.abs(rec.vrms[pick, None] - vrms_ref[idx]) / np.maximum(vrms_ref[idx], 0.001)
+    i_err = np.abs(rec.irms[pick, None] - irms_ref[idx]) / np.maximum(irms_ref[idx], 0.001)
+    return int(np.argmin(np.median(v_err + i_err, axis=0)))
+
+def error_stats(err, ref, cycles, tol_pct):
+    # Distribution of per-cycle errors (err in units, percent vs ref)
+    if not len(err):
+        return {'mean': 0.0, 'std': 0.0, 'p50_pct': 0.0, 'p95_pct': 0.0, 'p99_pct': 0.0,
+                'max': 0.0, 'max_pct': 0.0, 'max_cycle': -1, 'within': 0}
+    pct = np.abs(err) / np.maximum(ref, 0.001) * 100
+    p50, p95, p99 = np.percentile(pct, [50, 95, 99])
+    k = int(np.abs(err).argmax())
+    return {
+        'mean'     : float(err.mean()),
+        'std'      : float(err.std()),
+        'p50_pct'  : float(p50),
+        'p95_pct'  : float(p95),
+        'p99_pct'  : float(p99),
+        'max'      : float(abs(err[k])),
+        'max_pct'  : float(pct[k]),
+        'max_cycle': int(cycles[k]),
+        'within'   : int((pct < tol_pct).sum()),
+    }
+
+def cycle_sequence(cycles):
+    # Logged cycle ids in file order: steps, repeats, gaps and resets
+    delta = np.diff(np.asarray(cycles, dtype=np.int64))
+    forward = delta[delta > 0]
+    step = float(np.median(forward)) if len(forward) else 0.0
+    missing = 0
+    if step > 0:
+        gaps = forward[forward > 1.5 * step]
+        missing = int((np.rint(gaps / step) - 1).sum())
+    return {
+        'step'      : step,
+        'duplicates': int((delta == 0).sum()),
+        'missing'   : missing,
+        'resets'    : int((delta < 0).sum()),
+    }
+
+def align_cycles(rec, vrms_ref, irms_ref, tol, offset=0):
+    """Join each record to its reference cycle and compare RMS per cycle"""
+    if offset is None:
+        offset = estimate_offset(rec, vrms_ref, irms_ref)
+    L = len(vrms_ref)
+    idx = reference_index(rec.cycle, L, offset)
+    v_ref = vrms_ref[idx]
+    i_ref = irms_ref[idx]
+    result = {
+        'offset'  : offset,
+        'count'   : len(idx),
+        'covered' : int(len(np.unique(idx))),
+        'vrms'    : error_stats(rec.vrms - v_ref, v_ref, rec.cycle, tol.cycle_pct),
+        'irms'    : error_stats(rec.irms - i_ref, i_ref, rec.cycle, tol.cycle_pct),
+    }
+    result.update(cycle_sequence(rec.cycle))
+    return result
+
+# ==================== FAULT RECONCILIATION ====================
+# Expected faults come from the reference RMS of every cycle in the
+# node's observed range (same offset as the per-cycle alignment);
+# observed faults from fault_events.txt lines and from vstat/istat
+# changes between power_monitor.csv rows. Each becomes a list of
+# (start, end) intervals per fault kind: an onset lasts until the
+# next event of its group, since log_thread.c can go SAG -> SWELL
+# without a NORMAL line. Observed onsets are joined to the expected
+# interval containing them with one searchsorted over the sorted
+# starts: no interval -> spurious, a second onset in the same
+# interval -> duplicate, an interval without onsets -> missed, and
+# a detection more than late_cycles after the start -> late.
+
+def status_events(cycles, status, kind_of):
+    # Status changes -> (cycle, kind), starting from NORMAL like log_thread.c
+    status = np.clip(np.asarray(status, dtype=np.int64), 0, len(kind_of) - 1)
+    changed = np.flatnonzero(status != np.r_[0, status[:-1]])
+    return np.asarray(cycles, dtype=np.int64)[changed], kind_of[status[changed]]
+
+def fault_intervals(cycles, kinds, group_kinds, kind):
+    # (start, end) of each `kind` onset; end = next event of the group, -1 if none
+    in_group = np.isin(kinds, group_kinds)
+    c, k = cycles[in_group], kinds[in_group]
+    ends = np.r_[c[1:], -1]
+    onset = k == kind
+    return c[onset], ends[onset]
+
+def last_segment(cycles):
+    # Index where the cycle ids last went backwards (RESET_CYCLE)
+    back = np.flatnonzero(np.diff(cycles) < 0)
+    return int(back[-1]) + 1 if len(back) else 0
+
+def latency_stats(latency):
+    if not len(latency):
+        return None
+    p50, p95 = np.percentile(latency, [50, 95])
+    return {'p50': float(p50), 'p95': float(p95), 'max': int(latency.max())}
+
+def match_faults(expected, observed, late_cycles):
+    """Sorted interval join of observed onsets against expected faults of one kind"""
+    es, ee = expected
+    os_, oe = observed
+    ee_open = np.where(ee < 0, np.iinfo(np.int64).max - MATCH_SLACK, ee)
+
+    j = np.searchsorted(es, os_, side="right") - 1
+    hit = j >= 0
+    hit[hit] = os_[hit] < ee_open[j[hit]] + MATCH_SLACK
+    # Observed onsets are in cycle order: the first one per interval detects it
+    detected, first = np.unique(j[hit], return_index=True)
+    obs = np.flatnonzero(hit)[first]
+
+    latency = os_[obs] - es[detected]
+    closed = (oe[obs] >= 0) & (ee[detected] >= 0)
+    recovery = oe[obs][closed] - ee[detected][closed]
+    missed = np.setdiff1d(np.arange(len(es)), detected)
+    return {
+        'expected'  : len(es),
+        'observed'  : len(os_),
+        'detected'  : len(detected),
+        'missed'    : len(missed),
+        'spurious'  : int((~hit).sum()),
+        'duplicates': int(hit.sum()) - len(detected),
+        'late'      : int((latency > late_cycles).sum()),
+        'latency'   : latency_stats(latency),
+        'recovery'  : latency_stats(recovery),
+        'missed_cycles'  : es[missed],
+        'spurious_cycles': os_[~hit],
+    }
+
+def reconcile_node(rec, node_events, vrms_ref, irms_ref, offset, late_cycles):
+    """Expected vs logged faults for one node, per source and kind"""
+    cycles = rec.cycle[last_segment(rec.cycle):]
+    ev_cycles = np.array([e.cycle for e in node_events], dtype=np.int64)
+    ev_kinds = np.array([e.kind for e in node_events], dtype=np.int64)
+    start = last_segment(ev_cycles)
+    ev_cycles, ev_kinds = ev_cycles[start:], ev_kinds[start:]
+
+    seen = np.r_[cycles, ev_cycles]
+    if not len(seen):
+        return None
+    lo, hi = int(seen.min()), int(seen.max())
+
+    # Reference status of every cycle id the node went through
+    span = np.arange(lo, hi + 1)
+    idx = reference_index(span, len(vrms_ref), offset)
+    expected = {
+        "v": status_events(span, expected_vstatus(vrms_ref[idx]), V_EVENTS),
+        "i": status_events(span, expected_istatus(irms_ref[idx]), I_EVENTS),
+    }
+    csv_seg = slice(last_segment(rec.cycle), None)
+    sources = {
+        'events': ({"v": (ev_cycles, ev_kinds), "i": (ev_cycles, ev_kinds)}, late_cycles),
+        'csv'   : ({"v": status_events(rec.cycle[csv_seg], rec.vstat[csv_seg], V_EVENTS),
+                    "i": status_events(rec.cycle[csv_seg], rec.istat[csv_seg], I_EVENTS)},
+                   cycle_sequence(cycles)['step']),
+    }
+    groups = {"v": V_EVENTS, "i": I_EVENTS}
+
+    result = {'first_cycle': lo, 'last_cycle': hi}
+    for name, (observed, late) in sources.items():
+        result[name] = {
+            kind: match_faults(fault_intervals(*expected[g], groups[g], kind),
+                               fault_intervals(*observed[g], groups[g], kind), late)
+            for kind, g in FAULT_KINDS
+        }
+        result[name + '_late_cycles'] = late
+    return result
+
+def reconcile_faults(records, events, vrms_ref, irms_ref, offsets, late_cycles=EVENT_LATE_CYCLES):
+    """Per node: expected faults vs fault_events.txt and power_monitor.csv"""
+    out = {}
+    for n, rec in records.items():
+        if n not in offsets:
+            continue
+        node_events = [e for e in events if e.node == n]
+        r = reconcile_node(rec, node_events, vrms_ref, irms_ref, offsets[n], late_cycles)
+        if r is not None:
+            out[n] = r
+    return out
+
+def run_validation(baseline_csv, process2_csv, tol, hop=None, offset=0, events_txt=None):
+    """Load both sides and run every check; None if an input is missing"""
+    v_samples, i_samples = load_baseline_csv(baseline_csv)
+    if v_samples is None:
+        return None
+    vrms_all, irms_all = calculate_reference_rms(v_samples, i_samples, hop=hop)
+    if hop is None:
+        vrms_cycles, irms_cycles = vrms_all, irms_all
+    else:
+        vrms_cycles, irms_cycles = calculate_reference_rms(v_samples, i_samples)
+
+    records = load_process2_output(process2_csv, tol.init_floor)
+    if records is None:
+        return None
+
+    vref = series_stats(vrms_all)
+    iref = series_stats(irms_all)
+    nodes = {}
+    logic = {}
+    aligned = {}
+    for n, rec in records.items():
+        if len(rec.vrms):
+            nodes[n] = check_rms(rec, vref["avg"], iref["avg"], tol)
+            logic[n] = check_logic(rec, tol)
+            aligned[n] = align_cycles(rec, vrms_cycles, irms_cycles, tol, offset)
+
+    faults = None
+    if events_txt is not None:
+        if os.path.exists(events_txt):
+            offsets = {n: a['offset'] for n, a in aligned.items()}
+            faults = reconcile_faults(records, read_events(events_txt),
+                                      vrms_cycles, irms_cycles, offsets)
+        else:
+            print(f"[ERROR] Fault event log not found: {events_txt}")
+
+    return {
+        'num_samples': len(v_samples),
+        'vrms_all'   : vrms_all,
+        'irms_all'   : irms_all,
+        'vref'       : vref,
+        'iref'       : iref,
+        'records'    : records,
+        'nodes'      : nodes,
+        'logic'      : logic,
+        'aligned'    : aligned,
+        'faults'     : faults,
+        'tolerances' : tol,
+        'all_pass'   : bool(nodes) and all(r['v_pass'] and r['i_pass'] for r in nodes.values()),
+    }
+
+# ==================== PLOT ====================
+def plot_results(result, path, title="RMS Validation Results", bins=20, show=True):
+    import matplotlib.pyplot as plt
+
+    node_results = result['nodes']
+    vrms_ref = result['vref']['avg']
+    irms_ref = result['iref']['avg']
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+    fig.suptitle(title, fontsize=14, fontweight='bold')
+
+    active_nodes = sorted(node_results)
+    node_labels  = [f"Node {n}" for n in active_nodes]
+
+    # Plot 1: Vrms Comparison
+    ax1 = axes[0, 0]
+    vrms_avgs = [node_results[n]['vrms_avg'] for n in active_nodes]
+    colors = ['green' if node_results[n]['v_pass'] else 'red' for n in active_nodes]
+
+    bars1 = ax1.bar(node_labels, vrms_avgs, color=colors)
+    ax1.axhline(vrms_ref, color='blue', linestyle='--', label=f'Reference ({vrms_ref:.2f}V)')
+    ax1.set_ylabel("Vrms (V)")
+    ax1.set_title("Voltage RMS: ESP32 vs Reference")
+    ax1.legend()
+
+    for bar, val in zip(bars1, vrms_avgs):
+        ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 1,
+                f'{val:.2f}V', ha='center', va='bottom', fontsize=9)
+
+    # Plot 2: Irms Comparison
+    ax2 = axes[0, 1]
+    irms_avgs = [node_results[n]['irms_avg'] for n in active_nodes]
+    colors = ['green' if node_results[n]['i_pass'] else 'red' for n in active_nodes]
+
+    bars2 = ax2.bar(node_labels, irms_avgs, color=colors)
+    ax2.axhline(irms_ref, color='blue', linestyle='--', label=f'Reference ({irms_ref:.2f}A)')
+    ax2.set_ylabel("Irms (A)")
+    ax2.set_title("Current RMS: ESP32 vs Reference")
+    ax2.legend()
+
+    for bar, val in zip(bars2, irms_avgs):
+        ax2.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1,
+                f'{val:.2f}A', ha='center', va='bottom', fontsize=9)
+
+    # Plot 3: Error Percentages
+    ax3 = axes[1, 0]
+    v_errors = [node_results[n]['v_err'] for n in active_nodes]
+    i_errors = [node_results[n]['i_err'] for n in active_nodes]
+
+    x = range(len(active_nodes))
+    width = 0.35
+    ax3.bar([i - width/2 for i in x], v_errors, width, label='Vrms Error', color='steelblue')
+    ax3.bar([i + width/2 for i in x], i_errors, width, label='Irms Error', color='coral')
+    limit = result['tolerances'].rms_pct
+    ax3.axhline(limit, color='red', linestyle='--', label=f'{limit:g}% Threshold')
+    ax3.set_ylabel("Error (%)")
+    ax3.set_title("RMS Error Percentages")
+    ax3.set_xticks(x)
+    ax3.set_xticklabels(node_labels)
+    ax3.legend()
+
+    # Plot 4: Reference Distribution
+    ax4 = axes[1, 1]
+    ax4.hist(result['vrms_all'], bins=bins, alpha=0.7, color='steelblue', edgecolor='black')
+    ax4.axvline(vrms_ref, color='red', linestyle='--', linewidth=2, label=f'Mean ({vrms_ref:.2f}V)')
+    ax4.set_xlabel("Vrms (V)")
+    ax4.set_ylabel("Frequency")
+    ax4.set_title("Reference Vrms Distribution (All Cycles)")
+    ax4.legend()
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+    if show:
+        plt.show()
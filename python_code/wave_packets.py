@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# ============================================================
+# WAVE DATAGRAM ENCODING
+# Pre-encoded UDP payloads for udp_inputStreamer
+# Author: Noridel Herron
+# ============================================================
+#
+# Wire formats (ADC counts with 1 decimal), see esp32_code/*.ino:
+#   WAVE|<v>|<i>                       one sample (sscanf "WAVE|%f|%f")
+#   WAVEN|<k>|<v1>|<i1>|...|<vk>|<ik>  k samples, 1 <= k <= WAVE_BATCH_MAX
+# A full 60-sample WAVEN datagram is ~850 bytes, under WAVE_BUF_SIZE
+# (1024) on the node and a single Ethernet/Wi-Fi frame.
+# ============================================================
+
+import ctypes
+
+import numpy as np
+
+ADC_MAX = 4095.0
+
+WAVE_BATCH_MAX = 60      # must match WAVE_BATCH_MAX in the firmware
+
+# "0.0" ... "4095.0" indexed by tenths of a count; identical to
+# f"{x:.1f}" for every value the generator/CSVs can contain
+ADC_TEXT = np.array([f"{k / 10:.1f}" for k in range(int(ADC_MAX * 10) + 1)], dtype=object)
+
+def encode_sample(v_adc, i_adc):
+    # Single datagram, same bytes as the table-built cache
+    return f"WAVE|{v_adc:.1f}|{i_adc:.1f}".encode()
+
+def encode_batch(samples):
+    """One WAVEN datagram for a short sequence of (v, i) samples"""
+    fields = "|".join(f"{v:.1f}|{i:.1f}" for v, i in samples)
+    return f"WAVEN|{len(samples)}|{fields}".encode()
+
+def adc_tenths(samples):
+    """(N, 2) ADC counts -> (N, 2) int indices into ADC_TEXT"""
+    arr = np.asarray(samples, dtype=float).reshape(-1, 2)
+    return np.clip(np.rint(arr * 10.0), 0, len(ADC_TEXT) - 1).astype(np.int32)
+
+def adc_text(samples):
+    """(N, 2) ADC counts -> (N, 2) object array of '%.1f' strings"""
+    return ADC_TEXT[adc_tenths(samples)]
+
+# ==================== DATAGRAM CACHE ====================
+class DatagramCache:
+    """One scenario encoded once into a contiguous buffer of datagrams.
+
+    buf[offsets[k]:offsets[k + 1]] is datagram k, so the send path is a
+    slice plus sendto with no formatting or encoding. With batch > 1,
+    datagram k is a WAVEN packet carrying samples [k*batch, (k+1)*batch).
+    """
+
+    def __init__(self, payloads, samples=None, batch=1):
+        lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=len(payloads))
+        offsets = np.zeros(len(payloads) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # bytearray so bulk_send can take payload addresses without copying
+        raw = bytearray("".join(payloads).encode("ascii"))
+        self.buf = memoryview(raw)
+        self.address = ctypes.addressof(ctypes.c_char.from_buffer(raw)) if raw else 0
+        self.offsets = memoryview(offsets)   # indexing yields plain ints
+        self._offsets = offsets              # keep the backing array alive
+        self.count = len(payloads)
+        self.samples = self.count if samples is None else samples
+        self.batch = batch
+
+    @classmethod
+    def from_samples(cls, samples, batch=1):
+        return cls.from_tenths(adc_tenths(samples), batch)
+
+    @classmethod
+    def from_tenths(cls, tenths, batch=1):
+        """(N, 2) tenths of a count (e.g. a sample_store memmap) -> cache"""
+        if not 1 <= batch <= WAVE_BATCH_MAX:
+            raise ValueError(f"batch must be 1..{WAVE_BATCH_MAX}, got {batch}")
+
+        text = ADC_TEXT[np.minimum(tenths, len(ADC_TEXT) - 1)]
+        n = len(text)
+        if batch == 1:
+            return cls(("WAVE|" + text[:, 0] + "|" + text[:, 1]).tolist())
+
+        pairs = (text[:, 0] + "|" + text[:, 1]).tolist()
+        payloads = []
+        for start in range(0, n, batch):
+            chunk = pairs[start:start + batch]
+            payloads.append(f"WAVEN|{len(chunk)}|" + "|".join(chunk))
+        return cls(payloads, samples=n, batch=batch)
+
+    def __len__(self):
+        # Length in samples, so callers index/loop the same way for any batch
+        return self.samples
+
+    def datagram(self, idx):
+        off = self.offsets
+        return self.buf[off[idx]:off[idx + 1]]
+
+    def nbytes(self):
+        return len(self.buf) + self._offsets.nbytes